@@ -0,0 +1,29 @@
+"""Add user.token_version for revoking self-contained access tokens
+
+Revision ID: a7c4e0f6b2d9
+Revises: f6b2d8e4a0c5
+Create Date: 2026-10-19 17:30:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+import sqlmodel.sql.sqltypes
+
+
+# revision identifiers, used by Alembic.
+revision = 'a7c4e0f6b2d9'
+down_revision = 'f6b2d8e4a0c5'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    # A constant default: no table rewrite on PostgreSQL 11+
+    op.add_column(
+        'user',
+        sa.Column('token_version', sa.Integer(), nullable=False, server_default='0'),
+    )
+
+
+def downgrade():
+    op.drop_column('user', 'token_version')
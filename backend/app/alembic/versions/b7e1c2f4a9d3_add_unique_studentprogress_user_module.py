@@ -0,0 +1,57 @@
+"""Add unique index on studentprogress (user_id, module_name)
+
+Revision ID: b7e1c2f4a9d3
+Revises: a1b2c3d4e5f6
+Create Date: 2026-10-18 09:12:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+import sqlmodel.sql.sqltypes
+
+
+# revision identifiers, used by Alembic.
+revision = 'b7e1c2f4a9d3'
+down_revision = 'a1b2c3d4e5f6'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    # Concurrent writers could create several rows for one module. Rows have
+    # no timestamp, keep the most advanced one: greatest progress, then
+    # attempts, then last score
+    op.execute(
+        """
+        DELETE FROM studentprogress
+        WHERE id IN (
+            SELECT id FROM (
+                SELECT id, row_number() OVER (
+                    PARTITION BY user_id, module_name
+                    ORDER BY progress DESC, attempts DESC,
+                             last_score DESC NULLS LAST, id
+                ) AS rank
+                FROM studentprogress
+            ) AS ranked
+            WHERE rank > 1
+        )
+        """
+    )
+    # Build without blocking writes, which needs to run outside a transaction
+    with op.get_context().autocommit_block():
+        op.create_index(
+            'ix_studentprogress_user_id_module_name',
+            'studentprogress',
+            ['user_id', 'module_name'],
+            unique=True,
+            postgresql_concurrently=True,
+        )
+
+
+def downgrade():
+    with op.get_context().autocommit_block():
+        op.drop_index(
+            'ix_studentprogress_user_id_module_name',
+            table_name='studentprogress',
+            postgresql_concurrently=True,
+        )
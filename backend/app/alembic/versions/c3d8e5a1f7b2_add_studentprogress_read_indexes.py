@@ -0,0 +1,58 @@
+"""Add covering and partial indexes for progress reads, index item.owner_id
+
+Revision ID: c3d8e5a1f7b2
+Revises: b7e1c2f4a9d3
+Create Date: 2026-10-19 10:05:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+import sqlmodel.sql.sqltypes
+
+
+# revision identifiers, used by Alembic.
+revision = 'c3d8e5a1f7b2'
+down_revision = 'b7e1c2f4a9d3'
+branch_labels = None
+depends_on = None
+
+# Columns stored in the progress indexes so that reads are index-only
+PROGRESS_INCLUDE = ['id', 'module_name', 'last_score', 'attempts']
+
+
+def upgrade():
+    # Build without blocking writes, which needs to run outside a transaction
+    with op.get_context().autocommit_block():
+        op.create_index(
+            'ix_studentprogress_user_id_progress',
+            'studentprogress',
+            ['user_id', 'progress'],
+            postgresql_include=PROGRESS_INCLUDE + ['struggling'],
+            postgresql_concurrently=True,
+        )
+        op.create_index(
+            'ix_studentprogress_user_id_struggling',
+            'studentprogress',
+            ['user_id'],
+            postgresql_include=PROGRESS_INCLUDE + ['progress'],
+            postgresql_where=sa.text('struggling'),
+            postgresql_concurrently=True,
+        )
+        op.create_index(
+            'ix_item_owner_id',
+            'item',
+            ['owner_id'],
+            postgresql_concurrently=True,
+        )
+        # Index-only scans need an up-to-date visibility map
+        op.execute('VACUUM ANALYZE studentprogress')
+
+
+def downgrade():
+    with op.get_context().autocommit_block():
+        for name, table in (
+            ('ix_item_owner_id', 'item'),
+            ('ix_studentprogress_user_id_struggling', 'studentprogress'),
+            ('ix_studentprogress_user_id_progress', 'studentprogress'),
+        ):
+            op.drop_index(name, table_name=table, postgresql_concurrently=True)
@@ -0,0 +1,105 @@
+"""Add monthly-partitioned progress_event history with recording triggers
+
+Revision ID: d4f9a2b6c8e1
+Revises: c3d8e5a1f7b2
+Create Date: 2026-10-19 11:20:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+import sqlmodel.sql.sqltypes
+
+
+# revision identifiers, used by Alembic.
+revision = 'd4f9a2b6c8e1'
+down_revision = 'c3d8e5a1f7b2'
+branch_labels = None
+depends_on = None
+
+COLUMNS = 'user_id, module_name, progress, struggling, last_score, attempts'
+
+
+def upgrade():
+    op.create_table(
+        'progress_event',
+        sa.Column('id', sa.Uuid(), nullable=False),
+        sa.Column('recorded_at', sa.DateTime(timezone=True), nullable=False),
+        sa.Column('user_id', sa.Uuid(), nullable=False),
+        sa.Column('module_name', sqlmodel.sql.sqltypes.AutoString(length=255), nullable=False),
+        sa.Column('progress', sa.Integer(), nullable=False),
+        sa.Column('struggling', sa.Boolean(), nullable=False),
+        sa.Column('last_score', sa.Float(), nullable=True),
+        sa.Column('attempts', sa.Integer(), nullable=False),
+        sa.ForeignKeyConstraint(['user_id'], ['user.id'], ondelete='CASCADE'),
+        sa.PrimaryKeyConstraint('id', 'recorded_at'),
+        postgresql_partition_by='RANGE (recorded_at)',
+    )
+    op.create_index(
+        'ix_progress_event_recorded_at',
+        'progress_event',
+        ['recorded_at'],
+        postgresql_using='brin',
+    )
+    op.create_index(
+        'ix_progress_event_user_id_recorded_at',
+        'progress_event',
+        ['user_id', 'recorded_at'],
+    )
+    # The current month and the next three; app.progress_history keeps
+    # creating them ahead and dropping expired ones
+    op.execute(
+        """
+        DO $$
+        DECLARE
+            month date;
+        BEGIN
+            FOR i IN 0..3 LOOP
+                month := date_trunc('month', now())::date + make_interval(months => i);
+                EXECUTE format(
+                    'CREATE TABLE %I PARTITION OF progress_event FOR VALUES FROM (%L) TO (%L)',
+                    'progress_event_y' || to_char(month, 'YYYY"m"MM'),
+                    month,
+                    (month + interval '1 month')::date
+                );
+            END LOOP;
+        END
+        $$
+        """
+    )
+    op.execute('CREATE TABLE progress_event_default PARTITION OF progress_event DEFAULT')
+    op.execute(
+        f"""
+        CREATE FUNCTION record_progress_events() RETURNS trigger
+        LANGUAGE plpgsql AS $$
+        BEGIN
+            INSERT INTO progress_event (id, recorded_at, {COLUMNS})
+            SELECT gen_random_uuid(), now(), {COLUMNS} FROM new_rows;
+            RETURN NULL;
+        END
+        $$
+        """
+    )
+    for operation in ('INSERT', 'UPDATE'):
+        op.execute(
+            f"""
+            CREATE TRIGGER studentprogress_{operation.lower()}_events
+            AFTER {operation} ON studentprogress
+            REFERENCING NEW TABLE AS new_rows
+            FOR EACH STATEMENT EXECUTE FUNCTION record_progress_events()
+            """
+        )
+    # Start every curve from the progress recorded so far
+    op.execute(
+        f"""
+        INSERT INTO progress_event (id, recorded_at, {COLUMNS})
+        SELECT gen_random_uuid(), now(), {COLUMNS} FROM studentprogress
+        """
+    )
+
+
+def downgrade():
+    for operation in ('insert', 'update'):
+        op.execute(f'DROP TRIGGER studentprogress_{operation}_events ON studentprogress')
+    op.execute('DROP FUNCTION record_progress_events()')
+    # Drops every partition with it
+    op.drop_table('progress_event')
@@ -0,0 +1,98 @@
+"""Add modulestats aggregate maintained by triggers on studentprogress
+
+Revision ID: e5a1c7d3b9f4
+Revises: d4f9a2b6c8e1
+Create Date: 2026-10-19 12:40:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+import sqlmodel.sql.sqltypes
+
+
+# revision identifiers, used by Alembic.
+revision = 'e5a1c7d3b9f4'
+down_revision = 'd4f9a2b6c8e1'
+branch_labels = None
+depends_on = None
+
+SCORE_BAND = (
+    'CASE WHEN last_score IS NULL THEN -1 '
+    'ELSE LEAST(GREATEST(CAST(floor(last_score / 10) AS INTEGER), 0), 9) END'
+)
+
+
+def stats_upsert(*sources):
+    rows = ' UNION ALL '.join(
+        f'SELECT module_name, {SCORE_BAND} AS score_band, progress, '
+        f'CAST(struggling AS INTEGER) AS struggling, '
+        f'COALESCE(last_score, 0) AS last_score, {sign} AS sign FROM {source}'
+        for source, sign in sources
+    )
+    return f"""
+        INSERT INTO modulestats
+            (module_name, score_band, students, progress_sum, struggling, score_sum)
+        SELECT module_name, score_band, sum(sign), sum(sign * progress),
+               sum(sign * struggling), sum(sign * last_score)
+        FROM ({rows}) AS delta
+        GROUP BY module_name, score_band
+        ORDER BY module_name, score_band
+        ON CONFLICT (module_name, score_band) DO UPDATE SET
+            students = modulestats.students + excluded.students,
+            progress_sum = modulestats.progress_sum + excluded.progress_sum,
+            struggling = modulestats.struggling + excluded.struggling,
+            score_sum = modulestats.score_sum + excluded.score_sum
+    """
+
+
+def upgrade():
+    op.create_table(
+        'modulestats',
+        sa.Column('module_name', sqlmodel.sql.sqltypes.AutoString(length=255), nullable=False),
+        sa.Column('score_band', sa.Integer(), nullable=False),
+        sa.Column('students', sa.Integer(), nullable=False),
+        sa.Column('progress_sum', sa.Integer(), nullable=False),
+        sa.Column('struggling', sa.Integer(), nullable=False),
+        sa.Column('score_sum', sa.Float(), nullable=False),
+        sa.PrimaryKeyConstraint('module_name', 'score_band'),
+    )
+    # Creating the triggers locks studentprogress against writes until the
+    # migration commits, so the backfill below sees every row exactly once
+    op.execute(
+        f"""
+        CREATE FUNCTION apply_module_stats() RETURNS trigger
+        LANGUAGE plpgsql AS $$
+        BEGIN
+            IF TG_OP = 'INSERT' THEN
+                {stats_upsert(('new_rows', 1))};
+            ELSIF TG_OP = 'UPDATE' THEN
+                {stats_upsert(('old_rows', -1), ('new_rows', 1))};
+            ELSE
+                {stats_upsert(('old_rows', -1))};
+            END IF;
+            RETURN NULL;
+        END
+        $$
+        """
+    )
+    for operation, transition in (
+        ('INSERT', 'NEW TABLE AS new_rows'),
+        ('UPDATE', 'OLD TABLE AS old_rows NEW TABLE AS new_rows'),
+        ('DELETE', 'OLD TABLE AS old_rows'),
+    ):
+        op.execute(
+            f"""
+            CREATE TRIGGER studentprogress_{operation.lower()}_stats
+            AFTER {operation} ON studentprogress
+            REFERENCING {transition}
+            FOR EACH STATEMENT EXECUTE FUNCTION apply_module_stats()
+            """
+        )
+    op.execute(stats_upsert(('studentprogress', 1)))
+
+
+def downgrade():
+    for operation in ('insert', 'update', 'delete'):
+        op.execute(f'DROP TRIGGER studentprogress_{operation}_stats ON studentprogress')
+    op.execute('DROP FUNCTION apply_module_stats()')
+    op.drop_table('modulestats')
@@ -0,0 +1,240 @@
+"""Move module names into a module catalog referenced by integer ID
+
+Revision ID: f6b2d8e4a0c5
+Revises: e5a1c7d3b9f4
+Create Date: 2026-10-19 14:10:00.000000
+
+Rewrites studentprogress and its indexes, holding an exclusive lock on it
+throughout: run with the API stopped.
+"""
+from alembic import op
+import sqlalchemy as sa
+import sqlmodel.sql.sqltypes
+
+
+# revision identifiers, used by Alembic.
+revision = 'f6b2d8e4a0c5'
+down_revision = 'e5a1c7d3b9f4'
+branch_labels = None
+depends_on = None
+
+PROGRESS_INCLUDE = ['id', 'module_id', 'last_score', 'attempts']
+
+SCORE_BAND = (
+    'CASE WHEN last_score IS NULL THEN -1 '
+    'ELSE LEAST(GREATEST(CAST(floor(last_score / 10) AS INTEGER), 0), 9) END'
+)
+
+
+def stats_upsert(*sources):
+    rows = ' UNION ALL '.join(
+        f'SELECT module_id, {SCORE_BAND} AS score_band, progress, '
+        f'CAST(struggling AS INTEGER) AS struggling, '
+        f'COALESCE(last_score, 0) AS last_score, {sign} AS sign FROM {source}'
+        for source, sign in sources
+    )
+    return f"""
+        INSERT INTO modulestats
+            (module_id, score_band, students, progress_sum, struggling, score_sum)
+        SELECT module_id, score_band, sum(sign), sum(sign * progress),
+               sum(sign * struggling), sum(sign * last_score)
+        FROM ({rows}) AS delta
+        GROUP BY module_id, score_band
+        ORDER BY module_id, score_band
+        ON CONFLICT (module_id, score_band) DO UPDATE SET
+            students = modulestats.students + excluded.students,
+            progress_sum = modulestats.progress_sum + excluded.progress_sum,
+            struggling = modulestats.struggling + excluded.struggling,
+            score_sum = modulestats.score_sum + excluded.score_sum
+    """
+
+
+def create_progress_indexes(module_column):
+    include = [module_column if c == 'module_id' else c for c in PROGRESS_INCLUDE]
+    op.create_index(
+        f'ix_studentprogress_user_id_{module_column}',
+        'studentprogress',
+        ['user_id', module_column],
+        unique=True,
+    )
+    op.create_index(
+        'ix_studentprogress_user_id_progress',
+        'studentprogress',
+        ['user_id', 'progress'],
+        postgresql_include=include + ['struggling'],
+    )
+    op.create_index(
+        'ix_studentprogress_user_id_struggling',
+        'studentprogress',
+        ['user_id'],
+        postgresql_include=include + ['progress'],
+        postgresql_where=sa.text('struggling'),
+    )
+
+
+def drop_progress_indexes(module_column):
+    for name in (
+        f'ix_studentprogress_user_id_{module_column}',
+        'ix_studentprogress_user_id_progress',
+        'ix_studentprogress_user_id_struggling',
+    ):
+        op.drop_index(name, table_name='studentprogress')
+
+
+def compact_studentprogress():
+    # Dropping a column leaves its bytes in every row until the table is
+    # rewritten. VACUUM FULL does not set the visibility map that
+    # index-only scans rely on, the second VACUUM does.
+    with op.get_context().autocommit_block():
+        op.execute('VACUUM FULL studentprogress')
+        op.execute('VACUUM ANALYZE studentprogress')
+
+
+def upgrade():
+    op.create_table(
+        'module',
+        sa.Column('id', sa.Integer(), nullable=False),
+        sa.Column('name', sqlmodel.sql.sqltypes.AutoString(length=255), nullable=False),
+        sa.PrimaryKeyConstraint('id'),
+        sa.UniqueConstraint('name'),
+    )
+    op.execute(
+        'INSERT INTO module (name) '
+        'SELECT DISTINCT module_name FROM studentprogress ORDER BY module_name'
+    )
+
+    # The rewrite below must not add progress events or statistics deltas
+    op.execute('ALTER TABLE studentprogress DISABLE TRIGGER USER')
+    op.add_column('studentprogress', sa.Column('module_id', sa.Integer(), nullable=True))
+    op.execute(
+        'UPDATE studentprogress SET module_id = module.id '
+        'FROM module WHERE module.name = studentprogress.module_name'
+    )
+    op.alter_column('studentprogress', 'module_id', nullable=False)
+    op.create_foreign_key(None, 'studentprogress', 'module', ['module_id'], ['id'])
+    drop_progress_indexes('module_name')
+    op.drop_column('studentprogress', 'module_name')
+    create_progress_indexes('module_id')
+
+    # Progress events keep the module name
+    op.execute(
+        """
+        CREATE OR REPLACE FUNCTION record_progress_events() RETURNS trigger
+        LANGUAGE plpgsql AS $$
+        BEGIN
+            INSERT INTO progress_event
+                (id, recorded_at, user_id, module_name, progress, struggling,
+                 last_score, attempts)
+            SELECT gen_random_uuid(), now(), user_id, name, progress, struggling,
+                   last_score, attempts
+            FROM new_rows JOIN module ON module.id = new_rows.module_id;
+            RETURN NULL;
+        END
+        $$
+        """
+    )
+
+    # Statistics are derived data, rebuild them keyed by module ID
+    op.drop_table('modulestats')
+    op.create_table(
+        'modulestats',
+        sa.Column('module_id', sa.Integer(), nullable=False),
+        sa.Column('score_band', sa.Integer(), nullable=False),
+        sa.Column('students', sa.Integer(), nullable=False),
+        sa.Column('progress_sum', sa.Integer(), nullable=False),
+        sa.Column('struggling', sa.Integer(), nullable=False),
+        sa.Column('score_sum', sa.Float(), nullable=False),
+        sa.ForeignKeyConstraint(['module_id'], ['module.id']),
+        sa.PrimaryKeyConstraint('module_id', 'score_band'),
+    )
+    op.execute(
+        f"""
+        CREATE OR REPLACE FUNCTION apply_module_stats() RETURNS trigger
+        LANGUAGE plpgsql AS $$
+        BEGIN
+            IF TG_OP = 'INSERT' THEN
+                {stats_upsert(('new_rows', 1))};
+            ELSIF TG_OP = 'UPDATE' THEN
+                {stats_upsert(('old_rows', -1), ('new_rows', 1))};
+            ELSE
+                {stats_upsert(('old_rows', -1))};
+            END IF;
+            RETURN NULL;
+        END
+        $$
+        """
+    )
+    op.execute(stats_upsert(('studentprogress', 1)))
+    op.execute('ALTER TABLE studentprogress ENABLE TRIGGER USER')
+
+    compact_studentprogress()
+
+
+def downgrade():
+    op.execute('ALTER TABLE studentprogress DISABLE TRIGGER USER')
+    op.add_column(
+        'studentprogress',
+        sa.Column('module_name', sqlmodel.sql.sqltypes.AutoString(length=255), nullable=True),
+    )
+    op.execute(
+        'UPDATE studentprogress SET module_name = module.name '
+        'FROM module WHERE module.id = studentprogress.module_id'
+    )
+    op.alter_column('studentprogress', 'module_name', nullable=False)
+    drop_progress_indexes('module_id')
+    op.drop_column('studentprogress', 'module_id')
+    create_progress_indexes('module_name')
+
+    op.execute(
+        """
+        CREATE OR REPLACE FUNCTION record_progress_events() RETURNS trigger
+        LANGUAGE plpgsql AS $$
+        BEGIN
+            INSERT INTO progress_event
+                (id, recorded_at, user_id, module_name, progress, struggling,
+                 last_score, attempts)
+            SELECT gen_random_uuid(), now(), user_id, module_name, progress,
+                   struggling, last_score, attempts
+            FROM new_rows;
+            RETURN NULL;
+        END
+        $$
+        """
+    )
+
+    op.drop_table('modulestats')
+    op.create_table(
+        'modulestats',
+        sa.Column('module_name', sqlmodel.sql.sqltypes.AutoString(length=255), nullable=False),
+        sa.Column('score_band', sa.Integer(), nullable=False),
+        sa.Column('students', sa.Integer(), nullable=False),
+        sa.Column('progress_sum', sa.Integer(), nullable=False),
+        sa.Column('struggling', sa.Integer(), nullable=False),
+        sa.Column('score_sum', sa.Float(), nullable=False),
+        sa.PrimaryKeyConstraint('module_name', 'score_band'),
+    )
+    module_name_upsert = (
+        lambda *sources: stats_upsert(*sources).replace('module_id', 'module_name')
+    )
+    op.execute(
+        f"""
+        CREATE OR REPLACE FUNCTION apply_module_stats() RETURNS trigger
+        LANGUAGE plpgsql AS $$
+        BEGIN
+            IF TG_OP = 'INSERT' THEN
+                {module_name_upsert(('new_rows', 1))};
+            ELSIF TG_OP = 'UPDATE' THEN
+                {module_name_upsert(('old_rows', -1), ('new_rows', 1))};
+            ELSE
+                {module_name_upsert(('old_rows', -1))};
+            END IF;
+            RETURN NULL;
+        END
+        $$
+        """
+    )
+    op.execute(module_name_upsert(('studentprogress', 1)))
+    op.execute('ALTER TABLE studentprogress ENABLE TRIGGER USER')
+    op.drop_table('module')
+
+    compact_studentprogress()
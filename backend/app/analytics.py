@@ -0,0 +1,77 @@
+"""Cohort analytics served from the incrementally maintained modulestats table.
+
+Each module has at most SCORE_BANDS + 1 rows in modulestats, kept up to
+date by triggers on studentprogress (see app.models), so a module's
+statistics are read with one primary key range scan instead of a GROUP
+BY over every student's progress.
+"""
+
+from collections.abc import Iterable
+from itertools import groupby
+
+from sqlmodel import Session, col, select
+
+from app.models import (
+    SCORE_BANDS,
+    UNSCORED_BAND,
+    Module,
+    ModuleStats,
+    ModuleStatsPublic,
+)
+from app.modules import module_catalog
+
+
+def _module_stats_public(
+    module_name: str, rows: Iterable[ModuleStats]
+) -> ModuleStatsPublic:
+    histogram = [0] * SCORE_BANDS
+    students = progress_sum = struggling = unscored = 0
+    score_sum = 0.0
+    for row in rows:
+        students += row.students
+        progress_sum += row.progress_sum
+        struggling += row.struggling
+        score_sum += row.score_sum
+        if row.score_band == UNSCORED_BAND:
+            unscored += row.students
+        else:
+            histogram[row.score_band] += row.students
+    scored = students - unscored
+    return ModuleStatsPublic(
+        module_name=module_name,
+        students=students,
+        average_progress=round(progress_sum / students, 1) if students else 0,
+        struggling=struggling,
+        average_score=round(score_sum / scored, 1) if scored else None,
+        score_histogram=histogram,
+        unscored=unscored,
+    )
+
+
+def get_module_stats(*, session: Session, module_name: str) -> ModuleStatsPublic | None:
+    """Statistics of one module, None if no student has progress in it."""
+    module_id = module_catalog.get_id(session=session, name=module_name)
+    if module_id is None:
+        return None
+    rows = session.exec(
+        select(ModuleStats).where(
+            ModuleStats.module_id == module_id, ModuleStats.students > 0
+        )
+    ).all()
+    if not rows:
+        return None
+    return _module_stats_public(module_name, rows)
+
+
+def list_module_stats(*, session: Session) -> list[ModuleStatsPublic]:
+    """Statistics of every module with students, by module name."""
+    rows = session.exec(
+        select(Module.name, ModuleStats)
+        .join(Module, col(Module.id) == ModuleStats.module_id)
+        .where(ModuleStats.students > 0)
+        .order_by(Module.name)
+    ).all()
+    return [
+        _module_stats_public(module_name, (stats for _, stats in group))
+        for module_name, group in groupby(rows, key=lambda row: row[0])
+    ]
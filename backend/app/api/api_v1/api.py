@@ -1,8 +1,25 @@
 from fastapi import APIRouter
-from .endpoints import btec, tutor
+from .endpoints import (
+    analytics,
+    btec,
+    items,
+    login,
+    metrics,
+    progress,
+    reports,
+    tutor,
+    users,
+)
 
 api_router = APIRouter()
 
 # ربط راوتر نقاط النهاية الخاصة بـ btec
 api_router.include_router(btec.router, prefix="/btec", tags=["btec"])
-api_router.include_router(tutor.router, prefix="/tutor", tags=["tutor"])
\ No newline at end of file
+api_router.include_router(tutor.router, prefix="/tutor", tags=["tutor"])
+api_router.include_router(progress.router, prefix="/progress", tags=["progress"])
+api_router.include_router(analytics.router, prefix="/analytics", tags=["analytics"])
+api_router.include_router(reports.router, prefix="/reports", tags=["reports"])
+api_router.include_router(metrics.router, prefix="/metrics", tags=["metrics"])
+api_router.include_router(login.router, prefix="/login", tags=["login"])
+api_router.include_router(users.router, prefix="/users", tags=["users"])
+api_router.include_router(items.router, prefix="/items", tags=["items"])
@@ -0,0 +1,38 @@
+"""Cohort analytics API endpoints."""
+
+from typing import Any
+
+from fastapi import APIRouter, Depends, HTTPException
+
+from app.analytics import get_module_stats, list_module_stats
+from app.api.deps import ReadSessionDep, get_current_active_superuser
+from app.models import ModuleStatsListPublic, ModuleStatsPublic
+
+router = APIRouter()
+
+
+@router.get(
+    "/modules",
+    response_model=ModuleStatsListPublic,
+    dependencies=[Depends(get_current_active_superuser)],
+)
+def read_modules_stats(session: ReadSessionDep) -> Any:
+    """
+    Get progress and score statistics of every module.
+    """
+    return ModuleStatsListPublic(data=list_module_stats(session=session))
+
+
+@router.get(
+    "/modules/{module_name}",
+    response_model=ModuleStatsPublic,
+    dependencies=[Depends(get_current_active_superuser)],
+)
+def read_module_stats(session: ReadSessionDep, module_name: str) -> Any:
+    """
+    Get the average progress, struggling count and score distribution of a module.
+    """
+    stats = get_module_stats(session=session, module_name=module_name)
+    if not stats:
+        raise HTTPException(status_code=404, detail="Module not found")
+    return stats
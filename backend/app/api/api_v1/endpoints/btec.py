@@ -1,6 +1,6 @@
 from fastapi import APIRouter, UploadFile, File, Form
 from app.btec_engine.text_evaluator import evaluate_text
-from app.btec_engine.audio_evaluator import transcribe_audio
+from app.btec_engine.audio_evaluator import submit_transcription
 import tempfile
 import os
 
@@ -22,7 +22,7 @@ async def evaluate_text_endpoint(
 @router.post("/evaluate/audio")
 async def evaluate_audio_endpoint(file: UploadFile = File(...)):
     """
-    Transcribe audio using Whisper and return text.
+    Transcribe audio using Whisper and return text with timing metrics.
     """
     # Save uploaded file temporarily
     suffix = os.path.splitext(file.filename)[1]
@@ -30,10 +30,10 @@ async def evaluate_audio_endpoint(file: UploadFile = File(...)):
         tmp.write(await file.read())
         tmp_path = tmp.name
 
-    # Transcribe
-    text = transcribe_audio(tmp_path)
+    # Transcribe on the audio worker pool, then cleanup
+    try:
+        result = await submit_transcription(tmp_path)
+    finally:
+        os.remove(tmp_path)
 
-    # Cleanup
-    os.remove(tmp_path)
-
-    return {"status": "ok", "transcript": text}
+    return {"status": "ok", "transcript": result.text, "metrics": result.metrics()}
@@ -0,0 +1,42 @@
+"""Item API endpoints."""
+
+from typing import Annotated, Any
+
+from fastapi import APIRouter, HTTPException, Query
+from sqlmodel import select
+
+from app.api.deps import CurrentUser, ReadSessionDep
+from app.models import Item, ItemsPublic
+from app.pagination import estimate_count, paginate
+
+router = APIRouter()
+
+
+@router.get("/", response_model=ItemsPublic)
+def read_items(
+    session: ReadSessionDep,
+    current_user: CurrentUser,
+    limit: Annotated[int, Query(ge=1, le=1000)] = 100,
+    cursor: str | None = None,
+    count: bool = False,
+) -> Any:
+    """
+    List items, all of them for superusers and otherwise the user's own.
+
+    Pass the returned next_cursor to get the following page. With
+    count=true the response includes an estimated total.
+    """
+    statement = select(Item)
+    if not current_user.is_superuser:
+        statement = statement.where(Item.owner_id == current_user.id)
+    try:
+        items, next_cursor = paginate(
+            session, statement, order_by=[Item.id], limit=limit, cursor=cursor
+        )
+    except ValueError:
+        raise HTTPException(status_code=400, detail="Invalid cursor")
+    return ItemsPublic(
+        data=items,
+        count=estimate_count(session, statement) if count else None,
+        next_cursor=next_cursor,
+    )
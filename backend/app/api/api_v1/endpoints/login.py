@@ -0,0 +1,94 @@
+"""Login API endpoints."""
+
+from datetime import timedelta
+from typing import Annotated, Any
+
+from fastapi import APIRouter, Depends, HTTPException
+from fastapi.security import OAuth2PasswordRequestForm
+
+from app import async_crud
+from app.api.deps import AsyncCurrentUser, AsyncSessionDep, decode_token
+from app.core import security
+from app.core.config import settings
+from app.models import RefreshTokenRequest, Token, User, UserPublic
+from app.user_cache import user_cache
+
+router = APIRouter()
+
+
+def _issue_tokens(user: User) -> Token:
+    if not settings.ACCESS_TOKEN_CLAIMS:
+        access_token_expires = timedelta(minutes=settings.ACCESS_TOKEN_EXPIRE_MINUTES)
+        return Token(
+            access_token=security.create_access_token(
+                user.id, expires_delta=access_token_expires
+            )
+        )
+    return Token(
+        access_token=security.create_access_token(
+            user.id,
+            expires_delta=timedelta(
+                minutes=settings.ACCESS_TOKEN_CLAIMS_EXPIRE_MINUTES
+            ),
+            claims={
+                "is_active": user.is_active,
+                "is_superuser": user.is_superuser,
+                "ver": user.token_version,
+            },
+        ),
+        refresh_token=security.create_refresh_token(
+            user.id,
+            user.token_version,
+            expires_delta=timedelta(days=settings.REFRESH_TOKEN_EXPIRE_DAYS),
+        ),
+    )
+
+
+@router.post("/access-token")
+async def login_access_token(
+    session: AsyncSessionDep,
+    form_data: Annotated[OAuth2PasswordRequestForm, Depends()],
+) -> Token:
+    """
+    OAuth2 compatible token login, get an access token for future requests.
+
+    Takes no threadpool thread: the password is checked on the bounded
+    password hasher, and the request gets a 503 when its queue is full.
+    With ACCESS_TOKEN_CLAIMS the access token is short-lived and comes
+    with a refresh token.
+    """
+    user = await async_crud.authenticate(
+        session=session, email=form_data.username, password=form_data.password
+    )
+    if not user:
+        raise HTTPException(status_code=400, detail="Incorrect email or password")
+    elif not user.is_active:
+        raise HTTPException(status_code=400, detail="Inactive user")
+    return _issue_tokens(user)
+
+
+@router.post("/refresh-token")
+async def refresh_access_token(
+    session: AsyncSessionDep, body: RefreshTokenRequest
+) -> Token:
+    """
+    Get a new access token, and refresh token, for a refresh token.
+
+    Refresh tokens are issued with ACCESS_TOKEN_CLAIMS. They stop working
+    once the user is deactivated, changes password or changes role.
+    """
+    token_data = decode_token(body.refresh_token, token_type="refresh")
+    user = await user_cache.get_user_async(session=session, user_id=token_data.sub)
+    if not user or token_data.ver != user.token_version:
+        raise HTTPException(status_code=403, detail="Could not validate credentials")
+    if not user.is_active:
+        raise HTTPException(status_code=400, detail="Inactive user")
+    return _issue_tokens(user)
+
+
+@router.post("/test-token", response_model=UserPublic)
+async def test_token(current_user: AsyncCurrentUser) -> Any:
+    """
+    Test access token.
+    """
+    return current_user
@@ -0,0 +1,16 @@
+"""Prometheus metrics endpoint."""
+
+from fastapi import APIRouter
+from fastapi.responses import PlainTextResponse
+
+from app.core.metrics import REGISTRY
+
+router = APIRouter()
+
+
+@router.get("/", response_class=PlainTextResponse)
+def read_metrics() -> str:
+    """
+    Expose the metrics of this process in Prometheus text format.
+    """
+    return REGISTRY.render()
@@ -0,0 +1,274 @@
+"""Student progress API endpoints."""
+
+import io
+import tempfile
+import uuid
+from datetime import datetime, timedelta, timezone
+from typing import IO, Annotated, Any
+
+from fastapi import APIRouter, Body, Depends, HTTPException, Query, Request, status
+from sqlalchemy import Engine
+from sqlmodel import Session, select
+from starlette.concurrency import run_in_threadpool
+
+from app import crud
+from app.api.deps import (
+    CurrentUser,
+    ReadSessionDep,
+    SessionDep,
+    TransactionDep,
+    get_current_active_superuser,
+)
+from app.core.config import settings
+from app.core.jobs import Job, JobRegistry
+from app.ingest import IngestFormat, IngestReport, ingest_progress
+from app.models import (
+    IngestErrorPublic,
+    ModuleCurvePublic,
+    ProgressEventPublic,
+    ProgressEventsPublic,
+    ProgressIngestPublic,
+    StudentProgress,
+    StudentProgressCreate,
+    StudentProgressListPublic,
+    StudentProgressPublic,
+    User,
+)
+from app.modules import module_catalog
+from app.pagination import estimate_count, paginate
+from app.progress_history import CurveBucket, get_module_curve, get_student_curve
+
+router = APIRouter()
+
+ingest_jobs = JobRegistry(ttl_seconds=settings.REPORT_JOB_TTL_SECONDS)
+
+
+@router.get("/", response_model=StudentProgressListPublic)
+def read_progress(
+    session: ReadSessionDep,
+    current_user: CurrentUser,
+    user_id: uuid.UUID | None = None,
+    limit: Annotated[int, Query(ge=1, le=1000)] = 100,
+    cursor: str | None = None,
+    count: bool = False,
+) -> Any:
+    """
+    List a student's progress by module, by default the current user's.
+
+    Pass the returned next_cursor to get the following page. With
+    count=true the response includes an estimated total.
+    """
+    user_id = user_id or current_user.id
+    if user_id != current_user.id and not current_user.is_superuser:
+        raise HTTPException(
+            status_code=403, detail="The user doesn't have enough privileges"
+        )
+    statement = select(StudentProgress).where(StudentProgress.user_id == user_id)
+    try:
+        progress, next_cursor = paginate(
+            session,
+            statement,
+            order_by=[StudentProgress.module_id, StudentProgress.id],
+            limit=limit,
+            cursor=cursor,
+        )
+    except ValueError:
+        raise HTTPException(status_code=400, detail="Invalid cursor")
+    return StudentProgressListPublic(
+        data=progress,
+        count=estimate_count(session, statement) if count else None,
+        next_cursor=next_cursor,
+    )
+
+
+@router.post("/", response_model=StudentProgressListPublic)
+def record_progress(
+    session: TransactionDep,
+    current_user: CurrentUser,
+    progress_in: Annotated[
+        list[StudentProgressCreate], Body(min_length=1, max_length=100)
+    ],
+    user_id: uuid.UUID | None = None,
+) -> Any:
+    """
+    Record a student's progress in several modules, by default the current user's.
+
+    All modules are written in one transaction: either every row is saved
+    or none is.
+    """
+    user_id = user_id or current_user.id
+    if user_id != current_user.id and not current_user.is_superuser:
+        raise HTTPException(
+            status_code=403, detail="The user doesn't have enough privileges"
+        )
+    if not session.get(User, user_id):
+        raise HTTPException(status_code=404, detail="User not found")
+    # Adds new modules up front, in one statement
+    module_catalog.get_or_create_ids(
+        session=session, names=[p.module_name for p in progress_in]
+    )
+    progress = [
+        crud.create_or_update_student_progress(
+            session=session, user_id=user_id, progress_in=p
+        )
+        for p in progress_in
+    ]
+    # Built before TransactionDep commits, which expires the rows
+    return StudentProgressListPublic(
+        data=[StudentProgressPublic.model_validate(p) for p in progress]
+    )
+
+
+def _period(since: datetime | None, until: datetime | None) -> datetime:
+    # Default to the last 90 days, so queries stay on a few partitions
+    since = since or (until or datetime.now(timezone.utc)) - timedelta(days=90)
+    if until is not None and since >= until:
+        raise HTTPException(status_code=400, detail="since must be before until")
+    return since
+
+
+@router.get("/history", response_model=ProgressEventsPublic)
+def read_progress_history(
+    session: ReadSessionDep,
+    current_user: CurrentUser,
+    user_id: uuid.UUID | None = None,
+    module_name: str | None = None,
+    since: datetime | None = None,
+    until: datetime | None = None,
+) -> Any:
+    """
+    Get a student's progress over time, by default the current user's.
+
+    Returns every recorded progress write in [since, until), the last 90
+    days by default.
+    """
+    user_id = user_id or current_user.id
+    if user_id != current_user.id and not current_user.is_superuser:
+        raise HTTPException(
+            status_code=403, detail="The user doesn't have enough privileges"
+        )
+    events = get_student_curve(
+        session=session,
+        user_id=user_id,
+        module_name=module_name,
+        since=_period(since, until),
+        until=until,
+    )
+    return ProgressEventsPublic(
+        data=[ProgressEventPublic.model_validate(event) for event in events]
+    )
+
+
+@router.get(
+    "/modules/{module_name}/curve",
+    response_model=ModuleCurvePublic,
+    dependencies=[Depends(get_current_active_superuser)],
+)
+def read_module_curve(
+    session: ReadSessionDep,
+    module_name: str,
+    since: datetime | None = None,
+    until: datetime | None = None,
+    bucket: CurveBucket = "day",
+) -> Any:
+    """
+    Get the average progress of a module's students per day or month.
+    """
+    points = get_module_curve(
+        session=session,
+        module_name=module_name,
+        since=_period(since, until),
+        until=until,
+        bucket=bucket,
+    )
+    return ModuleCurvePublic(module_name=module_name, data=points)
+
+
+def _run_ingest(
+    bind: Engine, upload: IO[bytes], fmt: IngestFormat, job: Job, report: IngestReport
+) -> IngestReport:
+    def on_progress(report: IngestReport) -> None:
+        job.total = report.total
+        job.completed = report.loaded
+        job.failed = report.failed
+
+    with upload, Session(bind) as session:
+        upload.seek(0)
+        stream = io.TextIOWrapper(upload, encoding="utf-8", newline="")
+        return ingest_progress(
+            session=session,
+            stream=stream,
+            fmt=fmt,
+            report=report,
+            on_progress=on_progress,
+        )
+
+
+def _ingest_public(job: Job) -> ProgressIngestPublic:
+    report: IngestReport = job.result
+    return ProgressIngestPublic(
+        id=job.id,
+        kind=job.kind,
+        status=job.status.value,
+        total=job.total,
+        completed=job.completed,
+        failed=job.failed,
+        error=job.error,
+        rows_per_second=round(report.rows_per_second, 1),
+        errors=[
+            IngestErrorPublic(line=e.line, message=e.message) for e in report.errors
+        ],
+    )
+
+
+@router.post(
+    "/ingest",
+    response_model=ProgressIngestPublic,
+    status_code=status.HTTP_202_ACCEPTED,
+    dependencies=[Depends(get_current_active_superuser)],
+)
+async def create_progress_ingest(
+    request: Request,
+    session: SessionDep,
+    current_user: CurrentUser,
+    format: IngestFormat = "csv",
+) -> Any:
+    """
+    Bulk load student progress from a CSV or JSON Lines request body.
+
+    The body is spooled to disk and loaded in the background. Poll
+    /progress/ingest/{id} for row counts, error rows and throughput.
+    """
+    upload = tempfile.TemporaryFile()
+    try:
+        async for chunk in request.stream():
+            await run_in_threadpool(upload.write, chunk)
+    except BaseException:
+        upload.close()
+        raise
+    job = ingest_jobs.create("progress-ingest", owner_id=current_user.id)
+    report = IngestReport()
+    # Readable while the ingest runs, the job result is set again when it ends
+    job.result = report
+    ingest_jobs.run(
+        job,
+        run_in_threadpool(
+            _run_ingest, session.get_bind().engine, upload, format, job, report
+        ),
+    )
+    return _ingest_public(job)
+
+
+@router.get(
+    "/ingest/{job_id}",
+    response_model=ProgressIngestPublic,
+    dependencies=[Depends(get_current_active_superuser)],
+)
+def read_progress_ingest(job_id: uuid.UUID) -> Any:
+    """
+    Get the progress of a bulk ingest.
+    """
+    job = ingest_jobs.get(job_id)
+    if not job:
+        raise HTTPException(status_code=404, detail="Job not found")
+    return _ingest_public(job)
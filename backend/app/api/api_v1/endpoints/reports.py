@@ -0,0 +1,264 @@
+"""PDF report API endpoints."""
+
+import uuid
+from collections.abc import AsyncIterator
+from dataclasses import asdict
+from datetime import datetime, timezone
+from typing import Annotated, Any
+
+from fastapi import APIRouter, Depends, Header, HTTPException, Response, status
+from fastapi.responses import StreamingResponse
+from sqlmodel import Session, select
+from starlette.concurrency import run_in_threadpool
+
+from app.api.deps import CurrentUser, SessionDep, get_current_active_superuser
+from app.btec_engine.report_service import ReportItem, report_service
+from app.core.config import settings
+from app.core.jobs import Job
+from app.models import ClassReportRequest, JobPublic, User
+from app.report_data import get_class_report_members, get_student_report_data
+
+router = APIRouter()
+
+STUDENT_TEMPLATE = "student_report.html"
+CLASS_TEMPLATE = "class_report.html"
+
+
+def _student_report_context(*, session: Session, user_id: uuid.UUID) -> dict[str, Any]:
+    data = get_student_report_data(session=session, user_id=user_id)
+    if not data:
+        raise HTTPException(status_code=404, detail="User not found")
+    return data.to_context()
+
+
+def _get_users(*, session: Session, user_ids: list[uuid.UUID]) -> list[User]:
+    users = session.exec(select(User).where(User.id.in_(user_ids))).all()  # type: ignore[attr-defined]
+    if len(users) != len(set(user_ids)):
+        raise HTTPException(status_code=404, detail="User not found")
+    return sorted(users, key=lambda u: (u.full_name or "", u.email))
+
+
+def _class_report_context(
+    *, session: Session, user_ids: list[uuid.UUID], title: str
+) -> dict[str, Any]:
+    members = get_class_report_members(session=session, user_ids=user_ids)
+    if len(members) != len(set(user_ids)):
+        raise HTTPException(status_code=404, detail="User not found")
+    module_count = sum(m.module_count for m in members)
+    progress_total = sum(m.average_progress * m.module_count for m in members)
+    return {
+        "title": title,
+        "generated_at": datetime.now(timezone.utc).strftime("%Y-%m-%d %H:%M UTC"),
+        "summary": {
+            "student_count": len(members),
+            "average_progress": (
+                round(progress_total / module_count, 1) if module_count else 0
+            ),
+            "struggling_count": sum(m.struggling_count for m in members),
+        },
+        "students": [asdict(m) for m in members],
+    }
+
+
+def _check_access(current_user: User, user_id: uuid.UUID) -> None:
+    if user_id != current_user.id and not current_user.is_superuser:
+        raise HTTPException(
+            status_code=403, detail="The user doesn't have enough privileges"
+        )
+
+
+def _pdf_response(
+    pdf: bytes, filename: str, headers: dict[str, str] | None = None
+) -> Response:
+    return Response(
+        content=pdf,
+        media_type="application/pdf",
+        headers={
+            "Content-Disposition": f'inline; filename="{filename}"',
+            **(headers or {}),
+        },
+    )
+
+
+def _etag_matches(etag: str, if_none_match: str | None) -> bool:
+    if not if_none_match:
+        return False
+    candidates = {c.strip().removeprefix("W/") for c in if_none_match.split(",")}
+    return "*" in candidates or etag in candidates
+
+
+def _job_public(job: Job) -> JobPublic:
+    return JobPublic(
+        id=job.id,
+        kind=job.kind,
+        status=job.status.value,
+        total=job.total,
+        completed=job.completed,
+        failed=job.failed,
+        error=job.error,
+    )
+
+
+@router.get("/students/{user_id}", response_class=Response)
+async def read_student_report(
+    session: SessionDep,
+    current_user: CurrentUser,
+    user_id: uuid.UUID,
+    if_none_match: Annotated[str | None, Header()] = None,
+) -> Response:
+    """
+    Render a student's progress report as a PDF.
+
+    The ETag is a fingerprint of the report data and template, so clients
+    revalidating with If-None-Match get a 304 while the data is unchanged.
+    """
+    _check_access(current_user, user_id)
+    context = await run_in_threadpool(
+        _student_report_context, session=session, user_id=user_id
+    )
+    fingerprint = report_service.fingerprint(STUDENT_TEMPLATE, context)
+    headers = {"ETag": f'"{fingerprint}"', "Cache-Control": "private, no-cache"}
+    if _etag_matches(headers["ETag"], if_none_match):
+        return Response(status_code=status.HTTP_304_NOT_MODIFIED, headers=headers)
+    pdf = await report_service.render(
+        STUDENT_TEMPLATE, context, fingerprint=fingerprint
+    )
+    return _pdf_response(pdf, f"progress-report-{user_id}.pdf", headers)
+
+
+@router.post(
+    "/students/{user_id}/jobs",
+    response_model=JobPublic,
+    status_code=status.HTTP_202_ACCEPTED,
+)
+async def create_student_report_job(
+    session: SessionDep, current_user: CurrentUser, user_id: uuid.UUID
+) -> Any:
+    """
+    Render a student's progress report in the background.
+    """
+    _check_access(current_user, user_id)
+    context = await run_in_threadpool(
+        _student_report_context, session=session, user_id=user_id
+    )
+    job = report_service.submit(STUDENT_TEMPLATE, context, owner_id=current_user.id)
+    return _job_public(job)
+
+
+@router.post(
+    "/class",
+    response_class=Response,
+    dependencies=[Depends(get_current_active_superuser)],
+)
+async def create_class_report(
+    session: SessionDep, report_in: ClassReportRequest
+) -> Response:
+    """
+    Render an assessment report for a class of students as a PDF.
+    """
+    context = await run_in_threadpool(
+        _class_report_context,
+        session=session,
+        user_ids=report_in.user_ids,
+        title=report_in.title,
+    )
+    pdf = await report_service.render(CLASS_TEMPLATE, context)
+    return _pdf_response(pdf, "class-report.pdf")
+
+
+@router.post(
+    "/class/jobs",
+    response_model=JobPublic,
+    status_code=status.HTTP_202_ACCEPTED,
+    dependencies=[Depends(get_current_active_superuser)],
+)
+async def create_class_report_job(
+    session: SessionDep, current_user: CurrentUser, report_in: ClassReportRequest
+) -> Any:
+    """
+    Render a class assessment report in the background.
+    """
+    context = await run_in_threadpool(
+        _class_report_context,
+        session=session,
+        user_ids=report_in.user_ids,
+        title=report_in.title,
+    )
+    job = report_service.submit(CLASS_TEMPLATE, context, owner_id=current_user.id)
+    return _job_public(job)
+
+
+@router.post(
+    "/class/zip",
+    response_class=StreamingResponse,
+    dependencies=[Depends(get_current_active_superuser)],
+)
+async def create_class_report_zip(
+    session: SessionDep, current_user: CurrentUser, report_in: ClassReportRequest
+) -> StreamingResponse:
+    """
+    Render a progress report per student and stream them as a ZIP archive.
+
+    The archive is written as reports complete. Its progress can be polled at
+    /reports/jobs/{id} using the id from the X-Report-Batch-Id header.
+    """
+    users = await run_in_threadpool(
+        _get_users, session=session, user_ids=report_in.user_ids
+    )
+    job = report_service.jobs.create(
+        "report-batch", total=len(users), owner_id=current_user.id
+    )
+    # The request session is closed before the body streams, so the batch
+    # reads through its own session on the same engine
+    bind = session.get_bind()
+
+    async def items() -> AsyncIterator[ReportItem]:
+        with Session(bind) as batch_session:
+            for user in users:
+                context = await run_in_threadpool(
+                    _student_report_context, session=batch_session, user_id=user.id
+                )
+                yield f"progress-report-{user.email}.pdf", STUDENT_TEMPLATE, context
+
+    # Leave render slots free for interactive report requests
+    window = max(1, settings.REPORT_MAX_CONCURRENCY // 2)
+    return StreamingResponse(
+        report_service.render_zip(items(), job, window=window),
+        media_type="application/zip",
+        headers={
+            "Content-Disposition": 'attachment; filename="class-reports.zip"',
+            "X-Report-Batch-Id": str(job.id),
+        },
+    )
+
+
+def _get_job(current_user: User, job_id: uuid.UUID) -> Job:
+    job = report_service.jobs.get(job_id)
+    if not job:
+        raise HTTPException(status_code=404, detail="Job not found")
+    if job.owner_id != current_user.id and not current_user.is_superuser:
+        raise HTTPException(
+            status_code=403, detail="The user doesn't have enough privileges"
+        )
+    return job
+
+
+@router.get("/jobs/{job_id}", response_model=JobPublic)
+def read_report_job(current_user: CurrentUser, job_id: uuid.UUID) -> Any:
+    """
+    Get the status of a report job or ZIP batch.
+    """
+    return _job_public(_get_job(current_user, job_id))
+
+
+@router.get("/jobs/{job_id}/pdf", response_class=Response)
+def read_report_job_pdf(current_user: CurrentUser, job_id: uuid.UUID) -> Response:
+    """
+    Download the PDF rendered by a finished report job.
+    """
+    job = _get_job(current_user, job_id)
+    if job.error:
+        raise HTTPException(status_code=500, detail="Report generation failed")
+    if not job.done:
+        raise HTTPException(status_code=409, detail="Report is not ready yet")
+    return _pdf_response(job.result, f"report-{job_id}.pdf")
@@ -1,18 +1,17 @@
 """Virtual tutor API endpoints."""
 
 from fastapi import APIRouter, HTTPException
-from sqlmodel import Session
 
-from app.api.deps import CurrentUser, SessionDep
-from app.virtual_tutor import recommend_remediation
+from app.api.deps import AsyncCurrentUser, AsyncReadSessionDep
+from app.virtual_tutor import recommend_remediation_async
 
 router = APIRouter()
 
 
 @router.get("/recommendations")
-def get_tutor_recommendations(
-    session: SessionDep,
-    current_user: CurrentUser,
+async def get_tutor_recommendations(
+    session: AsyncReadSessionDep,
+    current_user: AsyncCurrentUser,
     threshold: int = 60,
 ) -> dict:
     """
@@ -31,7 +30,7 @@ def get_tutor_recommendations(
             status_code=400, detail="Threshold must be between 0 and 100"
         )
 
-    recommendations = recommend_remediation(
+    recommendations = await recommend_remediation_async(
         session=session, user=current_user, threshold=threshold
     )
 
@@ -0,0 +1,253 @@
+"""User API endpoints."""
+
+import io
+import tempfile
+import uuid
+from typing import IO, Annotated, Any
+
+from fastapi import APIRouter, Depends, HTTPException, Query, Request, status
+from sqlalchemy import Engine
+from sqlmodel import Session, select
+from starlette.concurrency import run_in_threadpool
+
+from app import user_deletion, user_import
+from app.api.deps import (
+    CurrentUser,
+    ReadSessionDep,
+    SessionDep,
+    get_current_active_superuser,
+)
+from app.core.config import settings
+from app.core.jobs import Job, JobRegistry
+from app.ingest import IngestFormat, IngestReport
+from app.models import (
+    IngestErrorPublic,
+    JobPublic,
+    Message,
+    User,
+    UserImportPublic,
+    UsersPublic,
+)
+from app.pagination import estimate_count, paginate
+
+router = APIRouter()
+
+deletion_jobs = JobRegistry(ttl_seconds=settings.USER_DELETION_JOB_TTL_SECONDS)
+import_jobs = JobRegistry(ttl_seconds=settings.REPORT_JOB_TTL_SECONDS)
+
+
+@router.get(
+    "/",
+    dependencies=[Depends(get_current_active_superuser)],
+    response_model=UsersPublic,
+)
+def read_users(
+    session: ReadSessionDep,
+    limit: Annotated[int, Query(ge=1, le=1000)] = 100,
+    cursor: str | None = None,
+    count: bool = False,
+) -> Any:
+    """
+    List users by email.
+
+    Pass the returned next_cursor to get the following page. With
+    count=true the response includes an estimated total.
+    """
+    statement = select(User)
+    try:
+        users, next_cursor = paginate(
+            session,
+            statement,
+            order_by=[User.email, User.id],
+            limit=limit,
+            cursor=cursor,
+        )
+    except ValueError:
+        raise HTTPException(status_code=400, detail="Invalid cursor")
+    return UsersPublic(
+        data=users,
+        count=estimate_count(session, statement) if count else None,
+        next_cursor=next_cursor,
+    )
+
+
+def _job_public(job: Job) -> JobPublic:
+    return JobPublic(
+        id=job.id,
+        kind=job.kind,
+        status=job.status.value,
+        total=job.total,
+        completed=job.completed,
+        failed=job.failed,
+        error=job.error,
+    )
+
+
+def _run_deletion(bind: Engine, user_id: uuid.UUID, job: Job) -> int:
+    def on_progress(rows: int) -> None:
+        job.completed += rows
+
+    with Session(bind) as session:
+        job.total = user_deletion.count_user_rows(session=session, user_id=user_id)
+        return user_deletion.delete_user(
+            session=session, user_id=user_id, on_progress=on_progress
+        )
+
+
+async def _start_deletion(session: Session, user: User, requested_by: User) -> Job:
+    await run_in_threadpool(user_deletion.deactivate_user, session=session, user=user)
+    job = deletion_jobs.create("user-deletion", owner_id=requested_by.id)
+    deletion_jobs.run(
+        job, run_in_threadpool(_run_deletion, session.get_bind().engine, user.id, job)
+    )
+    return job
+
+
+@router.delete("/me", response_model=Message, status_code=status.HTTP_202_ACCEPTED)
+async def delete_user_me(session: SessionDep, current_user: CurrentUser) -> Any:
+    """
+    Delete the current user and everything they own.
+
+    The account is deactivated at once and its data deleted in the background.
+    Its tokens stop working with it, so there is no job for it to poll.
+    """
+    if current_user.is_superuser:
+        raise HTTPException(
+            status_code=403, detail="Super users are not allowed to delete themselves"
+        )
+    await _start_deletion(session, current_user, current_user)
+    return Message(message="User deletion started")
+
+
+@router.delete(
+    "/{user_id}",
+    response_model=JobPublic,
+    status_code=status.HTTP_202_ACCEPTED,
+    dependencies=[Depends(get_current_active_superuser)],
+)
+async def delete_user(
+    session: SessionDep, current_user: CurrentUser, user_id: uuid.UUID
+) -> Any:
+    """
+    Delete a user and everything they own.
+
+    The account is deactivated at once and its data deleted in the
+    background. Poll /users/deletions/{id} for the rows deleted so far.
+    Jobs are kept in process memory: if the server restarts before the job
+    ends, the user stays deactivated with part of its data, and deleting
+    it again finishes the job.
+    """
+    user = await run_in_threadpool(session.get, User, user_id)
+    if not user:
+        raise HTTPException(status_code=404, detail="User not found")
+    if user == current_user:
+        raise HTTPException(
+            status_code=403, detail="Super users are not allowed to delete themselves"
+        )
+    return _job_public(await _start_deletion(session, user, current_user))
+
+
+@router.get(
+    "/deletions/{job_id}",
+    response_model=JobPublic,
+    dependencies=[Depends(get_current_active_superuser)],
+)
+def read_user_deletion(job_id: uuid.UUID) -> Any:
+    """
+    Get the progress of a user deletion.
+    """
+    job = deletion_jobs.get(job_id)
+    if not job:
+        raise HTTPException(status_code=404, detail="Job not found")
+    return _job_public(job)
+
+
+def _run_import(
+    bind: Engine, upload: IO[bytes], fmt: IngestFormat, job: Job, report: IngestReport
+) -> IngestReport:
+    def on_progress(report: IngestReport) -> None:
+        job.total = report.total
+        job.completed = report.loaded
+        job.failed = report.failed
+
+    with upload, Session(bind) as session:
+        upload.seek(0)
+        stream = io.TextIOWrapper(upload, encoding="utf-8", newline="")
+        return user_import.import_users(
+            session=session,
+            stream=stream,
+            fmt=fmt,
+            report=report,
+            on_progress=on_progress,
+        )
+
+
+def _import_public(job: Job) -> UserImportPublic:
+    report: IngestReport = job.result
+    return UserImportPublic(
+        id=job.id,
+        kind=job.kind,
+        status=job.status.value,
+        total=job.total,
+        completed=job.completed,
+        failed=job.failed,
+        error=job.error,
+        rows_per_second=round(report.rows_per_second, 1),
+        errors=[
+            IngestErrorPublic(line=e.line, message=e.message) for e in report.errors
+        ],
+    )
+
+
+@router.post(
+    "/import",
+    response_model=UserImportPublic,
+    status_code=status.HTTP_202_ACCEPTED,
+    dependencies=[Depends(get_current_active_superuser)],
+)
+async def create_user_import(
+    request: Request,
+    session: SessionDep,
+    current_user: CurrentUser,
+    format: IngestFormat = "csv",
+) -> Any:
+    """
+    Bulk create users from a CSV or JSON Lines request body.
+
+    Rows hold email and password, optionally full_name, is_active and
+    is_superuser. The body is spooled to disk and imported in the background. Poll /users/imports/{id} for row
+    counts and the rows that failed, such as duplicate emails.
+    """
+    upload = tempfile.TemporaryFile()
+    try:
+        async for chunk in request.stream():
+            await run_in_threadpool(upload.write, chunk)
+    except BaseException:
+        upload.close()
+        raise
+    job = import_jobs.create("user-import", owner_id=current_user.id)
+    report = IngestReport()
+    # Readable while the import runs, the job result is set again when it ends
+    job.result = report
+    import_jobs.run(
+        job,
+        run_in_threadpool(
+            _run_import, session.get_bind().engine, upload, format, job, report
+        ),
+    )
+    return _import_public(job)
+
+
+@router.get(
+    "/imports/{job_id}",
+    response_model=UserImportPublic,
+    dependencies=[Depends(get_current_active_superuser)],
+)
+def read_user_import(job_id: uuid.UUID) -> Any:
+    """
+    Get the progress of a bulk user import.
+    """
+    job = import_jobs.get(job_id)
+    if not job:
+        raise HTTPException(status_code=404, detail="Job not found")
+    return _import_public(job)
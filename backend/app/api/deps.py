@@ -1,17 +1,21 @@
-from collections.abc import Generator
+from collections.abc import AsyncGenerator, Generator
 from typing import Annotated
 
-import jwt
 from fastapi import Depends, HTTPException, status
 from fastapi.security import OAuth2PasswordBearer
 from jwt.exceptions import InvalidTokenError
 from pydantic import ValidationError
+from sqlalchemy.orm import make_transient_to_detached
 from sqlmodel import Session
+from sqlmodel.ext.asyncio.session import AsyncSession
 
-from app.core import security
 from app.core.config import settings
-from app.core.db import engine
+from app.core.db import async_engine, engine, replicas
+from app.core.jwt_keys import get_token_keys
+from app.core.replicas import RoutingSession
+from app.crud import unit_of_work
 from app.models import TokenPayload, User
+from app.user_cache import token_revocations, user_cache
 
 reusable_oauth2 = OAuth2PasswordBearer(
     tokenUrl=f"{settings.API_V1_STR}/login/access-token"
@@ -23,30 +27,142 @@ def get_db() -> Generator[Session, None, None]:
         yield session
 
 
+async def get_async_db() -> AsyncGenerator[AsyncSession, None]:
+    # Attributes cannot lazy load after a commit in async code, keep them loaded
+    async with AsyncSession(async_engine, expire_on_commit=False) as session:
+        yield session
+
+
+def get_db_transaction() -> Generator[Session, None, None]:
+    with Session(engine) as session, unit_of_work(session):
+        yield session
+
+
+# The commit must happen before the response is sent, for a failed commit
+# to fail the request. FastAPI 0.121+ defers the exit code of dependencies
+# until after sending unless scope="function"; earlier versions do not
+# take a scope and always run it before sending.
+try:
+    _transaction = Depends(get_db_transaction, scope="function")
+except TypeError:
+    _transaction = Depends(get_db_transaction)
+
+
+def get_read_db() -> Generator[Session, None, None]:
+    with RoutingSession(primary=engine, replicas=replicas) as session:
+        yield session
+
+
+async def get_async_read_db() -> AsyncGenerator[AsyncSession, None]:
+    async with AsyncSession(
+        sync_session_class=RoutingSession,
+        primary=async_engine.sync_engine,
+        replicas=replicas,
+        is_async=True,
+        expire_on_commit=False,
+    ) as session:
+        yield session
+
+
 SessionDep = Annotated[Session, Depends(get_db)]
+# crud functions flush instead of committing, the dependency commits once
+# the route returns, and everything rolls back if it raises
+TransactionDep = Annotated[Session, _transaction]
+AsyncSessionDep = Annotated[AsyncSession, Depends(get_async_db)]
+# Reads from a replica when one is configured and fresh enough, and from
+# the primary once the request writes
+ReadSessionDep = Annotated[Session, Depends(get_read_db)]
+AsyncReadSessionDep = Annotated[AsyncSession, Depends(get_async_read_db)]
 TokenDep = Annotated[str, Depends(reusable_oauth2)]
 
 
-def get_current_user(session: SessionDep, token: TokenDep) -> User:
+# Attributes of a user built from token claims, the others load on access
+CLAIMED_ATTRIBUTES = ("id", "is_active", "is_superuser", "token_version")
+
+
+def _credentials_error() -> HTTPException:
+    return HTTPException(
+        status_code=status.HTTP_403_FORBIDDEN,
+        detail="Could not validate credentials",
+    )
+
+
+def decode_token(token: str, *, token_type: str = "access") -> TokenPayload:
     try:
-        payload = jwt.decode(
-            token, settings.SECRET_KEY, algorithms=[security.ALGORITHM]
-        )
-        token_data = TokenPayload(**payload)
+        token_data = TokenPayload(**get_token_keys().decode(token))
     except (InvalidTokenError, ValidationError):
-        raise HTTPException(
-            status_code=status.HTTP_403_FORBIDDEN,
-            detail="Could not validate credentials",
+        raise _credentials_error()
+    if (
+        token_data.sub is None
+        or token_data.type != token_type
+        or (
+            token_data.ver is not None
+            and token_revocations.is_revoked(token_data.sub, token_data.ver)
         )
-    user = session.get(User, token_data.sub)
+    ):
+        raise _credentials_error()
+    return token_data
+
+
+def _check_user(user: User | None, token_data: TokenPayload) -> User:
     if not user:
         raise HTTPException(status_code=404, detail="User not found")
+    if token_data.ver is not None and token_data.ver != user.token_version:
+        raise _credentials_error()
     if not user.is_active:
         raise HTTPException(status_code=400, detail="Inactive user")
     return user
 
 
+def _user_from_claims(session: Session, token_data: TokenPayload) -> User | None:
+    """The user of a self-contained access token, without a query."""
+    if (
+        not settings.ACCESS_TOKEN_CLAIMS
+        or token_data.sub is None
+        or token_data.ver is None
+        or token_data.is_active is None
+        or token_data.is_superuser is None
+    ):
+        return None
+    # The token carries CLAIMED_ATTRIBUTES only; the others are expired
+    # below, so placeholders never show and the real values load on access
+    user = User(
+        id=token_data.sub,
+        email="",
+        hashed_password="",
+        is_active=token_data.is_active,
+        is_superuser=token_data.is_superuser,
+        token_version=token_data.ver,
+    )
+    make_transient_to_detached(user)
+    user = session.merge(user, load=False)
+    session.expire(
+        user, [name for name in User.model_fields if name not in CLAIMED_ATTRIBUTES]
+    )
+    return user
+
+
+def get_current_user(session: SessionDep, token: TokenDep) -> User:
+    token_data = decode_token(token)
+    user = _user_from_claims(session, token_data) or user_cache.get_user(
+        session=session, user_id=token_data.sub
+    )
+    return _check_user(user, token_data)
+
+
+async def get_current_user_async(session: AsyncSessionDep, token: TokenDep) -> User:
+    # Attributes cannot lazy load in async code, so claims are only checked
+    # against the user from the cache or the database
+    token_data = decode_token(token)
+    return _check_user(
+        await user_cache.get_user_async(session=session, user_id=token_data.sub),
+        token_data,
+    )
+
+
 CurrentUser = Annotated[User, Depends(get_current_user)]
+# Same user as CurrentUser, loaded without taking a threadpool thread
+AsyncCurrentUser = Annotated[User, Depends(get_current_user_async)]
 
 
 def get_current_active_superuser(current_user: CurrentUser) -> User:
@@ -0,0 +1,24 @@
+"""Well-known endpoints, served at the root rather than under API_V1_STR."""
+
+from typing import Any
+
+from fastapi import APIRouter, Response
+
+from app.core.jwt_keys import get_token_keys
+
+router = APIRouter()
+
+# Verifiers cache the key set this long, and refetch it early when a token
+# names an unknown key
+JWKS_MAX_AGE_SECONDS = 300
+
+
+@router.get("/.well-known/jwks.json")
+def read_jwks(response: Response) -> Any:
+    """
+    Public keys verifying access tokens, as a JSON Web Key Set.
+
+    Empty while tokens are HS256-signed with the backend's secret.
+    """
+    response.headers["Cache-Control"] = f"public, max-age={JWKS_MAX_AGE_SECONDS}"
+    return get_token_keys().jwks()
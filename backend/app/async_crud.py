@@ -0,0 +1,195 @@
+"""Async versions of the crud functions, for routes using AsyncSessionDep.
+
+Each function mirrors its namesake in app.crud. Password hashing is CPU
+bound, so it runs on the bounded password hasher instead of blocking the
+event loop, and raises PasswordHasherBusy when its queue is full.
+"""
+
+import uuid
+from collections.abc import AsyncIterator
+from contextlib import asynccontextmanager
+from typing import Any, TypeVar
+
+from sqlalchemy import orm
+from sqlmodel import select
+from sqlmodel.ext.asyncio.session import AsyncSession
+
+from app.core.security import password_hasher
+from app.crud import (
+    UNIT_OF_WORK,
+    revokes_tokens,
+    struggling_modules_statement,
+    student_progress_upsert,
+)
+from app.models import (
+    Item,
+    ItemCreate,
+    StudentProgress,
+    StudentProgressCreate,
+    StudentProgressUpdate,
+    User,
+    UserCreate,
+    UserUpdate,
+)
+from app.modules import module_catalog
+from app.user_cache import revoke_tokens, user_cache
+
+T = TypeVar("T")
+
+
+@asynccontextmanager
+async def unit_of_work(session: AsyncSession) -> AsyncIterator[AsyncSession]:
+    """Async version of app.crud.unit_of_work."""
+    if in_unit_of_work(session):
+        yield session
+        return
+    session.info[UNIT_OF_WORK] = True
+    try:
+        yield session
+        await session.commit()
+    except BaseException:
+        await session.rollback()
+        raise
+    finally:
+        del session.info[UNIT_OF_WORK]
+
+
+def in_unit_of_work(session: AsyncSession) -> bool:
+    return bool(session.info.get(UNIT_OF_WORK))
+
+
+async def _save(session: AsyncSession, obj: T) -> T:
+    session.add(obj)
+    if in_unit_of_work(session):
+        await session.flush()
+    else:
+        await session.commit()
+        await session.refresh(obj)
+    return obj
+
+
+async def create_user(*, session: AsyncSession, user_create: UserCreate) -> User:
+    hashed_password = await password_hasher.hash(user_create.password)
+    db_obj = User.model_validate(
+        user_create, update={"hashed_password": hashed_password}
+    )
+    return await _save(session, db_obj)
+
+
+async def update_user(
+    *, session: AsyncSession, db_user: User, user_in: UserUpdate
+) -> Any:
+    user_data = user_in.model_dump(exclude_unset=True)
+    extra_data = {}
+    if "password" in user_data:
+        extra_data["hashed_password"] = await password_hasher.hash(
+            user_data["password"]
+        )
+    if revokes_tokens(db_user, user_data):
+        await session.run_sync(revoke_tokens, db_user)
+    db_user.sqlmodel_update(user_data, update=extra_data)
+    user_cache.invalidate_on_commit(session.sync_session, db_user.id)
+    return await _save(session, db_user)
+
+
+async def get_user_by_email(*, session: AsyncSession, email: str) -> User | None:
+    statement = select(User).where(User.email == email)
+    return (await session.exec(statement)).first()
+
+
+async def authenticate(
+    *, session: AsyncSession, email: str, password: str
+) -> User | None:
+    db_user = await get_user_by_email(session=session, email=email)
+    if not db_user:
+        return None
+    if not await password_hasher.verify(password, db_user.hashed_password):
+        return None
+    return db_user
+
+
+async def create_item(
+    *, session: AsyncSession, item_in: ItemCreate, owner_id: uuid.UUID
+) -> Item:
+    db_item = Item.model_validate(item_in, update={"owner_id": owner_id})
+    return await _save(session, db_item)
+
+
+# StudentProgress CRUD operations
+
+
+# The module catalog runs on the sync session, through AsyncSession.run_sync
+def _module_id(sync_session: orm.Session, name: str) -> int | None:
+    return module_catalog.get_id(session=sync_session, name=name)
+
+
+def _get_or_create_module_id(sync_session: orm.Session, name: str) -> int:
+    return module_catalog.get_or_create_id(session=sync_session, name=name)
+
+
+async def get_student_progress_for_user(
+    *, session: AsyncSession, user_id: uuid.UUID
+) -> list[StudentProgress]:
+    """Get all student progress records for a user."""
+    statement = select(StudentProgress).where(StudentProgress.user_id == user_id)
+    return list((await session.exec(statement)).all())
+
+
+async def get_student_progress_by_module(
+    *, session: AsyncSession, user_id: uuid.UUID, module_name: str
+) -> StudentProgress | None:
+    """Get student progress for a specific module."""
+    module_id = await session.run_sync(_module_id, module_name)
+    if module_id is None:
+        return None
+    statement = select(StudentProgress).where(
+        StudentProgress.user_id == user_id, StudentProgress.module_id == module_id
+    )
+    return (await session.exec(statement)).first()
+
+
+async def create_or_update_student_progress(
+    *, session: AsyncSession, user_id: uuid.UUID, progress_in: StudentProgressCreate
+) -> StudentProgress:
+    """Create or update student progress for a module in a single statement."""
+    module_id = await session.run_sync(
+        _get_or_create_module_id, progress_in.module_name
+    )
+    statement = student_progress_upsert(
+        session.sync_session.get_bind().dialect.name,
+        user_id=user_id,
+        module_id=module_id,
+        progress_in=progress_in,
+    )
+    result = await session.exec(
+        statement, execution_options={"populate_existing": True}
+    )
+    db_progress: StudentProgress = result.scalar_one()
+    if not in_unit_of_work(session):
+        await session.commit()
+    return db_progress
+
+
+async def set_student_progress_fields(
+    *,
+    session: AsyncSession,
+    progress_obj: StudentProgress,
+    progress_update: StudentProgressCreate | StudentProgressUpdate,
+) -> StudentProgress:
+    """Update student progress fields."""
+    update_data = progress_update.model_dump(exclude_unset=True)
+    module_name = update_data.pop("module_name", None)
+    if module_name is not None:
+        update_data["module_id"] = await session.run_sync(
+            _get_or_create_module_id, module_name
+        )
+    progress_obj.sqlmodel_update(update_data)
+    return await _save(session, progress_obj)
+
+
+async def get_struggling_modules_for_user(
+    *, session: AsyncSession, user_id: uuid.UUID, progress_threshold: int = 60
+) -> list[StudentProgress]:
+    """Get modules where user is struggling (progress < threshold or struggling flag set)."""
+    statement = struggling_modules_statement(user_id, progress_threshold)
+    return list((await session.exec(statement)).scalars().all())
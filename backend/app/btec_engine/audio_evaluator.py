@@ -1,7 +1,123 @@
+import asyncio
+import time
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass
+
 import whisper
 
-model = whisper.load_model("base")
+from app.core.config import settings
+from app.core.metrics import REGISTRY
+
+# Whisper resamples every input to 16 kHz mono (whisper.audio.SAMPLE_RATE)
+SAMPLE_RATE = 16000
+
+model = whisper.load_model(settings.WHISPER_MODEL)
+
+_executor = ThreadPoolExecutor(
+    max_workers=settings.AUDIO_WORKERS, thread_name_prefix="whisper"
+)
+
+DECODE_SECONDS = REGISTRY.histogram(
+    "btec_audio_decode_seconds", "Time spent decoding audio files.", ("model",)
+)
+INFERENCE_SECONDS = REGISTRY.histogram(
+    "btec_audio_inference_seconds", "Time spent in Whisper inference.", ("model",)
+)
+AUDIO_DURATION_SECONDS = REGISTRY.histogram(
+    "btec_audio_duration_seconds",
+    "Duration of transcribed audio.",
+    ("model",),
+    buckets=(5, 15, 30, 60, 120, 300, 600, 1200),
+)
+REAL_TIME_FACTOR = REGISTRY.histogram(
+    "btec_audio_real_time_factor",
+    "Processing time divided by audio duration.",
+    ("model",),
+    buckets=(0.05, 0.1, 0.25, 0.5, 0.75, 1.0, 1.5, 2.0, 5.0),
+)
+QUEUE_WAIT_SECONDS = REGISTRY.histogram(
+    "btec_audio_queue_wait_seconds",
+    "Time a transcription job waited for a free worker.",
+    ("model",),
+)
+JOBS_IN_FLIGHT = REGISTRY.gauge(
+    "btec_audio_jobs_in_flight", "Transcription jobs queued or running."
+)
+
+
+@dataclass
+class TranscriptionResult:
+    text: str
+    model_name: str
+    audio_duration: float
+    decode_time: float
+    inference_time: float
+    queue_wait: float = 0.0
+
+    @property
+    def real_time_factor(self) -> float:
+        if self.audio_duration <= 0:
+            return 0.0
+        return (self.decode_time + self.inference_time) / self.audio_duration
+
+    def metrics(self) -> dict[str, float | str]:
+        return {
+            "model": self.model_name,
+            "audio_duration": round(self.audio_duration, 3),
+            "decode_time": round(self.decode_time, 4),
+            "inference_time": round(self.inference_time, 4),
+            "queue_wait": round(self.queue_wait, 4),
+            "real_time_factor": round(self.real_time_factor, 4),
+        }
+
+
+def _record(result: TranscriptionResult) -> None:
+    labels = {"model": result.model_name}
+    DECODE_SECONDS.observe(result.decode_time, **labels)
+    INFERENCE_SECONDS.observe(result.inference_time, **labels)
+    AUDIO_DURATION_SECONDS.observe(result.audio_duration, **labels)
+    REAL_TIME_FACTOR.observe(result.real_time_factor, **labels)
+    QUEUE_WAIT_SECONDS.observe(result.queue_wait, **labels)
+
+
+def transcribe_audio_timed(
+    file_path: str, queue_wait: float = 0.0
+) -> TranscriptionResult:
+    started = time.perf_counter()
+    audio = whisper.load_audio(file_path)
+    decoded = time.perf_counter()
+    result = model.transcribe(audio, language="en")
+    finished = time.perf_counter()
+
+    transcription = TranscriptionResult(
+        text=result.get("text", ""),
+        model_name=settings.WHISPER_MODEL,
+        audio_duration=len(audio) / SAMPLE_RATE,
+        decode_time=decoded - started,
+        inference_time=finished - decoded,
+        queue_wait=queue_wait,
+    )
+    _record(transcription)
+    return transcription
+
 
 def transcribe_audio(file_path: str) -> str:
-    result = model.transcribe(file_path, language="en")
-    return result.get("text", "")
\ No newline at end of file
+    return transcribe_audio_timed(file_path).text
+
+
+def _run_job(file_path: str, enqueued_at: float) -> TranscriptionResult:
+    return transcribe_audio_timed(
+        file_path, queue_wait=time.perf_counter() - enqueued_at
+    )
+
+
+async def submit_transcription(file_path: str) -> TranscriptionResult:
+    """Transcribe on the worker pool without blocking the event loop."""
+    loop = asyncio.get_running_loop()
+    JOBS_IN_FLIGHT.inc()
+    try:
+        return await loop.run_in_executor(
+            _executor, _run_job, file_path, time.perf_counter()
+        )
+    finally:
+        JOBS_IN_FLIGHT.dec()
@@ -0,0 +1,107 @@
+"""Disk cache of rendered reports keyed by a fingerprint of their input.
+
+A report is a pure function of its template and data, so the SHA-256 of
+both identifies the PDF: when neither changed, the cached file is served
+instead of rendering again, and the fingerprint doubles as the ETag.
+
+Entries are plain files, so every worker process shares the cache. The
+file modification time records the last use, and when the directory
+grows past its size cap the least recently used files are removed.
+"""
+
+import hashlib
+import json
+import logging
+import os
+import tempfile
+from pathlib import Path
+from typing import Any
+
+from app.core.metrics import REGISTRY
+
+logger = logging.getLogger(__name__)
+
+CACHE_REQUESTS = REGISTRY.counter(
+    "btec_report_cache_requests", "Report cache lookups.", ("result",)
+)
+
+# Context keys that change on every render without changing the report data
+VOLATILE_KEYS = frozenset({"generated_at"})
+
+
+def report_fingerprint(
+    template_version: str, template_name: str, context: dict[str, Any]
+) -> str:
+    data = {k: v for k, v in context.items() if k not in VOLATILE_KEYS}
+    payload = json.dumps(
+        [template_version, template_name, data],
+        sort_keys=True,
+        separators=(",", ":"),
+        default=str,
+    )
+    return hashlib.sha256(payload.encode()).hexdigest()
+
+
+class ReportCache:
+    def __init__(self, directory: Path, *, max_bytes: int) -> None:
+        self.directory = directory
+        self.max_bytes = max_bytes
+        self.directory.mkdir(parents=True, exist_ok=True)
+        self._approx_bytes = sum(size for _, _, size in self._entries())
+
+    def _path(self, key: str) -> Path:
+        return self.directory / key[:2] / f"{key}.pdf"
+
+    def _entries(self) -> list[tuple[float, Path, int]]:
+        entries = []
+        for path in self.directory.glob("*/*.pdf"):
+            try:
+                stat = path.stat()
+            except FileNotFoundError:
+                continue
+            entries.append((stat.st_mtime, path, stat.st_size))
+        return entries
+
+    def get(self, key: str) -> bytes | None:
+        path = self._path(key)
+        try:
+            data = path.read_bytes()
+            # Mark as recently used
+            os.utime(path)
+        except FileNotFoundError:
+            CACHE_REQUESTS.inc(result="miss")
+            return None
+        CACHE_REQUESTS.inc(result="hit")
+        return data
+
+    def put(self, key: str, data: bytes) -> None:
+        if len(data) > self.max_bytes:
+            return
+        path = self._path(key)
+        path.parent.mkdir(exist_ok=True)
+        # Write to a temporary file first so readers never see partial PDFs
+        fd, tmp_name = tempfile.mkstemp(dir=path.parent, suffix=".tmp")
+        try:
+            with os.fdopen(fd, "wb") as tmp:
+                tmp.write(data)
+            os.replace(tmp_name, path)
+        except BaseException:
+            Path(tmp_name).unlink(missing_ok=True)
+            raise
+        self._approx_bytes += len(data)
+        if self._approx_bytes > self.max_bytes:
+            self._evict()
+
+    def _evict(self) -> None:
+        # Other processes write to the same directory, so recount from disk
+        entries = sorted(self._entries())
+        total = sum(size for _, _, size in entries)
+        # Free down to 90% of the cap so eviction does not run on every put
+        target = self.max_bytes * 0.9
+        for _, path, size in entries:
+            if total <= target:
+                break
+            path.unlink(missing_ok=True)
+            total -= size
+        self._approx_bytes = total
+        logger.info("Report cache evicted down to %d bytes", total)
@@ -0,0 +1,130 @@
+"""Report rendering engine shared by all renders in a worker process.
+
+Building a PDF from scratch means compiling the Jinja2 template, parsing
+the stylesheet and loading the Cairo/Inter font files before any layout
+happens. For small reports that setup dominates render time, so the
+engine does it once per process and reuses the results:
+
+* every template in ``report-templates`` is compiled when the engine is
+  created,
+* ``report.css`` is parsed once into a WeasyPrint ``CSS`` object,
+* a single ``FontConfiguration`` holds the ``@font-face`` fonts.
+"""
+
+import hashlib
+from pathlib import Path
+from typing import Any
+
+from jinja2 import Environment, FileSystemLoader, StrictUndefined, Template
+
+from app.core.config import settings
+
+TEMPLATES_DIR = Path(__file__).parent / "report-templates"
+STYLESHEET = "report.css"
+
+# Font family -> file name inside settings.REPORT_FONTS_DIR
+FONT_FILES = {
+    "Cairo": "Cairo-Regular.ttf",
+    "Inter": "InterVariable.ttf",
+}
+
+
+def font_face_css(fonts_dir: Path | None) -> str:
+    if fonts_dir is None:
+        return ""
+    rules = []
+    for family, filename in FONT_FILES.items():
+        path = (fonts_dir / filename).resolve()
+        if path.is_file():
+            rules.append(
+                f'@font-face {{ font-family: "{family}"; src: url("{path.as_uri()}"); }}'
+            )
+    return "\n".join(rules)
+
+
+class ReportEngine:
+    def __init__(
+        self, templates_dir: Path = TEMPLATES_DIR, fonts_dir: Path | None = None
+    ) -> None:
+        self.templates_dir = templates_dir
+        self.fonts_dir = fonts_dir
+        self.environment = Environment(
+            loader=FileSystemLoader(templates_dir),
+            autoescape=True,
+            undefined=StrictUndefined,
+            # Templates ship with the code, never check them for changes
+            auto_reload=False,
+            cache_size=-1,
+        )
+        self.templates: dict[str, Template] = {
+            name: self.environment.get_template(name)
+            for name in self.environment.list_templates(extensions=["html"])
+        }
+        self.stylesheet_source = (
+            font_face_css(fonts_dir) + "\n" + (templates_dir / STYLESHEET).read_text()
+        )
+        self.versions = {name: self._source_version(name) for name in self.templates}
+        self._font_config: Any = None
+        self._stylesheets: list[Any] | None = None
+
+    def _source_version(self, template_name: str) -> str:
+        source, _, _ = self.environment.loader.get_source(  # type: ignore[union-attr]
+            self.environment, template_name
+        )
+        digest = hashlib.sha256(source.encode())
+        digest.update(self.stylesheet_source.encode())
+        return digest.hexdigest()[:16]
+
+    def render_html(self, template_name: str, context: dict[str, Any]) -> str:
+        try:
+            template = self.templates[template_name]
+        except KeyError:
+            raise ValueError(f"Unknown report template: {template_name}")
+        return template.render(context)
+
+    def _load_stylesheets(self) -> list[Any]:
+        if self._stylesheets is None:
+            from weasyprint import CSS
+            from weasyprint.text.fonts import FontConfiguration
+
+            self._font_config = FontConfiguration()
+            self._stylesheets = [
+                CSS(string=self.stylesheet_source, font_config=self._font_config)
+            ]
+        return self._stylesheets
+
+    def warm_up(self) -> None:
+        """Parse the stylesheet and load fonts ahead of the first render."""
+        self._load_stylesheets()
+
+    def render_pdf(self, template_name: str, context: dict[str, Any]) -> bytes:
+        from weasyprint import HTML
+
+        stylesheets = self._load_stylesheets()
+        html = HTML(
+            string=self.render_html(template_name, context),
+            base_url=str(self.templates_dir),
+        )
+        pdf: bytes = html.write_pdf(
+            stylesheets=stylesheets, font_config=self._font_config
+        )
+        return pdf
+
+
+_engine: ReportEngine | None = None
+
+
+def get_engine() -> ReportEngine:
+    """Return the engine of the current process, creating it on first use."""
+    global _engine
+    if _engine is None:
+        fonts_dir = (
+            Path(settings.REPORT_FONTS_DIR) if settings.REPORT_FONTS_DIR else None
+        )
+        _engine = ReportEngine(fonts_dir=fonts_dir)
+    return _engine
+
+
+def init_worker() -> None:
+    """Process pool initializer: build the engine before the first job arrives."""
+    get_engine().warm_up()
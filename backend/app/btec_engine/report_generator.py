@@ -1,4 +0,0 @@
-from weasyprint import HTML
-
-def generate_report(html_content: str, output_path: str):
-    HTML(string=html_content).write_pdf(output_path)
\ No newline at end of file
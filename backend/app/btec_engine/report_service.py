@@ -0,0 +1,209 @@
+"""Render PDF reports on a pool of worker processes.
+
+WeasyPrint layout is CPU bound and takes hundreds of milliseconds to
+seconds per document, so it never runs on the event loop. Rendering is
+dispatched to a process pool, and a semaphore bounds how many reports are
+in flight so a burst of requests queues instead of exhausting memory.
+"""
+
+import asyncio
+import multiprocessing
+import uuid
+import zipfile
+from collections.abc import AsyncIterator, Callable
+from concurrent.futures import Executor, ProcessPoolExecutor
+from pathlib import Path
+from typing import Any
+
+from app.btec_engine.report_cache import ReportCache, report_fingerprint
+from app.btec_engine.report_engine import get_engine, init_worker
+from app.core.config import settings
+from app.core.jobs import Job, JobRegistry
+
+RenderFunction = Callable[[str, dict[str, Any]], bytes]
+# (file name inside the archive, template name, template context)
+ReportItem = tuple[str, str, dict[str, Any]]
+
+
+def render_report(template_name: str, context: dict[str, Any]) -> bytes:
+    return get_engine().render_pdf(template_name, context)
+
+
+class _ChunkWriter:
+    """Unseekable file object that collects what ZipFile writes to it."""
+
+    def __init__(self) -> None:
+        self._chunks: list[bytes] = []
+
+    def write(self, data: bytes) -> int:
+        self._chunks.append(bytes(data))
+        return len(data)
+
+    def flush(self) -> None:
+        pass
+
+    def close(self) -> None:
+        pass
+
+    def drain(self) -> bytes:
+        data = b"".join(self._chunks)
+        self._chunks.clear()
+        return data
+
+
+class ReportService:
+    def __init__(
+        self,
+        *,
+        max_workers: int,
+        max_concurrency: int,
+        executor: Executor | None = None,
+        render: RenderFunction = render_report,
+        cache: ReportCache | None = None,
+    ) -> None:
+        self.max_workers = max_workers
+        self._executor = executor
+        self._render = render
+        self.cache = cache
+        self._semaphore = asyncio.Semaphore(max_concurrency)
+        self.jobs = JobRegistry(ttl_seconds=settings.REPORT_JOB_TTL_SECONDS)
+
+    @property
+    def executor(self) -> Executor:
+        # Created lazily so importing the API does not spawn processes
+        if self._executor is None:
+            self._executor = ProcessPoolExecutor(
+                max_workers=self.max_workers,
+                initializer=init_worker,
+                # The API process runs threads, which do not survive fork()
+                mp_context=multiprocessing.get_context("spawn"),
+            )
+        return self._executor
+
+    def fingerprint(self, template_name: str, context: dict[str, Any]) -> str:
+        version = get_engine().versions.get(template_name, "")
+        return report_fingerprint(version, template_name, context)
+
+    async def render(
+        self,
+        template_name: str,
+        context: dict[str, Any],
+        *,
+        fingerprint: str | None = None,
+    ) -> bytes:
+        """Render a report, or return the cached PDF for identical input."""
+        if self.cache is not None:
+            fingerprint = fingerprint or self.fingerprint(template_name, context)
+            cached = await asyncio.to_thread(self.cache.get, fingerprint)
+            if cached is not None:
+                return cached
+        async with self._semaphore:
+            loop = asyncio.get_running_loop()
+            pdf = await loop.run_in_executor(
+                self.executor, self._render, template_name, context
+            )
+        if self.cache is not None and fingerprint is not None:
+            await asyncio.to_thread(self.cache.put, fingerprint, pdf)
+        return pdf
+
+    def submit(
+        self,
+        template_name: str,
+        context: dict[str, Any],
+        *,
+        owner_id: uuid.UUID | None = None,
+    ) -> Job:
+        """Render in the background and keep the PDF on the returned job."""
+        job = self.jobs.create("report", total=1, owner_id=owner_id)
+        self.jobs.run(job, self._render_job(job, template_name, context))
+        return job
+
+    async def _render_job(
+        self, job: Job, template_name: str, context: dict[str, Any]
+    ) -> bytes:
+        pdf = await self.render(template_name, context)
+        job.completed = 1
+        return pdf
+
+    async def _render_item(self, item: ReportItem) -> tuple[str, bytes]:
+        filename, template_name, context = item
+        return filename, await self.render(template_name, context)
+
+    async def render_zip(
+        self, items: AsyncIterator[ReportItem], job: Job, *, window: int
+    ) -> AsyncIterator[bytes]:
+        """Render ``items`` concurrently and stream them as a ZIP archive.
+
+        At most ``window`` reports are rendering or waiting to be written at
+        any time, and each PDF is written out as soon as it completes, so
+        memory stays bounded whatever the number of items. Progress is
+        tracked on ``job``; reports that fail are listed in ``errors.txt``.
+        """
+        writer = _ChunkWriter()
+        pending: set[asyncio.Task[tuple[str, bytes]]] = set()
+        errors: list[str] = []
+        names: dict[asyncio.Task[tuple[str, bytes]], str] = {}
+        job.start()
+        try:
+            # PDF streams are already compressed, and deflating on the event
+            # loop would stall other requests, so entries are stored as-is
+            with zipfile.ZipFile(
+                writer, mode="w", compression=zipfile.ZIP_STORED
+            ) as archive:
+
+                async def write_completed() -> None:
+                    done, _ = await asyncio.wait(
+                        pending, return_when=asyncio.FIRST_COMPLETED
+                    )
+                    for task in done:
+                        pending.discard(task)
+                        filename = names.pop(task)
+                        try:
+                            _, pdf = task.result()
+                        except Exception as e:
+                            job.failed += 1
+                            errors.append(f"{filename}: {e or e.__class__.__name__}")
+                            continue
+                        archive.writestr(filename, pdf)
+                        job.completed += 1
+
+                async for item in items:
+                    task = asyncio.create_task(self._render_item(item))
+                    names[task] = item[0]
+                    pending.add(task)
+                    if len(pending) >= window:
+                        await write_completed()
+                        yield writer.drain()
+                while pending:
+                    await write_completed()
+                    yield writer.drain()
+                if errors:
+                    archive.writestr("errors.txt", "\n".join(errors) + "\n")
+            yield writer.drain()
+        except BaseException as e:
+            # The client disconnected or the item source failed mid-archive
+            for task in pending:
+                task.cancel()
+            cancelled = isinstance(e, GeneratorExit | asyncio.CancelledError)
+            job.fail("cancelled" if cancelled else str(e))
+            raise
+        job.succeed()
+
+    def shutdown(self) -> None:
+        if self._executor is not None:
+            self._executor.shutdown(wait=False, cancel_futures=True)
+            self._executor = None
+
+
+report_service = ReportService(
+    max_workers=settings.REPORT_WORKERS,
+    max_concurrency=settings.REPORT_MAX_CONCURRENCY,
+    cache=(
+        ReportCache(
+            Path(settings.REPORT_CACHE_DIR),
+            max_bytes=settings.REPORT_CACHE_MAX_BYTES,
+        )
+        if settings.REPORT_CACHE_MAX_BYTES > 0
+        else None
+    ),
+)
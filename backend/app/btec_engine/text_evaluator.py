@@ -1,6 +1,7 @@
 import textdistance
 import Levenshtein
 
+
 def evaluate_text(student_answer: str, model_answer: str) -> dict:
     similarity = textdistance.cosine.normalized_similarity(student_answer, model_answer)
     levenshtein_ratio = Levenshtein.ratio(student_answer, model_answer)
@@ -8,4 +9,4 @@ def evaluate_text(student_answer: str, model_answer: str) -> dict:
     return {
         "similarity": similarity,
         "levenshtein_ratio": levenshtein_ratio,
-    }
\ No newline at end of file
+    }
@@ -34,6 +34,19 @@ class Settings(BaseSettings):
     SECRET_KEY: str = secrets.token_urlsafe(32)
     # 60 minutes * 24 hours * 8 days = 8 days
     ACCESS_TOKEN_EXPIRE_MINUTES: int = 60 * 24 * 8
+    # Opt-in self-contained access tokens: they carry is_active,
+    # is_superuser and the user's token version, so most requests are
+    # authorized without a query. They are short-lived and renewed with a
+    # refresh token; revoking a user's tokens takes effect at once in the
+    # process that did it and within the access token lifetime elsewhere.
+    ACCESS_TOKEN_CLAIMS: bool = False
+    ACCESS_TOKEN_CLAIMS_EXPIRE_MINUTES: int = 15
+    REFRESH_TOKEN_EXPIRE_DAYS: int = 30
+    # HS256 signs access tokens with SECRET_KEY. RS256 and EdDSA sign them
+    # with the private keys in JWT_KEYS_DIR and publish the public keys at
+    # /.well-known/jwks.json, see app.core.jwt_keys
+    JWT_ALGORITHM: Literal["HS256", "RS256", "EdDSA"] = "HS256"
+    JWT_KEYS_DIR: str = "/app/keys"
     FRONTEND_HOST: str = "http://localhost:5173"
     ENVIRONMENT: Literal["local", "staging", "production"] = "local"
 
@@ -68,6 +81,71 @@ class Settings(BaseSettings):
             path=self.POSTGRES_DB,
         )
 
+    # Connection pool of each engine (sync and async), per worker process
+    DB_POOL_SIZE: int = 5
+    DB_MAX_OVERFLOW: int = 10
+    # Seconds to wait for a free connection before failing the request
+    DB_POOL_TIMEOUT: float = 30
+    # Replace connections older than this many seconds, -1 never does
+    DB_POOL_RECYCLE: int = 30 * 60
+    DB_POOL_PRE_PING: bool = True
+    # Reuse the most recently returned connection, so the spare ones go idle
+    # and can be closed by the server or PgBouncer
+    DB_POOL_USE_LIFO: bool = False
+    # Connect through PgBouncer in transaction mode: no prepared statements
+    DB_PGBOUNCER: bool = False
+
+    # Read replicas, as comma-separated SQLAlchemy URLs. Read-only routes
+    # send SELECTs to them round-robin and fall back to the primary.
+    DATABASE_REPLICA_URIS: Annotated[list[str] | str, BeforeValidator(parse_cors)] = []
+    # Replicas further behind the primary than this are not read from
+    DB_REPLICA_MAX_LAG_SECONDS: float = 5
+    DB_REPLICA_LAG_CHECK_SECONDS: float = 5
+
+    # Statement count and DB time of each request as response headers
+    DB_QUERY_HEADERS: bool = True
+    DB_SLOW_QUERY_SECONDS: float = 0.5
+    # Log a possible N+1 when a request runs one statement this many times
+    DB_QUERY_REPEAT_THRESHOLD: int = 10
+
+    # Monthly progress_event partitions older than this are dropped
+    PROGRESS_EVENT_RETENTION_MONTHS: int = 24
+    # Partitions created ahead of the current month
+    PROGRESS_EVENT_PARTITIONS_AHEAD: int = 3
+
+    # Users resolved from tokens are cached per process for this long.
+    # Changes made in another process show after at most the TTL; disable
+    # the cache where that is not acceptable.
+    USER_CACHE_ENABLED: bool = True
+    USER_CACHE_TTL_SECONDS: float = 60
+    USER_CACHE_MAX_SIZE: int = 10_000
+    # Finished user deletion jobs stay pollable for this long. Jobs live in
+    # process memory: a restart loses them, and stops deletions in progress
+    USER_DELETION_JOB_TTL_SECONDS: int = 24 * 60 * 60
+
+    # Threads hashing and verifying passwords for the API; bcrypt releases
+    # the GIL, so they run in parallel
+    PASSWORD_HASH_WORKERS: int = 4
+    # Hashes waiting for a thread, past that logins get a 503 at once
+    PASSWORD_HASH_MAX_QUEUE: int = 64
+    # Processes hashing passwords during bulk user imports
+    USER_IMPORT_WORKERS: int = 4
+
+    # Requests allowed per client IP, per user and per username attempted
+    # in a login form, by "METHOD path", as "ip:N/period,user:N/period" or
+    # "username:N/period" with period second, minute, hour or day.
+    # Schools share an IP between many students, keep IP limits generous.
+    # Counters are per process unless RATE_LIMIT_REDIS_URL is set.
+    RATE_LIMIT_ENABLED: bool = True
+    RATE_LIMIT_REDIS_URL: str | None = None
+    RATE_LIMIT_MAX_KEYS: int = 100_000
+    RATE_LIMITS: dict[str, str] = {
+        "POST /api/v1/login/access-token": "username:10/minute,ip:60/minute",
+        "POST /api/v1/login/refresh-token": "ip:120/minute",
+        "POST /api/v1/btec/evaluate/audio": "ip:30/minute,user:6/minute",
+        "POST /api/v1/btec/evaluate/text": "ip:300/minute,user:60/minute",
+    }
+
     SMTP_TLS: bool = True
     SMTP_SSL: bool = False
     SMTP_PORT: int = 587
@@ -94,6 +172,20 @@ class Settings(BaseSettings):
     FIRST_SUPERUSER: EmailStr
     FIRST_SUPERUSER_PASSWORD: str
 
+    WHISPER_MODEL: str = "base"
+    # Transcriptions run concurrently on this many threads, the rest queue up
+    AUDIO_WORKERS: int = 1
+
+    REPORT_WORKERS: int = 2
+    # Reports rendering or waiting for a worker at once, the rest queue up
+    REPORT_MAX_CONCURRENCY: int = 8
+    REPORT_JOB_TTL_SECONDS: int = 60 * 60
+    # Directory holding the Cairo/Inter font files embedded in PDF reports
+    REPORT_FONTS_DIR: str | None = None
+    REPORT_CACHE_DIR: str = "/tmp/btec-report-cache"
+    # Size cap of the rendered report cache, 0 disables caching
+    REPORT_CACHE_MAX_BYTES: int = 512 * 1024 * 1024
+
     def _check_default_secret(self, var_name: str, value: str | None) -> None:
         if value == "changethis":
             message = (
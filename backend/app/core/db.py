@@ -1,10 +1,29 @@
+from sqlalchemy.ext.asyncio import create_async_engine
 from sqlmodel import Session, create_engine, select
 
 from app import crud
 from app.core.config import settings
+from app.core.metrics import REGISTRY
+from app.core.pool import engine_options
+from app.core.query_stats import instrument_engine
+from app.core.replicas import ReplicaSet
 from app.models import User, UserCreate
 
-engine = create_engine(str(settings.SQLALCHEMY_DATABASE_URI))
+engine = create_engine(str(settings.SQLALCHEMY_DATABASE_URI), **engine_options("sync"))
+# Same database through psycopg's async driver, used by async routes. The
+# sync engine stays for scripts (initial_data.py, ingest) and sync routes.
+async_engine = create_async_engine(
+    str(settings.SQLALCHEMY_DATABASE_URI), **engine_options("async", is_async=True)
+)
+replicas = ReplicaSet.from_uris(settings.DATABASE_REPLICA_URIS)
+REGISTRY.gauge(
+    "btec_db_replica_lag_seconds",
+    "Replication lag of each read replica at its last check.",
+    ("replica",),
+    callback=replicas.lag,
+)
+for instrumented in (engine, async_engine.sync_engine, *replicas.engines()):
+    instrument_engine(instrumented)
 
 
 # make sure all SQLModel models are imported (app.models) before initializing DB
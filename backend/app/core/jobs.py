@@ -0,0 +1,115 @@
+"""In-memory registry for background jobs started from API requests.
+
+Jobs live in the process that created them, so clients polling for a job
+must reach the same worker (sticky sessions or a single worker per pod).
+"""
+
+import asyncio
+import logging
+import threading
+import time
+import uuid
+from collections import OrderedDict
+from collections.abc import Coroutine
+from dataclasses import dataclass, field
+from enum import Enum
+from typing import Any
+
+logger = logging.getLogger(__name__)
+
+
+class JobStatus(str, Enum):
+    PENDING = "pending"
+    RUNNING = "running"
+    COMPLETED = "completed"
+    FAILED = "failed"
+
+
+@dataclass
+class Job:
+    kind: str
+    id: uuid.UUID = field(default_factory=uuid.uuid4)
+    owner_id: uuid.UUID | None = None
+    status: JobStatus = JobStatus.PENDING
+    total: int = 0
+    completed: int = 0
+    failed: int = 0
+    result: Any = None
+    error: str | None = None
+    created_at: float = field(default_factory=time.time)
+    finished_at: float | None = None
+
+    @property
+    def done(self) -> bool:
+        return self.status in (JobStatus.COMPLETED, JobStatus.FAILED)
+
+    def start(self) -> None:
+        self.status = JobStatus.RUNNING
+
+    def succeed(self, result: Any = None) -> None:
+        self.result = result
+        self.status = JobStatus.COMPLETED
+        self.finished_at = time.time()
+
+    def fail(self, error: str) -> None:
+        self.error = error
+        self.status = JobStatus.FAILED
+        self.finished_at = time.time()
+
+
+class JobRegistry:
+    def __init__(self, *, ttl_seconds: float, max_jobs: int = 1000) -> None:
+        self.ttl_seconds = ttl_seconds
+        self.max_jobs = max_jobs
+        self._jobs: OrderedDict[uuid.UUID, Job] = OrderedDict()
+        self._tasks: set[asyncio.Task[None]] = set()
+        self._lock = threading.Lock()
+
+    def create(
+        self, kind: str, *, total: int = 0, owner_id: uuid.UUID | None = None
+    ) -> Job:
+        job = Job(kind=kind, total=total, owner_id=owner_id)
+        with self._lock:
+            self._prune()
+            self._jobs[job.id] = job
+        return job
+
+    def get(self, job_id: uuid.UUID) -> Job | None:
+        with self._lock:
+            return self._jobs.get(job_id)
+
+    def run(self, job: Job, coro: Coroutine[Any, Any, Any]) -> None:
+        """Run ``coro`` as a task on the current event loop and track it in ``job``."""
+
+        async def runner() -> None:
+            job.start()
+            try:
+                result = await coro
+            except Exception as e:
+                logger.exception("Job %s (%s) failed", job.id, job.kind)
+                job.fail(str(e) or e.__class__.__name__)
+            else:
+                job.succeed(result)
+
+        task = asyncio.get_running_loop().create_task(runner())
+        # Keep a reference so the task is not garbage collected mid-flight
+        self._tasks.add(task)
+        task.add_done_callback(self._tasks.discard)
+
+    def _prune(self) -> None:
+        cutoff = time.time() - self.ttl_seconds
+        expired = [
+            job_id
+            for job_id, job in self._jobs.items()
+            if job.finished_at is not None and job.finished_at < cutoff
+        ]
+        for job_id in expired:
+            del self._jobs[job_id]
+        # Drop the oldest finished jobs first when over capacity
+        while len(self._jobs) >= self.max_jobs:
+            oldest = next(
+                (job_id for job_id, job in self._jobs.items() if job.done), None
+            )
+            if oldest is None:
+                break
+            del self._jobs[oldest]
@@ -0,0 +1,147 @@
+"""Keys signing and verifying access tokens.
+
+By default tokens are HS256-signed with SECRET_KEY, so only the backend can
+verify them. With JWT_ALGORITHM set to RS256 or EdDSA they are signed with
+a private key from JWT_KEYS_DIR instead, and the public keys are served at
+/.well-known/jwks.json so the gateway can verify tokens at the edge
+without holding any secret.
+
+Every ``*.pem`` file in JWT_KEYS_DIR is a private key whose file name is
+its key ID. The last one in name order signs new tokens; all of them keep
+verifying and stay published. To rotate, add a key with a later name,
+restart, and delete the old file once the tokens it signed have expired:
+
+    python -m app.core.jwt_keys generate
+
+Verifiers refetch the key set when a token names a key ID they do not know.
+"""
+
+import argparse
+import functools
+import logging
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import Any
+
+import jwt
+from jwt.algorithms import get_default_algorithms
+from jwt.exceptions import InvalidTokenError
+
+from app.core.config import settings
+
+logger = logging.getLogger(__name__)
+
+SYMMETRIC_ALGORITHM = "HS256"
+
+
+def load_private_keys(directory: Path) -> dict[str, Any]:
+    """Private keys of ``directory`` by key ID, the file name without .pem."""
+    # Only needed for asymmetric signing, pyjwt[crypto] installs it
+    from cryptography.hazmat.primitives.serialization import load_pem_private_key
+
+    return {
+        path.stem: load_pem_private_key(path.read_bytes(), password=None)
+        for path in sorted(directory.glob("*.pem"))
+    }
+
+
+def generate_private_key(algorithm: str) -> bytes:
+    """A new private key for ``algorithm`` in PKCS#8 PEM."""
+    from cryptography.hazmat.primitives import serialization
+    from cryptography.hazmat.primitives.asymmetric import ed25519, rsa
+
+    key = (
+        ed25519.Ed25519PrivateKey.generate()
+        if algorithm == "EdDSA"
+        else rsa.generate_private_key(public_exponent=65537, key_size=3072)
+    )
+    return key.private_bytes(
+        encoding=serialization.Encoding.PEM,
+        format=serialization.PrivateFormat.PKCS8,
+        encryption_algorithm=serialization.NoEncryption(),
+    )
+
+
+class TokenKeys:
+    def __init__(self, *, algorithm: str, keys: dict[str, Any] | None = None) -> None:
+        self.algorithm = algorithm
+        self._keys = keys or {}
+        if algorithm != SYMMETRIC_ALGORITHM and not self._keys:
+            raise ValueError(f"{algorithm} signing needs a private key in JWT_KEYS_DIR")
+        # Key IDs sort in creation order, the newest signs
+        self.signing_key_id = max(self._keys) if self._keys else None
+
+    @classmethod
+    def from_settings(cls) -> "TokenKeys":
+        if settings.JWT_ALGORITHM == SYMMETRIC_ALGORITHM:
+            return cls(algorithm=SYMMETRIC_ALGORITHM)
+        return cls(
+            algorithm=settings.JWT_ALGORITHM,
+            keys=load_private_keys(Path(settings.JWT_KEYS_DIR)),
+        )
+
+    def encode(self, payload: dict[str, Any]) -> str:
+        if self.signing_key_id is None:
+            return jwt.encode(payload, settings.SECRET_KEY, algorithm=self.algorithm)
+        return jwt.encode(
+            payload,
+            self._keys[self.signing_key_id],
+            algorithm=self.algorithm,
+            headers={"kid": self.signing_key_id},
+        )
+
+    def decode(self, token: str) -> dict[str, Any]:
+        """Verified claims of ``token``, raising InvalidTokenError."""
+        if self.signing_key_id is None:
+            return jwt.decode(token, settings.SECRET_KEY, algorithms=[self.algorithm])
+        kid = jwt.get_unverified_header(token).get("kid")
+        if not isinstance(kid, str):
+            raise InvalidTokenError("No signing key ID")
+        key = self._keys.get(kid)
+        if key is None:
+            raise InvalidTokenError("Unknown signing key")
+        return jwt.decode(token, key.public_key(), algorithms=[self.algorithm])
+
+    def jwks(self) -> dict[str, list[dict[str, Any]]]:
+        """The public keys as a JSON Web Key Set, empty with HS256."""
+        to_jwk = get_default_algorithms()[self.algorithm].to_jwk
+        return {
+            "keys": [
+                {
+                    **to_jwk(key.public_key(), as_dict=True),
+                    "kid": key_id,
+                    "alg": self.algorithm,
+                    "use": "sig",
+                }
+                for key_id, key in sorted(self._keys.items())
+            ]
+        }
+
+
+@functools.cache
+def get_token_keys() -> TokenKeys:
+    # Loaded on first use, so the CLI below can create the first key
+    return TokenKeys.from_settings()
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Generate a token signing key.")
+    parser.add_argument("command", choices=["generate"])
+    parser.add_argument("--algorithm", choices=["RS256", "EdDSA"], default=None)
+    parser.add_argument("--dir", default=settings.JWT_KEYS_DIR)
+    args = parser.parse_args()
+
+    algorithm = args.algorithm or settings.JWT_ALGORITHM
+    if algorithm == SYMMETRIC_ALGORITHM:
+        parser.error("HS256 signs with SECRET_KEY, pass --algorithm RS256 or EdDSA")
+    directory = Path(args.dir)
+    directory.mkdir(parents=True, exist_ok=True)
+    path = directory / f"{datetime.now(timezone.utc):%Y%m%dT%H%M%SZ}.pem"
+    path.write_bytes(generate_private_key(algorithm))
+    path.chmod(0o600)
+    logger.info("Generated %s key %s", algorithm, path)
+
+
+if __name__ == "__main__":
+    logging.basicConfig(level=logging.INFO)
+    main()
@@ -0,0 +1,286 @@
+"""In-process metrics registry with Prometheus text exposition.
+
+Metrics are per process: when the API runs with several workers each one
+exposes its own series, and the scraper aggregates them.
+"""
+
+import math
+import threading
+from collections.abc import Callable, Iterator, Sequence
+
+DEFAULT_BUCKETS = (
+    0.005,
+    0.01,
+    0.025,
+    0.05,
+    0.1,
+    0.25,
+    0.5,
+    1.0,
+    2.5,
+    5.0,
+    10.0,
+    30.0,
+    60.0,
+)
+
+LabelValues = tuple[str, ...]
+
+
+def _format_value(value: float) -> str:
+    if math.isinf(value):
+        return "+Inf" if value > 0 else "-Inf"
+    if float(value).is_integer():
+        return str(int(value))
+    return repr(float(value))
+
+
+def _escape(value: str) -> str:
+    return value.replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+def _format_labels(names: Sequence[str], values: Sequence[str]) -> str:
+    if not names:
+        return ""
+    pairs = ",".join(
+        f'{name}="{_escape(str(value))}"'
+        for name, value in zip(names, values, strict=True)
+    )
+    return "{" + pairs + "}"
+
+
+class Metric:
+    type_name = "untyped"
+
+    def __init__(
+        self, name: str, documentation: str, labelnames: Sequence[str] = ()
+    ) -> None:
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self._lock = threading.Lock()
+
+    def _key(self, labels: dict[str, str]) -> LabelValues:
+        if set(labels) != set(self.labelnames):
+            raise ValueError(
+                f"{self.name} expects labels {self.labelnames}, got {tuple(labels)}"
+            )
+        return tuple(str(labels[name]) for name in self.labelnames)
+
+    def samples(self) -> Iterator[str]:
+        raise NotImplementedError
+
+    def render(self) -> str:
+        lines = [
+            f"# HELP {self.name} {self.documentation}",
+            f"# TYPE {self.name} {self.type_name}",
+        ]
+        lines.extend(self.samples())
+        return "\n".join(lines)
+
+
+class Counter(Metric):
+    type_name = "counter"
+
+    def __init__(
+        self, name: str, documentation: str, labelnames: Sequence[str] = ()
+    ) -> None:
+        super().__init__(name, documentation, labelnames)
+        self._values: dict[LabelValues, float] = {}
+
+    def inc(self, amount: float = 1.0, **labels: str) -> None:
+        if amount < 0:
+            raise ValueError("Counters can only be incremented")
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0.0) + amount
+
+    def value(self, **labels: str) -> float:
+        with self._lock:
+            return self._values.get(self._key(labels), 0.0)
+
+    def samples(self) -> Iterator[str]:
+        with self._lock:
+            items = list(self._values.items())
+        for key, value in items:
+            labels = _format_labels(self.labelnames, key)
+            yield f"{self.name}_total{labels} {_format_value(value)}"
+
+
+class Gauge(Metric):
+    """A value that goes up and down.
+
+    Pass ``callback`` to compute the value at scrape time instead of setting
+    it; the callback returns a mapping of label values to readings.
+    """
+
+    type_name = "gauge"
+
+    def __init__(
+        self,
+        name: str,
+        documentation: str,
+        labelnames: Sequence[str] = (),
+        callback: Callable[[], dict[LabelValues, float]] | None = None,
+    ) -> None:
+        super().__init__(name, documentation, labelnames)
+        self._values: dict[LabelValues, float] = {}
+        self._callback = callback
+
+    def set(self, value: float, **labels: str) -> None:
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = value
+
+    def inc(self, amount: float = 1.0, **labels: str) -> None:
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0.0) + amount
+
+    def dec(self, amount: float = 1.0, **labels: str) -> None:
+        self.inc(-amount, **labels)
+
+    def value(self, **labels: str) -> float:
+        key = self._key(labels)
+        if self._callback is not None:
+            return self._callback().get(key, 0.0)
+        with self._lock:
+            return self._values.get(key, 0.0)
+
+    def samples(self) -> Iterator[str]:
+        if self._callback is not None:
+            items = list(self._callback().items())
+        else:
+            with self._lock:
+                items = list(self._values.items())
+        for key, value in items:
+            labels = _format_labels(self.labelnames, key)
+            yield f"{self.name}{labels} {_format_value(value)}"
+
+
+class _HistogramSeries:
+    __slots__ = ("bucket_counts", "count", "sum")
+
+    def __init__(self, size: int) -> None:
+        self.bucket_counts = [0] * size
+        self.count = 0
+        self.sum = 0.0
+
+
+class Histogram(Metric):
+    type_name = "histogram"
+
+    def __init__(
+        self,
+        name: str,
+        documentation: str,
+        labelnames: Sequence[str] = (),
+        buckets: Sequence[float] = DEFAULT_BUCKETS,
+    ) -> None:
+        super().__init__(name, documentation, labelnames)
+        bounds = sorted(float(b) for b in buckets)
+        if not bounds or not math.isinf(bounds[-1]):
+            bounds.append(math.inf)
+        self.buckets = tuple(bounds)
+        self._series: dict[LabelValues, _HistogramSeries] = {}
+
+    def observe(self, value: float, **labels: str) -> None:
+        key = self._key(labels)
+        with self._lock:
+            series = self._series.get(key)
+            if series is None:
+                series = self._series[key] = _HistogramSeries(len(self.buckets))
+            for index, bound in enumerate(self.buckets):
+                if value <= bound:
+                    series.bucket_counts[index] += 1
+                    break
+            series.count += 1
+            series.sum += value
+
+    def snapshot(self, **labels: str) -> dict[str, float | int | dict[str, int]]:
+        """Return count, sum and cumulative bucket counts for one series."""
+        key = self._key(labels)
+        with self._lock:
+            series = self._series.get(key) or _HistogramSeries(len(self.buckets))
+            cumulative = 0
+            buckets: dict[str, int] = {}
+            for bound, count in zip(self.buckets, series.bucket_counts, strict=True):
+                cumulative += count
+                buckets[_format_value(bound)] = cumulative
+            return {"count": series.count, "sum": series.sum, "buckets": buckets}
+
+    def samples(self) -> Iterator[str]:
+        with self._lock:
+            items = [
+                (key, list(s.bucket_counts), s.count, s.sum)
+                for key, s in self._series.items()
+            ]
+        bucket_names = (*self.labelnames, "le")
+        for key, bucket_counts, count, total in items:
+            cumulative = 0
+            for bound, bucket_count in zip(self.buckets, bucket_counts, strict=True):
+                cumulative += bucket_count
+                labels = _format_labels(bucket_names, (*key, _format_value(bound)))
+                yield f"{self.name}_bucket{labels} {cumulative}"
+            labels = _format_labels(self.labelnames, key)
+            yield f"{self.name}_count{labels} {count}"
+            yield f"{self.name}_sum{labels} {_format_value(total)}"
+
+
+class MetricsRegistry:
+    def __init__(self) -> None:
+        self._metrics: dict[str, Metric] = {}
+        self._lock = threading.Lock()
+
+    def register(self, metric: Metric) -> Metric:
+        with self._lock:
+            existing = self._metrics.get(metric.name)
+            if existing is not None:
+                if type(existing) is not type(metric) or (
+                    existing.labelnames != metric.labelnames
+                ):
+                    raise ValueError(f"Metric {metric.name} is already registered")
+                return existing
+            self._metrics[metric.name] = metric
+            return metric
+
+    def counter(
+        self, name: str, documentation: str, labelnames: Sequence[str] = ()
+    ) -> Counter:
+        metric = self.register(Counter(name, documentation, labelnames))
+        assert isinstance(metric, Counter)
+        return metric
+
+    def gauge(
+        self,
+        name: str,
+        documentation: str,
+        labelnames: Sequence[str] = (),
+        callback: Callable[[], dict[LabelValues, float]] | None = None,
+    ) -> Gauge:
+        metric = self.register(Gauge(name, documentation, labelnames, callback))
+        assert isinstance(metric, Gauge)
+        return metric
+
+    def histogram(
+        self,
+        name: str,
+        documentation: str,
+        labelnames: Sequence[str] = (),
+        buckets: Sequence[float] = DEFAULT_BUCKETS,
+    ) -> Histogram:
+        metric = self.register(Histogram(name, documentation, labelnames, buckets))
+        assert isinstance(metric, Histogram)
+        return metric
+
+    def get(self, name: str) -> Metric | None:
+        with self._lock:
+            return self._metrics.get(name)
+
+    def render(self) -> str:
+        with self._lock:
+            metrics = list(self._metrics.values())
+        return "\n".join(metric.render() for metric in metrics) + "\n"
+
+
+REGISTRY = MetricsRegistry()
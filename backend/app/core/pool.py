@@ -0,0 +1,110 @@
+"""Connection pool settings and pool health metrics for the database engines.
+
+Both engines use a QueuePool subclass that times every checkout. A wait
+is a checkout that found every connection (including overflow) in use,
+and a timeout is one that gave up after DB_POOL_TIMEOUT seconds. When
+the API reports ``QueuePool limit`` errors, these series show whether
+the pool is too small or connections are held too long.
+"""
+
+import time
+from typing import Any
+
+from sqlalchemy import exc
+from sqlalchemy.pool import AsyncAdaptedQueuePool, QueuePool
+
+from app.core.config import settings
+from app.core.metrics import REGISTRY, LabelValues
+
+POOL_CHECKOUT_SECONDS = REGISTRY.histogram(
+    "btec_db_pool_checkout_seconds",
+    "Time spent checking out a pooled database connection.",
+    ("pool",),
+    buckets=(0.0005, 0.001, 0.005, 0.01, 0.05, 0.1, 0.5, 1.0, 5.0, 10.0, 30.0),
+)
+POOL_WAITS = REGISTRY.counter(
+    "btec_db_pool_waits",
+    "Checkouts that found every pooled connection in use.",
+    ("pool",),
+)
+POOL_TIMEOUTS = REGISTRY.counter(
+    "btec_db_pool_timeouts",
+    "Checkouts that timed out waiting for a pooled connection.",
+    ("pool",),
+)
+
+# Live pool of each engine, by pool name
+_pools: dict[str, QueuePool] = {}
+
+
+def _pool_connections() -> dict[LabelValues, float]:
+    values: dict[LabelValues, float] = {}
+    for name, pool in list(_pools.items()):
+        values[(name, "in_use")] = pool.checkedout()
+        values[(name, "idle")] = pool.checkedin()
+        # Negative while the pool has not yet opened pool_size connections
+        values[(name, "overflow")] = max(pool.overflow(), 0)
+    return values
+
+
+REGISTRY.gauge(
+    "btec_db_pool_connections",
+    "Pooled database connections by state.",
+    ("pool", "state"),
+    callback=_pool_connections,
+)
+
+
+class _InstrumentedPoolMixin:
+    def __init__(self, *args: Any, **kwargs: Any) -> None:
+        super().__init__(*args, **kwargs)
+        # engine.dispose() recreates the pool, the new one replaces the old
+        _pools[self.name] = self  # type: ignore[assignment]
+
+    @property
+    def name(self) -> str:
+        return self.logging_name or "default"  # type: ignore[attr-defined]
+
+    def _do_get(self) -> Any:
+        pool: QueuePool = self  # type: ignore[assignment]
+        max_overflow = pool._max_overflow
+        exhausted = (
+            max_overflow > -1 and pool.checkedout() >= pool.size() + max_overflow
+        )
+        if exhausted:
+            POOL_WAITS.inc(pool=self.name)
+        started = time.perf_counter()
+        try:
+            return super()._do_get()  # type: ignore[misc]
+        except exc.TimeoutError:
+            POOL_TIMEOUTS.inc(pool=self.name)
+            raise
+        finally:
+            POOL_CHECKOUT_SECONDS.observe(time.perf_counter() - started, pool=self.name)
+
+
+class InstrumentedQueuePool(_InstrumentedPoolMixin, QueuePool):
+    pass
+
+
+class InstrumentedAsyncQueuePool(_InstrumentedPoolMixin, AsyncAdaptedQueuePool):
+    pass
+
+
+def engine_options(name: str, *, is_async: bool = False) -> dict[str, Any]:
+    """Keyword arguments for create_engine()/create_async_engine() from Settings."""
+    options: dict[str, Any] = {
+        "poolclass": InstrumentedAsyncQueuePool if is_async else InstrumentedQueuePool,
+        "pool_logging_name": name,
+        "pool_size": settings.DB_POOL_SIZE,
+        "max_overflow": settings.DB_MAX_OVERFLOW,
+        "pool_timeout": settings.DB_POOL_TIMEOUT,
+        "pool_recycle": settings.DB_POOL_RECYCLE,
+        "pool_pre_ping": settings.DB_POOL_PRE_PING,
+        "pool_use_lifo": settings.DB_POOL_USE_LIFO,
+    }
+    if settings.DB_PGBOUNCER:
+        # PgBouncer in transaction mode hands each transaction to any server
+        # connection, so psycopg must not prepare statements server side
+        options["connect_args"] = {"prepare_threshold": None}
+    return options
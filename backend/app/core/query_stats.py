@@ -0,0 +1,195 @@
+"""Per-request SQL statement statistics.
+
+Engine event hooks time every statement and add it to the QueryStats of
+the current request, held in a context variable so that sync routes on
+the threadpool and async routes both report to the request that issued
+them. QueryStatsMiddleware publishes the totals as response headers and
+metrics, and logs statement shapes that repeat within a request, the
+usual sign of an N+1 query pattern.
+
+Statements are grouped by their SQL text, which has bound parameters as
+placeholders, so one query run in a loop shows up as a single shape.
+"""
+
+import logging
+import time
+from collections import Counter
+from collections.abc import Callable, Iterator
+from contextlib import contextmanager
+from contextvars import ContextVar
+from dataclasses import dataclass, field
+from typing import Any
+
+from sqlalchemy import Engine, event
+from starlette.datastructures import MutableHeaders
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+from app.core.config import settings
+from app.core.metrics import REGISTRY
+
+logger = logging.getLogger(__name__)
+
+# Statements kept per request as the slowest ones
+SLOWEST_KEPT = 5
+
+QUERY_SECONDS = REGISTRY.histogram(
+    "btec_db_query_seconds", "Duration of SQL statements.", ("engine",)
+)
+REQUEST_QUERIES = REGISTRY.histogram(
+    "btec_request_db_queries",
+    "SQL statements issued per request.",
+    ("route",),
+    buckets=(0, 1, 2, 3, 5, 10, 20, 50, 100, 250, 1000),
+)
+REQUEST_DB_SECONDS = REGISTRY.histogram(
+    "btec_request_db_seconds", "Time spent in SQL statements per request.", ("route",)
+)
+REPEATED_STATEMENTS = REGISTRY.counter(
+    "btec_request_repeated_statements",
+    "Requests that ran one statement shape at least DB_QUERY_REPEAT_THRESHOLD times.",
+    ("route",),
+)
+
+
+@dataclass
+class QueryStats:
+    count: int = 0
+    duration: float = 0.0
+    shapes: Counter[str] = field(default_factory=Counter)
+    # (duration, statement), slowest first
+    slowest: list[tuple[float, str]] = field(default_factory=list)
+
+    def record(self, statement: str, duration: float) -> None:
+        self.count += 1
+        self.duration += duration
+        self.shapes[statement] += 1
+        if len(self.slowest) < SLOWEST_KEPT or duration > self.slowest[-1][0]:
+            self.slowest.append((duration, statement))
+            self.slowest.sort(key=lambda entry: entry[0], reverse=True)
+            del self.slowest[SLOWEST_KEPT:]
+
+    def repeated(self, threshold: int) -> list[tuple[str, int]]:
+        """Statement shapes run at least ``threshold`` times, most frequent first."""
+        return [(s, n) for s, n in self.shapes.most_common() if n >= threshold]
+
+
+_current: ContextVar[QueryStats | None] = ContextVar("query_stats", default=None)
+
+RequestObserver = Callable[[str, QueryStats], None]
+_observers: list[RequestObserver] = []
+
+
+@contextmanager
+def track_queries() -> Iterator[QueryStats]:
+    """Collect the statements run in this context (and threads it starts)."""
+    stats = QueryStats()
+    token = _current.set(stats)
+    try:
+        yield stats
+    finally:
+        _current.reset(token)
+
+
+@contextmanager
+def observe_requests() -> Iterator[list[tuple[str, QueryStats]]]:
+    """Collect (route, stats) of every request finished inside the block."""
+    finished: list[tuple[str, QueryStats]] = []
+
+    def observer(route: str, stats: QueryStats) -> None:
+        finished.append((route, stats))
+
+    _observers.append(observer)
+    try:
+        yield finished
+    finally:
+        _observers.remove(observer)
+
+
+def _before_cursor_execute(
+    conn: Any,
+    _cursor: Any,
+    _statement: str,
+    _parameters: Any,
+    _context: Any,
+    _executemany: bool,
+) -> None:
+    conn.info.setdefault("query_started_at", []).append(time.perf_counter())
+
+
+def _after_cursor_execute(
+    conn: Any,
+    _cursor: Any,
+    statement: str,
+    _parameters: Any,
+    _context: Any,
+    _executemany: bool,
+) -> None:
+    duration = time.perf_counter() - conn.info["query_started_at"].pop()
+    QUERY_SECONDS.observe(duration, engine=conn.engine.pool.logging_name or "default")
+    if duration >= settings.DB_SLOW_QUERY_SECONDS:
+        logger.warning("Slow query (%.3fs): %s", duration, statement)
+    stats = _current.get()
+    if stats is not None:
+        stats.record(" ".join(statement.split()), duration)
+
+
+def _handle_error(exception_context: Any) -> None:
+    # The statement failed, so after_cursor_execute will not pop its start time
+    connection = exception_context.connection
+    if connection is not None and connection.info.get("query_started_at"):
+        connection.info["query_started_at"].pop()
+
+
+def instrument_engine(engine: Engine) -> None:
+    """Record statements of ``engine`` (for async engines, pass .sync_engine)."""
+    if event.contains(engine, "before_cursor_execute", _before_cursor_execute):
+        return
+    event.listen(engine, "before_cursor_execute", _before_cursor_execute)
+    event.listen(engine, "after_cursor_execute", _after_cursor_execute)
+    event.listen(engine, "handle_error", _handle_error)
+
+
+class QueryStatsMiddleware:
+    """Report the SQL statements of each HTTP request."""
+
+    def __init__(self, app: ASGIApp, *, headers: bool = True) -> None:
+        self.app = app
+        self.headers = headers
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        async def send_with_stats(message: Message) -> None:
+            # Handlers have returned by the time the response starts. Statements
+            # run while a streaming body is sent only show up in the metrics.
+            if message["type"] == "http.response.start" and self.headers:
+                headers = MutableHeaders(scope=message)
+                headers["X-DB-Query-Count"] = str(stats.count)
+                headers.append("Server-Timing", f"db;dur={stats.duration * 1000:.1f}")
+            await send(message)
+
+        with track_queries() as stats:
+            try:
+                await self.app(scope, receive, send_with_stats)
+            finally:
+                self._report(scope, stats)
+
+    def _report(self, scope: Scope, stats: QueryStats) -> None:
+        route = getattr(scope.get("route"), "path", None) or "unmatched"
+        REQUEST_QUERIES.observe(stats.count, route=route)
+        REQUEST_DB_SECONDS.observe(stats.duration, route=route)
+        repeated = stats.repeated(settings.DB_QUERY_REPEAT_THRESHOLD)
+        if repeated:
+            REPEATED_STATEMENTS.inc(route=route)
+            statement, times = repeated[0]
+            logger.warning(
+                "Possible N+1 in %s %s: statement ran %d times: %s",
+                scope["method"],
+                route,
+                times,
+                statement,
+            )
+        for observer in list(_observers):
+            observer(route, stats)
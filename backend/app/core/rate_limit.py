@@ -0,0 +1,328 @@
+"""Rate limits on expensive and abuse-prone routes.
+
+RateLimitMiddleware looks the method and path of each request up in
+RATE_LIMITS, before routing, and checks the limits configured for that
+route: per client IP, per user for requests carrying a valid token, and
+per attempted username for login forms. Requests to other routes cost one
+dictionary lookup.
+
+Limits are sliding-window counters: one counter per fixed window, with the
+previous window's count weighted by how much of it the sliding window
+still covers. That keeps two integers per client and limit instead of a
+timestamp per request, and avoids the double burst a fixed window allows
+across its boundary. Rejected requests count too, so a client that keeps
+hammering a route stays limited until it slows down. Per-user and
+per-username limits are checked before per-IP ones, and a request they
+reject is not counted against the IP: one user hammering a route, or one
+account being guessed at, does not use up the budget of everyone behind
+the same address.
+
+Username limits read the ``username`` field of the request's form, so the
+middleware buffers the body of those routes, up to USERNAME_BODY_LIMIT,
+and replays it to the app. Usernames are counted case-insensitively, by
+digest, so counter keys have a fixed size and hold no email addresses.
+
+Counters live in process memory, each worker limiting on its own, unless
+RATE_LIMIT_REDIS_URL points them at a shared Redis (``pip install redis``),
+one round trip per limit checked. When Redis cannot be reached requests
+are let through rather than failed.
+
+Client IPs are those of the connection: behind a reverse proxy, run
+uvicorn with --proxy-headers so that they are the real clients'.
+"""
+
+import functools
+import hashlib
+import itertools
+import logging
+import math
+import time
+from collections import OrderedDict
+from collections.abc import Callable
+from dataclasses import dataclass
+from typing import Any, Literal
+
+from jwt.exceptions import InvalidTokenError
+from starlette.exceptions import HTTPException
+from starlette.formparsers import MultiPartException
+from starlette.requests import Request
+from starlette.responses import JSONResponse
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+from app.core.config import settings
+from app.core.jwt_keys import get_token_keys
+from app.core.metrics import REGISTRY
+
+logger = logging.getLogger(__name__)
+
+PERIODS = {"second": 1, "minute": 60, "hour": 3600, "day": 86400}
+
+# Verified token subjects kept, so that a client reusing its token skips
+# the signature check that would cost most of the per-user limit
+TOKEN_SUBJECTS_KEPT = 10_000
+
+# Login forms are a few hundred bytes; larger bodies are not parsed for a
+# username, and only their other limits apply
+USERNAME_BODY_LIMIT = 64 * 1024
+
+RATE_LIMITED = REGISTRY.counter(
+    "btec_rate_limited_requests",
+    "Requests rejected by a rate limit.",
+    ("route", "scope"),
+)
+
+Clock = Callable[[], float]
+
+
+@dataclass(frozen=True)
+class Limit:
+    scope: Literal["ip", "user", "username"]
+    requests: int
+    window: int
+
+
+def parse_limits(spec: str) -> list[Limit]:
+    """Limits of a spec like ``"ip:30/minute, user:6/minute"``."""
+    limits = []
+    for part in spec.split(","):
+        scope, _, rate = part.strip().partition(":")
+        requests, _, period = rate.partition("/")
+        if (
+            scope not in ("ip", "user", "username")
+            or period not in PERIODS
+            or not requests.isdigit()
+        ):
+            raise ValueError(f"Invalid rate limit {part.strip()!r}")
+        limits.append(Limit(scope, int(requests), PERIODS[period]))  # type: ignore[arg-type]
+    return limits
+
+
+def _wait(limit: Limit, previous: int, current: int, elapsed: float) -> float | None:
+    """
+    Seconds until another request fits, None if the one just counted does.
+
+    Args:
+        limit: Limit checked
+        previous: Requests in the previous window
+        current: Requests in the current window, this one included
+        elapsed: Seconds since the current window started
+    """
+    window = limit.window
+    if previous * (window - elapsed) / window + current <= limit.requests:
+        return None
+    if current >= limit.requests:
+        return window - elapsed
+    # The previous window's weight has to drop enough for one more request
+    return window * (1 - (limit.requests - current - 1) / previous) - elapsed
+
+
+class MemoryRateLimitBackend:
+    """Counters of this process, at most ``max_keys`` clients and limits."""
+
+    def __init__(self, *, max_keys: int, clock: Clock = time.time) -> None:
+        self.max_keys = max_keys
+        self._clock = clock
+        # key -> [window index, previous count, current count, window]
+        self._counters: dict[str, list[int]] = {}
+
+    async def hit(self, key: str, limit: Limit) -> float | None:
+        now = self._clock()
+        index, elapsed = divmod(now, limit.window)
+        counter = self._counters.get(key)
+        if counter is None:
+            if len(self._counters) >= self.max_keys:
+                self._evict(now)
+            counter = self._counters[key] = [int(index), 0, 0, limit.window]
+        elif counter[0] != index:
+            previous = counter[2] if counter[0] == index - 1 else 0
+            counter[:3] = [int(index), previous, 0]
+        counter[2] += 1
+        return _wait(limit, counter[1], counter[2], elapsed)
+
+    def _evict(self, now: float) -> None:
+        # Counters two windows old are empty; then the oldest go, down to
+        # 90% of max_keys
+        for key in [k for k, c in self._counters.items() if c[0] < now // c[3] - 1]:
+            del self._counters[key]
+        excess = len(self._counters) - self.max_keys * 9 // 10
+        for key in list(itertools.islice(self._counters, max(excess, 0))):
+            del self._counters[key]
+
+    def clear(self) -> None:
+        self._counters.clear()
+
+
+class RedisRateLimitBackend:
+    """Counters shared by every process through Redis."""
+
+    def __init__(self, url: str, *, clock: Clock = time.time) -> None:
+        # Optional dependency, only needed with RATE_LIMIT_REDIS_URL
+        import redis.asyncio
+
+        self._redis = redis.asyncio.from_url(url)
+        self._errors: tuple[type[Exception], ...] = (redis.RedisError, OSError)
+        self._clock = clock
+        self._failing = False
+
+    async def hit(self, key: str, limit: Limit) -> float | None:
+        index, elapsed = divmod(self._clock(), limit.window)
+        current_key = f"ratelimit:{key}:{int(index)}"
+        try:
+            async with self._redis.pipeline(transaction=False) as pipe:
+                pipe.incr(current_key)
+                pipe.expire(current_key, 2 * limit.window)
+                pipe.get(f"ratelimit:{key}:{int(index) - 1}")
+                current, _, previous = await pipe.execute()
+        except self._errors as e:
+            if not self._failing:
+                logger.warning("Rate limits not enforced, Redis unavailable: %s", e)
+            self._failing = True
+            return None
+        self._failing = False
+        return _wait(limit, int(previous or 0), current, elapsed)
+
+    def clear(self) -> None:
+        pass
+
+
+RateLimitBackend = MemoryRateLimitBackend | RedisRateLimitBackend
+
+
+@functools.cache
+def get_rate_limit_backend() -> RateLimitBackend:
+    if settings.RATE_LIMIT_REDIS_URL:
+        return RedisRateLimitBackend(settings.RATE_LIMIT_REDIS_URL)
+    return MemoryRateLimitBackend(max_keys=settings.RATE_LIMIT_MAX_KEYS)
+
+
+class RateLimitMiddleware:
+    """Reject requests over the limits of their route with a 429."""
+
+    def __init__(
+        self, app: ASGIApp, *, routes: dict[str, str], backend: RateLimitBackend
+    ) -> None:
+        self.app = app
+        self.backend = backend
+        # ("POST", "/api/v1/login/access-token") -> limits
+        self.routes: dict[tuple[str, str], list[Limit]] = {}
+        for route, spec in routes.items():
+            method, _, path = route.partition(" ")
+            # User and username limits first, the IP only counting requests
+            # they let through
+            self.routes[(method.upper(), path)] = sorted(
+                parse_limits(spec), key=lambda limit: limit.scope == "ip"
+            )
+        # token -> (subject, expiry)
+        self._subjects: OrderedDict[str, tuple[str, float]] = OrderedDict()
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] == "http":
+            limits = self.routes.get((scope["method"], scope["path"]))
+            if limits:
+                username = None
+                if any(limit.scope == "username" for limit in limits):
+                    body, receive = await _buffer_body(receive)
+                    if body is not None:
+                        username = await _form_username(scope, body)
+                wait = await self._check(scope, limits, username)
+                if wait is not None:
+                    response = JSONResponse(
+                        status_code=429,
+                        content={"detail": "Too many requests, try again later"},
+                        headers={"Retry-After": str(max(1, math.ceil(wait)))},
+                    )
+                    await response(scope, receive, send)
+                    return
+        await self.app(scope, receive, send)
+
+    def _user_id(self, scope: Scope) -> str | None:
+        """Subject of the request's bearer token, None without a valid one."""
+        for name, value in scope["headers"]:
+            if name == b"authorization":
+                scheme, _, token = value.decode("latin-1").partition(" ")
+                if scheme.lower() != "bearer":
+                    return None
+                return self._subject(token)
+        return None
+
+    def _subject(self, token: str) -> str | None:
+        cached = self._subjects.get(token)
+        if cached is not None and cached[1] > time.time():
+            self._subjects.move_to_end(token)
+            return cached[0]
+        try:
+            claims = get_token_keys().decode(token)
+            subject = str(claims["sub"])
+        except (InvalidTokenError, KeyError):
+            return None
+        self._subjects[token] = (subject, claims.get("exp", 0))
+        if len(self._subjects) > TOKEN_SUBJECTS_KEPT:
+            self._subjects.popitem(last=False)
+        return subject
+
+    async def _check(
+        self, scope: Scope, limits: list[Limit], username: str | None
+    ) -> float | None:
+        route = f"{scope['method']} {scope['path']}"
+        identities: dict[str, Any] = {
+            "ip": scope["client"][0] if scope.get("client") else None,
+            "username": username,
+        }
+        if any(limit.scope == "user" for limit in limits):
+            identities["user"] = self._user_id(scope)
+        for limit in limits:
+            identity = identities[limit.scope]
+            if identity is None:
+                continue
+            key = f"{route}|{limit.scope}:{identity}|{limit.window}"
+            wait = await self.backend.hit(key, limit)
+            if wait is not None:
+                RATE_LIMITED.inc(route=route, scope=limit.scope)
+                return wait
+        return None
+
+
+async def _buffer_body(receive: Receive) -> tuple[bytes | None, Receive]:
+    """
+    The request body, and a receive callable replaying it to the app.
+
+    Reading stops past USERNAME_BODY_LIMIT or at a disconnect, and the body
+    is then None; the app still gets every message, read here or not.
+    """
+    messages: list[Message] = []
+    size = 0
+    body = None
+    while size <= USERNAME_BODY_LIMIT:
+        message = await receive()
+        messages.append(message)
+        if message["type"] != "http.request":
+            break
+        size += len(message.get("body", b""))
+        if not message.get("more_body", False):
+            if size <= USERNAME_BODY_LIMIT:
+                body = b"".join(m.get("body", b"") for m in messages)
+            break
+
+    async def replay() -> Message:
+        return messages.pop(0) if messages else await receive()
+
+    return body, replay
+
+
+async def _form_username(scope: Scope, body: bytes) -> str | None:
+    """Digest of the form's ``username`` field, None without one."""
+
+    async def receive() -> Message:
+        return {"type": "http.request", "body": body, "more_body": False}
+
+    try:
+        form = await Request(scope, receive).form()
+    except (HTTPException, MultiPartException):
+        return None
+    username = form.get("username")
+    await form.close()
+    if not isinstance(username, str) or not username.strip():
+        return None
+    return hashlib.blake2b(
+        username.strip().lower().encode(), digest_size=16
+    ).hexdigest()
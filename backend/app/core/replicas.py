@@ -0,0 +1,171 @@
+"""Route reads to PostgreSQL read replicas.
+
+RoutingSession sends plain SELECTs to a replica, chosen round-robin, and
+everything else to the primary: writes, SELECT ... FOR UPDATE, raw SQL
+and anything after the session first writes, so a request always reads
+its own writes. Replicas are checked for replication lag at most every
+DB_REPLICA_LAG_CHECK_SECONDS. A replica that lags by more than
+DB_REPLICA_MAX_LAG_SECONDS, or cannot be reached, is skipped until its
+next check. When no replica is usable, reads go to the primary.
+"""
+
+import itertools
+import logging
+import threading
+import time
+from collections.abc import Callable, Sequence
+from dataclasses import dataclass, field
+from typing import Any
+
+from sqlalchemy import Engine, exc, text
+from sqlalchemy.ext.asyncio import AsyncEngine, create_async_engine
+from sqlmodel import Session, create_engine
+
+from app.core.config import settings
+from app.core.metrics import REGISTRY, LabelValues
+from app.core.pool import engine_options
+
+logger = logging.getLogger(__name__)
+
+DB_READS = REGISTRY.counter(
+    "btec_db_reads", "SELECT statements by the database they ran on.", ("target",)
+)
+
+# Zero when the replica has replayed everything it received, otherwise the
+# age of the last replayed transaction
+LAG_QUERY = text(
+    """
+    SELECT CASE
+        WHEN pg_last_wal_receive_lsn() = pg_last_wal_replay_lsn() THEN 0
+        ELSE EXTRACT(EPOCH FROM now() - pg_last_xact_replay_timestamp())
+    END
+    """
+)
+
+
+def measure_lag(engine: Engine) -> float:
+    with engine.connect() as connection:
+        return float(connection.execute(LAG_QUERY).scalar() or 0)
+
+
+@dataclass
+class Replica:
+    name: str
+    engine: Engine
+    async_engine: AsyncEngine | None = None
+    # Seconds behind the primary, None while unreachable
+    lag: float | None = None
+    checked_at: float = field(default=float("-inf"))
+
+
+class ReplicaSet:
+    def __init__(
+        self,
+        replicas: Sequence[Replica],
+        *,
+        max_lag: float,
+        check_interval: float,
+        measure_lag: Callable[[Engine], float] = measure_lag,
+    ) -> None:
+        self.replicas = list(replicas)
+        self.max_lag = max_lag
+        self.check_interval = check_interval
+        self._measure_lag = measure_lag
+        self._next = itertools.count()
+        self._lock = threading.Lock()
+
+    @classmethod
+    def from_uris(cls, uris: Sequence[str]) -> "ReplicaSet":
+        replicas = [
+            Replica(
+                name=f"replica-{i}",
+                engine=create_engine(uri, **engine_options(f"replica-{i}")),
+                async_engine=create_async_engine(
+                    uri, **engine_options(f"replica-{i}-async", is_async=True)
+                ),
+            )
+            for i, uri in enumerate(uris)
+        ]
+        return cls(
+            replicas,
+            max_lag=settings.DB_REPLICA_MAX_LAG_SECONDS,
+            check_interval=settings.DB_REPLICA_LAG_CHECK_SECONDS,
+        )
+
+    def engines(self) -> list[Engine]:
+        """Sync engines of every replica, with the sync facade of async ones."""
+        engines = [r.engine for r in self.replicas]
+        engines += [r.async_engine.sync_engine for r in self.replicas if r.async_engine]
+        return engines
+
+    def lag(self) -> dict[LabelValues, float]:
+        return {(r.name,): r.lag for r in self.replicas if r.lag is not None}
+
+    def _usable(self, replica: Replica, engine: Engine) -> bool:
+        now = time.monotonic()
+        if now - replica.checked_at >= self.check_interval:
+            replica.checked_at = now
+            try:
+                replica.lag = self._measure_lag(engine)
+            except exc.DBAPIError:
+                logger.warning("Replica %s is unreachable", replica.name, exc_info=True)
+                replica.lag = None
+        return replica.lag is not None and replica.lag <= self.max_lag
+
+    def choose(self, *, is_async: bool = False) -> Engine | None:
+        """Return the sync engine of the next usable replica, or None."""
+        for _ in range(len(self.replicas)):
+            with self._lock:
+                replica = self.replicas[next(self._next) % len(self.replicas)]
+            if is_async:
+                if replica.async_engine is None:
+                    continue
+                # Async sessions bind to the sync facade of their async engine
+                engine = replica.async_engine.sync_engine
+            else:
+                engine = replica.engine
+            if self._usable(replica, engine):
+                return engine
+        return None
+
+
+def _is_plain_select(clause: Any) -> bool:
+    if clause is None or not getattr(clause, "is_select", False):
+        return False
+    # select().from_statement(insert ... returning), as used by upserts
+    if getattr(getattr(clause, "element", None), "is_dml", False):
+        return False
+    return getattr(clause, "_for_update_arg", None) is None
+
+
+class RoutingSession(Session):
+    """Session that reads from replicas until it first writes."""
+
+    def __init__(
+        self,
+        *,
+        primary: Engine,
+        replicas: ReplicaSet | None,
+        is_async: bool = False,
+        **kw: Any,
+    ) -> None:
+        # AsyncSession passes its own (unset) bind through, the primary wins
+        kw.pop("bind", None)
+        super().__init__(bind=primary, **kw)
+        self.primary = primary
+        self.replicas = replicas
+        self.is_async = is_async
+        self.wrote = False
+
+    def get_bind(self, mapper: Any = None, *, clause: Any = None, **kw: Any) -> Engine:
+        is_select = _is_plain_select(clause)
+        if self._flushing or (clause is not None and not is_select):
+            self.wrote = True
+        if is_select:
+            if self.replicas and not self.wrote:
+                replica = self.replicas.choose(is_async=self.is_async)
+                if replica is not None:
+                    DB_READS.inc(target="replica")
+                    return replica
+            DB_READS.inc(target="primary")
+        return self.primary
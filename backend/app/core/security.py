@@ -1,22 +1,45 @@
+import asyncio
+import threading
+from collections.abc import Callable
+from concurrent.futures import Future, ThreadPoolExecutor
 from datetime import datetime, timedelta, timezone
-from typing import Any
+from typing import Any, TypeVar
 
-import jwt
 from passlib.context import CryptContext
 
 from app.core.config import settings
+from app.core.jwt_keys import get_token_keys
+from app.core.metrics import REGISTRY
 
 pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
 
+T = TypeVar("T")
 
+# Password reset tokens; access tokens use app.core.jwt_keys
 ALGORITHM = "HS256"
 
+HASHES_IN_FLIGHT = REGISTRY.gauge(
+    "btec_password_hashes_in_flight", "Password hashes queued or running."
+)
+HASHES_REJECTED = REGISTRY.counter(
+    "btec_password_hashes_rejected", "Password hashes refused with a full queue."
+)
 
-def create_access_token(subject: str | Any, expires_delta: timedelta) -> str:
+
+def create_access_token(
+    subject: str | Any, expires_delta: timedelta, claims: dict[str, Any] | None = None
+) -> str:
     expire = datetime.now(timezone.utc) + expires_delta
-    to_encode = {"exp": expire, "sub": str(subject)}
-    encoded_jwt = jwt.encode(to_encode, settings.SECRET_KEY, algorithm=ALGORITHM)
-    return encoded_jwt
+    to_encode = {**(claims or {}), "exp": expire, "sub": str(subject)}
+    return get_token_keys().encode(to_encode)
+
+
+def create_refresh_token(
+    subject: str | Any, token_version: int, expires_delta: timedelta
+) -> str:
+    return create_access_token(
+        subject, expires_delta, {"type": "refresh", "ver": token_version}
+    )
 
 
 def verify_password(plain_password: str, hashed_password: str) -> bool:
@@ -25,3 +48,86 @@ def verify_password(plain_password: str, hashed_password: str) -> bool:
 
 def get_password_hash(password: str) -> str:
     return pwd_context.hash(password)
+
+
+class PasswordHasherBusy(Exception):
+    """Every hashing thread is busy and the queue is full."""
+
+
+class PasswordHasher:
+    """
+    Hash and verify passwords on a dedicated, bounded thread pool.
+
+    A bcrypt hash is about 250 ms of CPU. Run on the event loop it stalls
+    every request, run on Starlette's threadpool a burst of logins takes
+    all of its threads. Here at most ``max_workers`` hashes run and
+    ``max_queue`` more wait; past that callers get PasswordHasherBusy at
+    once instead of queueing behind seconds of work. Sync callers, such as
+    app.crud, share the same threads and limit through ``hash_sync`` and
+    ``verify_sync``.
+    """
+
+    def __init__(self, *, max_workers: int, max_queue: int) -> None:
+        self.max_workers = max_workers
+        self.capacity = max_workers + max_queue
+        self._executor: ThreadPoolExecutor | None = None
+        self._in_flight = 0
+        self._lock = threading.Lock()
+
+    @property
+    def executor(self) -> ThreadPoolExecutor:
+        # Created lazily so importing the API does not start threads
+        if self._executor is None:
+            self._executor = ThreadPoolExecutor(
+                max_workers=self.max_workers, thread_name_prefix="bcrypt"
+            )
+        return self._executor
+
+    @property
+    def in_flight(self) -> int:
+        return self._in_flight
+
+    def _release(self, _: Future[Any]) -> None:
+        with self._lock:
+            self._in_flight -= 1
+        HASHES_IN_FLIGHT.dec()
+
+    def _submit(self, fn: Callable[..., T], *args: Any) -> Future[T]:
+        with self._lock:
+            if self._in_flight >= self.capacity:
+                HASHES_REJECTED.inc()
+                raise PasswordHasherBusy()
+            self._in_flight += 1
+        HASHES_IN_FLIGHT.inc()
+        future = self.executor.submit(fn, *args)
+        # Released when the hash ends, even if the caller stops waiting first
+        future.add_done_callback(self._release)
+        return future
+
+    async def _run(self, fn: Callable[..., T], *args: Any) -> T:
+        return await asyncio.wrap_future(self._submit(fn, *args))
+
+    async def hash(self, password: str) -> str:
+        return await self._run(get_password_hash, password)
+
+    async def verify(self, plain_password: str, hashed_password: str) -> bool:
+        return await self._run(verify_password, plain_password, hashed_password)
+
+    # For sync code, which waits for a hashing thread in its own thread
+
+    def hash_sync(self, password: str) -> str:
+        return self._submit(get_password_hash, password).result()
+
+    def verify_sync(self, plain_password: str, hashed_password: str) -> bool:
+        return self._submit(verify_password, plain_password, hashed_password).result()
+
+    def shutdown(self) -> None:
+        if self._executor is not None:
+            self._executor.shutdown(wait=False, cancel_futures=True)
+            self._executor = None
+
+
+password_hasher = PasswordHasher(
+    max_workers=settings.PASSWORD_HASH_WORKERS,
+    max_queue=settings.PASSWORD_HASH_MAX_QUEUE,
+)
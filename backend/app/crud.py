@@ -1,9 +1,14 @@
 import uuid
-from typing import Any
+from collections.abc import Iterator
+from contextlib import contextmanager
+from typing import Any, TypeVar
 
+from sqlalchemy import union_all
+from sqlalchemy.dialects import postgresql, sqlite
+from sqlalchemy.orm import selectinload
 from sqlmodel import Session, select
 
-from app.core.security import get_password_hash, verify_password
+from app.core.security import password_hasher
 from app.models import (
     Item,
     ItemCreate,
@@ -14,16 +19,67 @@ from app.models import (
     UserCreate,
     UserUpdate,
 )
+from app.modules import module_catalog
+from app.user_cache import revoke_tokens, user_cache
+
+T = TypeVar("T")
+
+# session.info key set while the session is in a unit of work
+UNIT_OF_WORK = "unit_of_work"
+
+
+@contextmanager
+def unit_of_work(session: Session) -> Iterator[Session]:
+    """Run crud functions as one transaction, committed when the block exits.
+
+    Inside the block, crud functions flush their changes instead of
+    committing and refreshing: statements still run in order and generated
+    keys come back with INSERT ... RETURNING, but the block pays for a
+    single commit and no refresh SELECTs. An exception rolls it all back.
+    Nested blocks join the outer one.
+    """
+    if in_unit_of_work(session):
+        yield session
+        return
+    session.info[UNIT_OF_WORK] = True
+    try:
+        yield session
+        session.commit()
+    except BaseException:
+        session.rollback()
+        raise
+    finally:
+        del session.info[UNIT_OF_WORK]
+
+
+def in_unit_of_work(session: Session) -> bool:
+    return bool(session.info.get(UNIT_OF_WORK))
+
+
+def _save(session: Session, obj: T) -> T:
+    session.add(obj)
+    if in_unit_of_work(session):
+        session.flush()
+    else:
+        session.commit()
+        session.refresh(obj)
+    return obj
 
 
 def create_user(*, session: Session, user_create: UserCreate) -> User:
     db_obj = User.model_validate(
-        user_create, update={"hashed_password": get_password_hash(user_create.password)}
+        user_create,
+        update={"hashed_password": password_hasher.hash_sync(user_create.password)},
+    )
+    return _save(session, db_obj)
+
+
+def revokes_tokens(db_user: User, user_data: dict[str, Any]) -> bool:
+    """Whether an update invalidates the tokens issued to the user so far."""
+    return "password" in user_data or any(
+        key in user_data and user_data[key] != getattr(db_user, key)
+        for key in ("is_active", "is_superuser")
     )
-    session.add(db_obj)
-    session.commit()
-    session.refresh(db_obj)
-    return db_obj
 
 
 def update_user(*, session: Session, db_user: User, user_in: UserUpdate) -> Any:
@@ -31,13 +87,13 @@ def update_user(*, session: Session, db_user: User, user_in: UserUpdate) -> Any:
     extra_data = {}
     if "password" in user_data:
         password = user_data["password"]
-        hashed_password = get_password_hash(password)
+        hashed_password = password_hasher.hash_sync(password)
         extra_data["hashed_password"] = hashed_password
+    if revokes_tokens(db_user, user_data):
+        revoke_tokens(session, db_user)
     db_user.sqlmodel_update(user_data, update=extra_data)
-    session.add(db_user)
-    session.commit()
-    session.refresh(db_user)
-    return db_user
+    user_cache.invalidate_on_commit(session, db_user.id)
+    return _save(session, db_user)
 
 
 def get_user_by_email(*, session: Session, email: str) -> User | None:
@@ -50,17 +106,14 @@ def authenticate(*, session: Session, email: str, password: str) -> User | None:
     db_user = get_user_by_email(session=session, email=email)
     if not db_user:
         return None
-    if not verify_password(password, db_user.hashed_password):
+    if not password_hasher.verify_sync(password, db_user.hashed_password):
         return None
     return db_user
 
 
 def create_item(*, session: Session, item_in: ItemCreate, owner_id: uuid.UUID) -> Item:
     db_item = Item.model_validate(item_in, update={"owner_id": owner_id})
-    session.add(db_item)
-    session.commit()
-    session.refresh(db_item)
-    return db_item
+    return _save(session, db_item)
 
 
 # StudentProgress CRUD operations
@@ -78,55 +131,112 @@ def get_student_progress_by_module(
     *, session: Session, user_id: uuid.UUID, module_name: str
 ) -> StudentProgress | None:
     """Get student progress for a specific module."""
+    module_id = module_catalog.get_id(session=session, name=module_name)
+    if module_id is None:
+        return None
     statement = select(StudentProgress).where(
-        StudentProgress.user_id == user_id, StudentProgress.module_name == module_name
+        StudentProgress.user_id == user_id, StudentProgress.module_id == module_id
     )
     return session.exec(statement).first()
 
 
+def student_progress_upsert(
+    dialect_name: str,
+    *,
+    user_id: uuid.UUID,
+    module_id: int,
+    progress_in: StudentProgressCreate,
+) -> Any:
+    """Build the INSERT ... ON CONFLICT DO UPDATE ... RETURNING for a progress row.
+
+    Only the fields set on progress_in overwrite an existing row, like an
+    update through set_student_progress_fields.
+    """
+    dialect_insert = sqlite.insert if dialect_name == "sqlite" else postgresql.insert
+    values = StudentProgress.model_validate(
+        progress_in, update={"user_id": user_id, "module_id": module_id}
+    ).model_dump()
+    update_fields = progress_in.model_dump(exclude_unset=True).keys() - {"module_name"}
+    insert = dialect_insert(StudentProgress).values(**values)
+    statement = insert.on_conflict_do_update(
+        index_elements=["user_id", "module_id"],
+        set_={field: insert.excluded[field] for field in update_fields},
+    ).returning(StudentProgress)
+    return (
+        select(StudentProgress)
+        .options(selectinload(StudentProgress.module))  # type: ignore[arg-type]
+        .from_statement(statement)
+    )
+
+
 def create_or_update_student_progress(
     *, session: Session, user_id: uuid.UUID, progress_in: StudentProgressCreate
 ) -> StudentProgress:
-    """Create or update student progress for a module."""
-    existing = get_student_progress_by_module(
-        session=session, user_id=user_id, module_name=progress_in.module_name
+    """Create or update student progress for a module in a single statement.
+
+    Uses INSERT ... ON CONFLICT (user_id, module_id) DO UPDATE ... RETURNING,
+    so concurrent writers for the same module cannot create duplicate rows.
+    """
+    statement = student_progress_upsert(
+        session.get_bind().dialect.name,
+        user_id=user_id,
+        module_id=module_catalog.get_or_create_id(
+            session=session, name=progress_in.module_name
+        ),
+        progress_in=progress_in,
     )
-    if existing:
-        return set_student_progress_fields(
-            session=session, progress_obj=existing, progress_update=progress_in
-        )
-    else:
-        db_progress = StudentProgress.model_validate(
-            progress_in, update={"user_id": user_id}
-        )
-        session.add(db_progress)
+    db_progress: StudentProgress = session.scalars(
+        statement, execution_options={"populate_existing": True}
+    ).one()
+    if not in_unit_of_work(session):
         session.commit()
-        session.refresh(db_progress)
-        return db_progress
+    return db_progress
 
 
 def set_student_progress_fields(
     *,
     session: Session,
     progress_obj: StudentProgress,
-    progress_update: StudentProgressCreate | StudentProgressUpdate
+    progress_update: StudentProgressCreate | StudentProgressUpdate,
 ) -> StudentProgress:
     """Update student progress fields."""
     update_data = progress_update.model_dump(exclude_unset=True)
+    module_name = update_data.pop("module_name", None)
+    if module_name is not None:
+        update_data["module_id"] = module_catalog.get_or_create_id(
+            session=session, name=module_name
+        )
     progress_obj.sqlmodel_update(update_data)
-    session.add(progress_obj)
-    session.commit()
-    session.refresh(progress_obj)
-    return progress_obj
+    return _save(session, progress_obj)
+
+
+def struggling_modules_statement(user_id: uuid.UUID, progress_threshold: int) -> Any:
+    """Select a user's struggling modules, one index-only scan per condition.
+
+    OR-ing the two conditions in one WHERE would make the planner read every
+    row of the user. Split in two, each branch reads just its rows from one
+    index: progress below the threshold from ix_studentprogress_user_id_progress,
+    flagged rows at or above it from the partial ix_studentprogress_user_id_struggling.
+    """
+    below_threshold = select(StudentProgress).where(
+        StudentProgress.user_id == user_id,
+        StudentProgress.progress < progress_threshold,
+    )
+    flagged = select(StudentProgress).where(
+        StudentProgress.user_id == user_id,
+        StudentProgress.struggling.is_(True),  # type: ignore[attr-defined]
+        StudentProgress.progress >= progress_threshold,
+    )
+    return (
+        select(StudentProgress)
+        .options(selectinload(StudentProgress.module))  # type: ignore[arg-type]
+        .from_statement(union_all(below_threshold, flagged))
+    )
 
 
 def get_struggling_modules_for_user(
     *, session: Session, user_id: uuid.UUID, progress_threshold: int = 60
 ) -> list[StudentProgress]:
     """Get modules where user is struggling (progress < threshold or struggling flag set)."""
-    statement = select(StudentProgress).where(
-        StudentProgress.user_id == user_id,
-        (StudentProgress.struggling.is_(True))
-        | (StudentProgress.progress < progress_threshold),
-    )
-    return list(session.exec(statement).all())
+    statement = struggling_modules_statement(user_id, progress_threshold)
+    return list(session.scalars(statement).all())
@@ -0,0 +1,336 @@
+"""Bulk load of student progress from CSV or JSON Lines.
+
+The nightly LMS sync delivers millions of progress rows, far too many to
+upsert one statement at a time. Input is streamed and validated against
+``StudentProgressCreate`` in chunks. On PostgreSQL each chunk is copied
+into a temporary staging table with COPY and merged into ``studentprogress``
+by a single INSERT ... SELECT ... ON CONFLICT DO UPDATE. Other databases
+(SQLite in the tests) fall back to a batched upsert.
+
+Each chunk is committed on its own. The merge is idempotent, so an
+interrupted load can simply be run again.
+
+    python -m app.ingest progress.csv
+    python -m app.ingest --format jsonl - < progress.jsonl
+"""
+
+import argparse
+import csv
+import json
+import logging
+import sys
+import time
+import uuid
+from collections.abc import Callable, Iterable, Iterator
+from dataclasses import dataclass, field
+from itertools import islice
+from pathlib import Path
+from typing import IO, Any, Literal, TypeVar
+
+from pydantic import ValidationError
+from sqlalchemy import text
+from sqlalchemy.dialects import sqlite
+from sqlmodel import Session, select
+
+from app.core.metrics import REGISTRY
+from app.models import StudentProgress, StudentProgressCreate, User
+from app.modules import module_catalog
+
+logger = logging.getLogger(__name__)
+
+T = TypeVar("T")
+
+IngestFormat = Literal["csv", "jsonl"]
+CHUNK_SIZE = 10_000
+# Error rows kept on the report, later ones are only counted
+MAX_REPORTED_ERRORS = 1000
+
+INGEST_ROWS = REGISTRY.counter(
+    "btec_progress_ingest_rows", "Progress rows processed by bulk ingest.", ("result",)
+)
+
+COLUMNS = ("user_id", "module_id", "progress", "struggling", "last_score", "attempts")
+
+CREATE_STAGING = text(
+    """
+    CREATE TEMPORARY TABLE IF NOT EXISTS progress_staging (
+        line bigint NOT NULL,
+        user_id uuid NOT NULL,
+        module_id integer NOT NULL,
+        progress integer NOT NULL,
+        struggling boolean NOT NULL,
+        last_score double precision,
+        attempts integer NOT NULL
+    ) ON COMMIT DELETE ROWS
+    """
+)
+
+UNKNOWN_USERS = text(
+    """
+    SELECT s.line, s.user_id FROM progress_staging s
+    LEFT JOIN "user" u ON u.id = s.user_id
+    WHERE u.id IS NULL
+    """
+)
+
+# DISTINCT ON keeps the last row per key: ON CONFLICT cannot touch a row twice
+MERGE_STAGING = text(
+    """
+    INSERT INTO studentprogress
+        (id, user_id, module_id, progress, struggling, last_score, attempts)
+    SELECT DISTINCT ON (s.user_id, s.module_id)
+        gen_random_uuid(), s.user_id, s.module_id, s.progress, s.struggling,
+        s.last_score, s.attempts
+    FROM progress_staging s
+    JOIN "user" u ON u.id = s.user_id
+    ORDER BY s.user_id, s.module_id, s.line DESC
+    ON CONFLICT (user_id, module_id) DO UPDATE SET
+        progress = EXCLUDED.progress,
+        struggling = EXCLUDED.struggling,
+        last_score = EXCLUDED.last_score,
+        attempts = EXCLUDED.attempts
+    """
+)
+
+
+@dataclass
+class RowError:
+    line: int
+    message: str
+
+
+@dataclass
+class IngestReport:
+    total: int = 0
+    loaded: int = 0
+    failed: int = 0
+    errors: list[RowError] = field(default_factory=list)
+    started_at: float = field(default_factory=time.perf_counter)
+    finished_at: float | None = None
+
+    @property
+    def elapsed(self) -> float:
+        return (self.finished_at or time.perf_counter()) - self.started_at
+
+    @property
+    def rows_per_second(self) -> float:
+        elapsed = self.elapsed
+        return self.total / elapsed if elapsed > 0 else 0.0
+
+    def add_error(self, line: int, message: str) -> None:
+        self.failed += 1
+        if len(self.errors) < MAX_REPORTED_ERRORS:
+            self.errors.append(RowError(line=line, message=message))
+
+
+# A validated row: (line number, user id, progress)
+ValidRow = tuple[int, uuid.UUID, StudentProgressCreate]
+
+
+def iter_records(
+    stream: IO[str], fmt: IngestFormat
+) -> Iterator[tuple[int, dict[str, Any] | None]]:
+    """Yield (line number, record) pairs, with None for unparseable lines."""
+    if fmt == "csv":
+        reader = csv.DictReader(stream)
+        for record in reader:
+            # Empty cells fall back to the model defaults
+            yield reader.line_num, {k: v for k, v in record.items() if v != ""}
+    else:
+        for line_num, line in enumerate(stream, start=1):
+            if not line.strip():
+                continue
+            try:
+                record = json.loads(line)
+            except json.JSONDecodeError:
+                yield line_num, None
+                continue
+            yield line_num, record if isinstance(record, dict) else None
+
+
+def validation_message(error: ValidationError) -> str:
+    return "; ".join(
+        f"{'.'.join(map(str, err['loc']))}: {err['msg']}" for err in error.errors()
+    )
+
+
+def chunked(iterable: Iterable[T], size: int) -> Iterator[list[T]]:
+    iterator = iter(iterable)
+    while chunk := list(islice(iterator, size)):
+        yield chunk
+
+
+def _validate_chunk(
+    records: list[tuple[int, dict[str, Any] | None]], report: IngestReport
+) -> list[ValidRow]:
+    rows = []
+    for line, record in records:
+        report.total += 1
+        if record is None:
+            report.add_error(line, "Malformed record")
+            continue
+        try:
+            user_id = uuid.UUID(str(record.get("user_id")))
+            progress_in = StudentProgressCreate.model_validate(record)
+        except ValueError as e:
+            # ValidationError is a ValueError, as is a malformed UUID
+            message = (
+                validation_message(e)
+                if isinstance(e, ValidationError)
+                else "user_id: Invalid UUID"
+            )
+            report.add_error(line, message)
+            continue
+        rows.append((line, user_id, progress_in))
+    return rows
+
+
+def _module_ids(session: Session, rows: list[ValidRow]) -> dict[str, int]:
+    return module_catalog.get_or_create_ids(
+        session=session, names={p.module_name for _, _, p in rows}
+    )
+
+
+def _copy_chunk(session: Session, rows: list[ValidRow], report: IngestReport) -> None:
+    module_ids = _module_ids(session, rows)
+    session.execute(CREATE_STAGING)
+    cursor = session.connection().connection.cursor()
+    with cursor.copy(
+        f"COPY progress_staging (line, {', '.join(COLUMNS)}) FROM STDIN"
+    ) as copy:
+        for line, user_id, p in rows:
+            copy.write_row(
+                (
+                    line,
+                    user_id,
+                    module_ids[p.module_name],
+                    p.progress,
+                    p.struggling,
+                    p.last_score,
+                    p.attempts,
+                )
+            )
+    unknown = session.execute(UNKNOWN_USERS).all()
+    for row in unknown:
+        report.add_error(row.line, f"user_id: Unknown user {row.user_id}")
+    session.execute(MERGE_STAGING)
+    session.commit()
+    report.loaded += len(rows) - len(unknown)
+
+
+def _upsert_chunk(session: Session, rows: list[ValidRow], report: IngestReport) -> None:
+    module_ids = _module_ids(session, rows)
+    user_ids = {user_id for _, user_id, _ in rows}
+    known = set(
+        session.exec(select(User.id).where(User.id.in_(user_ids))).all()  # type: ignore[attr-defined]
+    )
+    values = []
+    for line, user_id, progress_in in rows:
+        if user_id not in known:
+            report.add_error(line, f"user_id: Unknown user {user_id}")
+            continue
+        values.append(
+            StudentProgress.model_validate(
+                progress_in,
+                update={
+                    "user_id": user_id,
+                    "module_id": module_ids[progress_in.module_name],
+                },
+            ).model_dump()
+        )
+    if values:
+        insert = sqlite.insert(StudentProgress)
+        session.execute(
+            insert.on_conflict_do_update(
+                index_elements=["user_id", "module_id"],
+                set_={c: insert.excluded[c] for c in COLUMNS[2:]},
+            ),
+            values,
+        )
+    session.commit()
+    report.loaded += len(values)
+
+
+def ingest_progress(
+    *,
+    session: Session,
+    stream: IO[str],
+    fmt: IngestFormat = "csv",
+    chunk_size: int = CHUNK_SIZE,
+    report: IngestReport | None = None,
+    on_progress: Callable[[IngestReport], None] | None = None,
+) -> IngestReport:
+    """
+    Load student progress rows from a CSV or JSON Lines stream.
+
+    Args:
+        session: Database session
+        stream: Text stream with a header row (CSV) or one object per line (JSONL)
+        fmt: Input format, "csv" or "jsonl" (default: "csv")
+        chunk_size: Rows validated, loaded and committed together
+        report: Report to update, for callers that poll it while loading
+        on_progress: Called with the report after every chunk
+
+    Returns:
+        The report with row counts, error rows and throughput
+    """
+    report = report or IngestReport()
+    load_chunk = (
+        _copy_chunk
+        if session.get_bind().dialect.name == "postgresql"
+        else _upsert_chunk
+    )
+    for records in chunked(iter_records(stream, fmt), chunk_size):
+        loaded, failed = report.loaded, report.failed
+        rows = _validate_chunk(records, report)
+        if rows:
+            load_chunk(session, rows, report)
+        INGEST_ROWS.inc(report.loaded - loaded, result="loaded")
+        INGEST_ROWS.inc(report.failed - failed, result="failed")
+        if on_progress:
+            on_progress(report)
+    report.finished_at = time.perf_counter()
+    return report
+
+
+def _log_progress(report: IngestReport) -> None:
+    logger.info(
+        "%d rows read, %d loaded, %d failed (%.0f rows/s)",
+        report.total,
+        report.loaded,
+        report.failed,
+        report.rows_per_second,
+    )
+
+
+def main() -> None:
+    from app.core.db import engine
+
+    parser = argparse.ArgumentParser(description="Bulk load student progress.")
+    parser.add_argument("path", help="Input file, or - for standard input")
+    parser.add_argument("--format", choices=("csv", "jsonl"), default=None)
+    parser.add_argument("--chunk-size", type=int, default=CHUNK_SIZE)
+    args = parser.parse_args()
+
+    fmt: IngestFormat = args.format or (
+        "jsonl" if args.path.endswith((".jsonl", ".ndjson")) else "csv"
+    )
+    with (
+        sys.stdin if args.path == "-" else Path(args.path).open(newline="") as stream,
+        Session(engine) as session,
+    ):
+        report = ingest_progress(
+            session=session,
+            stream=stream,
+            fmt=fmt,
+            chunk_size=args.chunk_size,
+            on_progress=_log_progress,
+        )
+    _log_progress(report)
+    for error in report.errors:
+        logger.warning("line %d: %s", error.line, error.message)
+
+
+if __name__ == "__main__":
+    logging.basicConfig(level=logging.INFO)
+    main()
@@ -1,9 +1,14 @@
 # import sentry_sdk
-from fastapi import FastAPI
+from fastapi import FastAPI, Request
+from fastapi.responses import JSONResponse
 from fastapi.routing import APIRoute
 from starlette.middleware.cors import CORSMiddleware
+from app.api import well_known
 from app.api.main import api_router
 from app.core.config import settings
+from app.core.query_stats import QueryStatsMiddleware
+from app.core.rate_limit import RateLimitMiddleware, get_rate_limit_backend
+from app.core.security import PasswordHasherBusy
 
 
 def custom_generate_unique_id(route: APIRoute) -> str:
@@ -22,6 +27,14 @@ app = FastAPI(
     generate_unique_id_function=custom_generate_unique_id,
 )
 
+# Inside CORS, so that browsers can read the 429s
+if settings.RATE_LIMIT_ENABLED:
+    app.add_middleware(
+        RateLimitMiddleware,
+        routes=settings.RATE_LIMITS,
+        backend=get_rate_limit_backend(),
+    )
+
 # Enable CORS
 if settings.all_cors_origins:
     app.add_middleware(
@@ -32,5 +45,21 @@ if settings.all_cors_origins:
         allow_headers=["*"],
     )
 
+app.add_middleware(QueryStatsMiddleware, headers=settings.DB_QUERY_HEADERS)
+
+
+@app.exception_handler(PasswordHasherBusy)
+async def password_hasher_busy_handler(
+    _request: Request, _exc: PasswordHasherBusy
+) -> JSONResponse:
+    # Fail fast during a login storm instead of queueing behind seconds of bcrypt
+    return JSONResponse(
+        status_code=503,
+        content={"detail": "Too many password checks in progress, try again shortly"},
+        headers={"Retry-After": "1"},
+    )
+
+
 # Include API routers
-app.include_router(api_router, prefix=settings.API_V1_STR)
\ No newline at end of file
+app.include_router(api_router, prefix=settings.API_V1_STR)
+app.include_router(well_known.router, tags=["well-known"])
@@ -1,6 +1,9 @@
 import uuid
+from collections.abc import Callable
+from datetime import datetime, timezone
 
 from pydantic import EmailStr
+from sqlalchemy import DDL, DateTime, Index, event, text
 from sqlmodel import Field, Relationship, SQLModel
 
 
@@ -43,9 +46,15 @@ class UpdatePassword(SQLModel):
 class User(UserBase, table=True):
     id: uuid.UUID = Field(default_factory=uuid.uuid4, primary_key=True)
     hashed_password: str
-    items: list["Item"] = Relationship(back_populates="owner", cascade_delete=True)
+    # Carried by access tokens, bumped to revoke every token issued so far
+    token_version: int = 0
+    # The database cascades deletes, the ORM does not load children to delete
+    # them. Delete users with app.user_deletion to keep transactions short.
+    items: list["Item"] = Relationship(
+        back_populates="owner", cascade_delete=True, passive_deletes=True
+    )
     student_progress: list["StudentProgress"] = Relationship(
-        back_populates="user", cascade_delete=True
+        back_populates="user", cascade_delete=True, passive_deletes=True
     )
 
 
@@ -56,7 +65,9 @@ class UserPublic(UserBase):
 
 class UsersPublic(SQLModel):
     data: list[UserPublic]
-    count: int
+    # Estimated total, only returned when requested
+    count: int | None = None
+    next_cursor: str | None = None
 
 
 # Shared properties
@@ -80,7 +91,7 @@ class ItemUpdate(ItemBase):
 class Item(ItemBase, table=True):
     id: uuid.UUID = Field(default_factory=uuid.uuid4, primary_key=True)
     owner_id: uuid.UUID = Field(
-        foreign_key="user.id", nullable=False, ondelete="CASCADE"
+        foreign_key="user.id", nullable=False, ondelete="CASCADE", index=True
     )
     owner: User | None = Relationship(back_populates="items")
 
@@ -93,7 +104,9 @@ class ItemPublic(ItemBase):
 
 class ItemsPublic(SQLModel):
     data: list[ItemPublic]
-    count: int
+    # Estimated total, only returned when requested
+    count: int | None = None
+    next_cursor: str | None = None
 
 
 # Generic message
@@ -105,11 +118,23 @@ class Message(SQLModel):
 class Token(SQLModel):
     access_token: str
     token_type: str = "bearer"
+    # Renews the short-lived access tokens of ACCESS_TOKEN_CLAIMS
+    refresh_token: str | None = None
+
+
+class RefreshTokenRequest(SQLModel):
+    refresh_token: str
 
 
 # Contents of JWT token
 class TokenPayload(SQLModel):
-    sub: str | None = None
+    sub: uuid.UUID | None = None
+    # "refresh" tokens are only accepted to issue new access tokens
+    type: str = "access"
+    # Claims of self-contained access tokens, see settings.ACCESS_TOKEN_CLAIMS
+    is_active: bool | None = None
+    is_superuser: bool | None = None
+    ver: int | None = None
 
 
 class NewPassword(SQLModel):
@@ -117,9 +142,16 @@ class NewPassword(SQLModel):
     new_password: str = Field(min_length=8, max_length=128)
 
 
+# Catalog of modules. Progress rows reference a module by its integer ID
+# instead of repeating the name, see app.modules for the name-to-ID cache.
+class Module(SQLModel, table=True):
+    # Assigned by the database, modules are only ever inserted in SQL
+    id: int = Field(default=None, primary_key=True)
+    name: str = Field(max_length=255, unique=True)
+
+
 # Shared properties for StudentProgress
 class StudentProgressBase(SQLModel):
-    module_name: str = Field(max_length=255)
     progress: int = Field(ge=0, le=100)  # Progress percentage 0-100
     struggling: bool = Field(default=False)
     last_score: float | None = Field(default=None, ge=0, le=100)
@@ -128,7 +160,7 @@ class StudentProgressBase(SQLModel):
 
 # Properties to receive on creation
 class StudentProgressCreate(StudentProgressBase):
-    pass
+    module_name: str = Field(max_length=255)
 
 
 # Properties to receive on update
@@ -140,21 +172,356 @@ class StudentProgressUpdate(SQLModel):
     attempts: int | None = Field(default=None, ge=0)
 
 
+# Columns stored in the progress indexes so that reads are index-only
+PROGRESS_INCLUDE = ["id", "module_id", "last_score", "attempts"]
+
+
 # Database model
 class StudentProgress(StudentProgressBase, table=True):
+    __table_args__ = (
+        # One row per student and module, also the conflict target for upserts
+        Index(
+            "ix_studentprogress_user_id_module_id",
+            "user_id",
+            "module_id",
+            unique=True,
+        ),
+        # The struggling-modules query (progress below a threshold, or the
+        # struggling flag) reads only these two indexes, never the table
+        Index(
+            "ix_studentprogress_user_id_progress",
+            "user_id",
+            "progress",
+            postgresql_include=PROGRESS_INCLUDE + ["struggling"],
+        ),
+        Index(
+            "ix_studentprogress_user_id_struggling",
+            "user_id",
+            postgresql_include=PROGRESS_INCLUDE + ["progress"],
+            postgresql_where=text("struggling"),
+            sqlite_where=text("struggling"),
+        ),
+    )
+
     id: uuid.UUID = Field(default_factory=uuid.uuid4, primary_key=True)
     user_id: uuid.UUID = Field(
         foreign_key="user.id", nullable=False, ondelete="CASCADE"
     )
     user: User | None = Relationship(back_populates="student_progress")
+    module_id: int = Field(foreign_key="module.id", nullable=False)
+    # Joined into every select of progress rows. Textual and from_statement()
+    # queries cannot be joined to and load it with selectinload() instead.
+    module: Module | None = Relationship(
+        sa_relationship_kwargs={"lazy": "joined", "innerjoin": True}
+    )
+
+    @property
+    def module_name(self) -> str:
+        assert self.module
+        return self.module.name
 
 
 # Properties to return via API
 class StudentProgressPublic(StudentProgressBase):
     id: uuid.UUID
     user_id: uuid.UUID
+    module_name: str
 
 
 class StudentProgressListPublic(SQLModel):
     data: list[StudentProgressPublic]
-    count: int
+    # Estimated total, only returned when requested
+    count: int | None = None
+    next_cursor: str | None = None
+
+
+# Append-only history of progress writes, for learning curves. Rows are
+# written by triggers on studentprogress, so every write path records them.
+class ProgressEventBase(SQLModel):
+    user_id: uuid.UUID
+    module_name: str = Field(max_length=255)
+    progress: int
+    struggling: bool
+    last_score: float | None = None
+    attempts: int
+    recorded_at: datetime
+
+
+class ProgressEvent(ProgressEventBase, table=True):
+    __tablename__ = "progress_event"
+    __table_args__ = (
+        # Events arrive in time order, so a BRIN index stays tiny
+        Index("ix_progress_event_recorded_at", "recorded_at", postgresql_using="brin"),
+        Index("ix_progress_event_user_id_recorded_at", "user_id", "recorded_at"),
+        # One partition per month, see app.progress_history
+        {"postgresql_partition_by": "RANGE (recorded_at)"},
+    )
+
+    id: uuid.UUID = Field(default_factory=uuid.uuid4, primary_key=True)
+    # Part of the primary key, as the partition key must be
+    recorded_at: datetime = Field(
+        default_factory=lambda: datetime.now(timezone.utc),
+        primary_key=True,
+        sa_type=DateTime(timezone=True),
+    )
+    user_id: uuid.UUID = Field(
+        foreign_key="user.id", nullable=False, ondelete="CASCADE"
+    )
+
+
+class ProgressEventPublic(ProgressEventBase):
+    pass
+
+
+class ProgressEventsPublic(SQLModel):
+    data: list[ProgressEventPublic]
+
+
+# Average progress of a module's students per time bucket
+class ModuleCurvePoint(SQLModel):
+    bucket: datetime
+    average_progress: float
+    students: int
+    struggling: int
+
+
+class ModuleCurvePublic(SQLModel):
+    module_name: str
+    data: list[ModuleCurvePoint]
+
+
+# Events keep the module name, so the history reads on its own after
+# retention drops old partitions
+PROGRESS_EVENT_COLUMNS = (
+    "user_id, module_name, progress, struggling, last_score, attempts"
+)
+PROGRESS_EVENT_VALUES = "user_id, name, progress, struggling, last_score, attempts"
+
+# Statement-level triggers insert all rows of a bulk write in one statement
+PROGRESS_EVENT_TRIGGERS = {
+    "postgresql": [
+        f"""
+        CREATE OR REPLACE FUNCTION record_progress_events() RETURNS trigger
+        LANGUAGE plpgsql AS $$
+        BEGIN
+            INSERT INTO progress_event (id, recorded_at, {PROGRESS_EVENT_COLUMNS})
+            SELECT gen_random_uuid(), now(), {PROGRESS_EVENT_VALUES}
+            FROM new_rows JOIN module ON module.id = new_rows.module_id;
+            RETURN NULL;
+        END
+        $$
+        """,
+        *(
+            f"""
+            CREATE TRIGGER studentprogress_{operation.lower()}_events
+            AFTER {operation} ON studentprogress
+            REFERENCING NEW TABLE AS new_rows
+            FOR EACH STATEMENT EXECUTE FUNCTION record_progress_events()
+            """
+            for operation in ("INSERT", "UPDATE")
+        ),
+    ],
+    # SQLite (tests) has no statement-level triggers or transition tables
+    "sqlite": [
+        f"""
+        CREATE TRIGGER studentprogress_{operation.lower()}_events
+        AFTER {operation} ON studentprogress
+        BEGIN
+            INSERT INTO progress_event (id, recorded_at, {PROGRESS_EVENT_COLUMNS})
+            VALUES (
+                lower(hex(randomblob(16))),
+                strftime('%%Y-%%m-%%d %%H:%%M:%%f000', 'now'),
+                NEW.user_id, (SELECT name FROM module WHERE id = NEW.module_id),
+                NEW.progress, NEW.struggling,
+                NEW.last_score, NEW.attempts
+            );
+        END
+        """
+        for operation in ("INSERT", "UPDATE")
+    ],
+}
+
+# DDL's constructor is not annotated
+_ddl: Callable[[str], DDL] = DDL
+
+# Rows outside every monthly partition land here instead of failing the write
+event.listen(
+    ProgressEvent.__table__,  # type: ignore[attr-defined]
+    "after_create",
+    _ddl(
+        "CREATE TABLE IF NOT EXISTS progress_event_default "
+        "PARTITION OF progress_event DEFAULT"
+    ).execute_if(dialect="postgresql"),
+)
+
+# Running per-module totals for cohort analytics, one row per module and
+# score band. Triggers on studentprogress apply the delta of every write,
+# so reading a module's statistics costs the same for any cohort size.
+SCORE_BANDS = 10
+# Band of students without a score
+UNSCORED_BAND = -1
+
+
+class ModuleStats(SQLModel, table=True):
+    module_id: int = Field(primary_key=True, foreign_key="module.id")
+    # last_score // 10, clamped to 0-9, or UNSCORED_BAND
+    score_band: int = Field(primary_key=True)
+    students: int = 0
+    progress_sum: int = 0
+    struggling: int = 0
+    score_sum: float = 0
+
+
+class ModuleStatsPublic(SQLModel):
+    module_name: str
+    students: int
+    average_progress: float
+    struggling: int
+    average_score: float | None = None
+    # Students per 10-point score band, 0-9 up to 90-100
+    score_histogram: list[int]
+    unscored: int
+
+
+class ModuleStatsListPublic(SQLModel):
+    data: list[ModuleStatsPublic]
+
+
+def _score_band(row: str, dialect: str) -> str:
+    if dialect == "postgresql":
+        # A PostgreSQL cast to integer rounds, floor first
+        band = f"LEAST(GREATEST(CAST(floor({row}last_score / 10) AS INTEGER), 0), {SCORE_BANDS - 1})"
+    else:
+        band = f"MIN(MAX(CAST({row}last_score / 10 AS INTEGER), 0), {SCORE_BANDS - 1})"
+    return f"CASE WHEN {row}last_score IS NULL THEN {UNSCORED_BAND} ELSE {band} END"
+
+
+def _module_stats_upsert(deltas: str) -> str:
+    return f"""
+        INSERT INTO modulestats
+            (module_id, score_band, students, progress_sum, struggling, score_sum)
+        {deltas}
+        ON CONFLICT (module_id, score_band) DO UPDATE SET
+            students = modulestats.students + excluded.students,
+            progress_sum = modulestats.progress_sum + excluded.progress_sum,
+            struggling = modulestats.struggling + excluded.struggling,
+            score_sum = modulestats.score_sum + excluded.score_sum
+    """
+
+
+def _module_stats_deltas(*sources: tuple[str, int]) -> str:
+    rows = " UNION ALL ".join(
+        f"SELECT module_id, {_score_band('', 'postgresql')} AS score_band, "
+        f"progress, CAST(struggling AS INTEGER) AS struggling, "
+        f"COALESCE(last_score, 0) AS last_score, {sign} AS sign FROM {source}"
+        for source, sign in sources
+    )
+    # Sorted so that concurrent bulk writes lock the rows in the same order
+    return f"""
+        SELECT module_id, score_band, sum(sign), sum(sign * progress),
+               sum(sign * struggling), sum(sign * last_score)
+        FROM ({rows}) AS delta
+        GROUP BY module_id, score_band
+        ORDER BY module_id, score_band
+    """
+
+
+def _module_stats_row(row: str, sign: str) -> str:
+    return _module_stats_upsert(
+        f"VALUES ({row}.module_id, {_score_band(row + '.', 'sqlite')}, "
+        f"{sign}1, {sign}{row}.progress, {sign}{row}.struggling, "
+        f"{sign}COALESCE({row}.last_score, 0))"
+    )
+
+
+MODULE_STATS_TRIGGERS = {
+    "postgresql": [
+        f"""
+        CREATE OR REPLACE FUNCTION apply_module_stats() RETURNS trigger
+        LANGUAGE plpgsql AS $$
+        BEGIN
+            IF TG_OP = 'INSERT' THEN
+                {_module_stats_upsert(_module_stats_deltas(("new_rows", 1)))};
+            ELSIF TG_OP = 'UPDATE' THEN
+                {_module_stats_upsert(_module_stats_deltas(("old_rows", -1), ("new_rows", 1)))};
+            ELSE
+                {_module_stats_upsert(_module_stats_deltas(("old_rows", -1)))};
+            END IF;
+            RETURN NULL;
+        END
+        $$
+        """,
+        *(
+            f"""
+            CREATE TRIGGER studentprogress_{operation.lower()}_stats
+            AFTER {operation} ON studentprogress
+            REFERENCING {transition}
+            FOR EACH STATEMENT EXECUTE FUNCTION apply_module_stats()
+            """
+            for operation, transition in (
+                ("INSERT", "NEW TABLE AS new_rows"),
+                ("UPDATE", "OLD TABLE AS old_rows NEW TABLE AS new_rows"),
+                ("DELETE", "OLD TABLE AS old_rows"),
+            )
+        ),
+    ],
+    "sqlite": [
+        f"""
+        CREATE TRIGGER studentprogress_{operation.lower()}_stats
+        AFTER {operation} ON studentprogress
+        BEGIN
+            {"; ".join(_module_stats_row(row, sign) for row, sign in rows)};
+        END
+        """
+        for operation, rows in (
+            ("INSERT", [("NEW", "")]),
+            ("UPDATE", [("OLD", "-"), ("NEW", "")]),
+            ("DELETE", [("OLD", "-")]),
+        )
+    ],
+}
+
+# With studentprogress itself, so that create_all() on an existing database,
+# as init_db does after the migrations, does not create them a second time
+for _triggers in (PROGRESS_EVENT_TRIGGERS, MODULE_STATS_TRIGGERS):
+    for _dialect, _statements in _triggers.items():
+        for _statement in _statements:
+            event.listen(
+                StudentProgress.__table__,  # type: ignore[attr-defined]
+                "after_create",
+                _ddl(_statement).execute_if(dialect=_dialect),
+            )
+
+
+# Report generation
+class ClassReportRequest(SQLModel):
+    user_ids: list[uuid.UUID] = Field(min_length=1, max_length=1000)
+    title: str = Field(default="Class assessment report", max_length=255)
+
+
+# Status of a background job, e.g. a report rendered in job mode
+class JobPublic(SQLModel):
+    id: uuid.UUID
+    kind: str
+    status: str
+    total: int
+    completed: int
+    failed: int
+    error: str | None = None
+
+
+class IngestErrorPublic(SQLModel):
+    line: int
+    message: str
+
+
+# Bulk progress ingest job, with the first error rows and the load rate
+class ProgressIngestPublic(JobPublic):
+    rows_per_second: float = 0
+    errors: list[IngestErrorPublic] = []
+
+
+# Bulk user import job, with the first error rows and the import rate
+class UserImportPublic(JobPublic):
+    rows_per_second: float = 0
+    errors: list[IngestErrorPublic] = []
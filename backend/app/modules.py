@@ -0,0 +1,96 @@
+"""Module catalog: integer keys for module names.
+
+Progress rows and module statistics reference a module by its integer ID.
+The API keeps taking module names; each process translates them with a
+name-to-ID dictionary, so only names it has not seen yet cost a query.
+Names never change and IDs are never reused, so cached entries never go
+stale. Unknown names are not cached, another process may create them.
+
+New modules are inserted on a connection of their own and committed at
+once, so a rolled back caller cannot leave an ID in the cache that does
+not exist in the database.
+"""
+
+import threading
+from collections.abc import Iterable
+
+from sqlalchemy import Connection, orm
+from sqlalchemy.dialects import postgresql, sqlite
+from sqlmodel import col, select
+
+from app.models import Module
+
+
+class ModuleCatalog:
+    def __init__(self) -> None:
+        self._ids: dict[str, int] = {}
+        self._lock = threading.Lock()
+
+    def _remember(self, ids: dict[str, int]) -> None:
+        with self._lock:
+            self._ids.update(ids)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._ids.clear()
+
+    def get_id(self, *, session: orm.Session, name: str) -> int | None:
+        """ID of the module called ``name``, None if there is none."""
+        return self.get_ids(session=session, names=[name]).get(name)
+
+    def get_ids(self, *, session: orm.Session, names: Iterable[str]) -> dict[str, int]:
+        """IDs of the modules called ``names``, leaving out unknown names."""
+        names = set(names)
+        ids = {name: self._ids[name] for name in names if name in self._ids}
+        missing = names - ids.keys()
+        if missing:
+            found = dict(
+                session.execute(
+                    select(col(Module.name), col(Module.id)).where(
+                        col(Module.name).in_(missing)
+                    )
+                )
+                .tuples()
+                .all()
+            )
+            self._remember(found)
+            ids.update(found)
+        return ids
+
+    def get_or_create_id(self, *, session: orm.Session, name: str) -> int:
+        """ID of the module called ``name``, adding it to the catalog if new."""
+        return self.get_or_create_ids(session=session, names=[name])[name]
+
+    def get_or_create_ids(
+        self, *, session: orm.Session, names: Iterable[str]
+    ) -> dict[str, int]:
+        names = set(names)
+        ids = {name: self._ids[name] for name in names if name in self._ids}
+        missing = names - ids.keys()
+        if missing:
+            # The primary, never a replica, and outside the session's transaction
+            with session.get_bind().engine.connect() as connection:
+                found = _create_modules(connection, missing)
+                connection.commit()
+            self._remember(found)
+            ids.update(found)
+        return ids
+
+
+def _create_modules(connection: Connection, names: set[str]) -> dict[str, int]:
+    dialect_insert = (
+        sqlite.insert if connection.dialect.name == "sqlite" else postgresql.insert
+    )
+    # Sorted so that concurrent callers insert, and lock, in the same order
+    connection.execute(
+        dialect_insert(Module)
+        .values([{"name": name} for name in sorted(names)])
+        .on_conflict_do_nothing(index_elements=["name"])
+    )
+    rows = connection.execute(
+        select(col(Module.name), col(Module.id)).where(col(Module.name).in_(names))
+    )
+    return dict(rows.tuples().all())
+
+
+module_catalog = ModuleCatalog()
@@ -0,0 +1,255 @@
+"""Progress history: learning curves from the progress_event table.
+
+Triggers on studentprogress append an event for every progress write (see
+app.models). On PostgreSQL the table is range-partitioned by month with a
+BRIN index on recorded_at, so curve queries bounded in time only scan the
+partitions they cover and retention drops whole partitions instead of
+deleting rows. ``python -m app.progress_history`` creates the partitions
+for the coming months and drops expired ones; run it on deploy and daily.
+"""
+
+import argparse
+import logging
+import uuid
+from collections.abc import Iterable
+from datetime import date, datetime, timezone
+from typing import Any, Literal
+
+from sqlalchemy import Connection, Engine, func, text
+from sqlalchemy.exc import DBAPIError
+from sqlmodel import Session, col, select
+
+from app.core.config import settings
+from app.models import ModuleCurvePoint, ProgressEvent
+
+logger = logging.getLogger(__name__)
+
+CurveBucket = Literal["day", "month"]
+
+PARTITION_PREFIX = "progress_event_y"
+# Catches rows outside every monthly partition
+DEFAULT_PARTITION = "progress_event_default"
+
+# strftime formats giving the start of each bucket on SQLite
+_SQLITE_BUCKETS = {"day": "%Y-%m-%d 00:00:00", "month": "%Y-%m-01 00:00:00"}
+
+
+def _add_months(month: date, months: int) -> date:
+    index = month.year * 12 + month.month - 1 + months
+    return date(index // 12, index % 12 + 1, 1)
+
+
+def partition_name(month: date) -> str:
+    return f"{PARTITION_PREFIX}{month.year:04d}m{month.month:02d}"
+
+
+def _create_partition(connection: Connection, month: date) -> int:
+    """Create the partition of ``month``, returning the rows moved into it."""
+    name = partition_name(month)
+    bounds = {"start": month, "end": _add_months(month, 1)}
+    stray: bool = connection.execute(
+        text(
+            f"SELECT EXISTS (SELECT 1 FROM {DEFAULT_PARTITION} "
+            "WHERE recorded_at >= :start AND recorded_at < :end)"
+        ),
+        bounds,
+    ).scalar_one()
+    create = text(
+        f"CREATE TABLE {name} PARTITION OF progress_event "
+        f"FOR VALUES FROM ('{bounds['start']}') TO ('{bounds['end']}')"
+    )
+    if not stray:
+        connection.execute(create)
+        return 0
+    # Attaching fails while the default partition holds rows of this month:
+    # detach it, create the month and move its rows over, then attach it back
+    connection.execute(
+        text(f"ALTER TABLE progress_event DETACH PARTITION {DEFAULT_PARTITION}")
+    )
+    connection.execute(create)
+    moved = connection.execute(
+        text(
+            f"WITH moved AS (DELETE FROM {DEFAULT_PARTITION} "
+            "WHERE recorded_at >= :start AND recorded_at < :end RETURNING *) "
+            f"INSERT INTO {name} SELECT * FROM moved"
+        ),
+        bounds,
+    ).rowcount
+    connection.execute(
+        text(f"ALTER TABLE progress_event ATTACH PARTITION {DEFAULT_PARTITION} DEFAULT")
+    )
+    return moved
+
+
+def ensure_partitions(
+    engine: Engine, *, ahead: int | None = None, today: date | None = None
+) -> list[str]:
+    """Create the partitions of the current and next ``ahead`` months."""
+    if engine.dialect.name != "postgresql":
+        return []
+    ahead = settings.PROGRESS_EVENT_PARTITIONS_AHEAD if ahead is None else ahead
+    current = (today or datetime.now(timezone.utc).date()).replace(day=1)
+    created = []
+    for offset in range(ahead + 1):
+        month = _add_months(current, offset)
+        name = partition_name(month)
+        # One transaction per month, a failure leaves the others to be created
+        try:
+            with engine.begin() as connection:
+                exists: bool = connection.execute(
+                    text("SELECT to_regclass(:name) IS NOT NULL"), {"name": name}
+                ).scalar_one()
+                if exists:
+                    continue
+                moved = _create_partition(connection, month)
+        except DBAPIError:
+            logger.exception("Could not create partition %s", name)
+            continue
+        if moved:
+            logger.info("Moved %d rows from %s to %s", moved, DEFAULT_PARTITION, name)
+        created.append(name)
+    return created
+
+
+def drop_expired_partitions(
+    engine: Engine, *, retention_months: int | None = None, today: date | None = None
+) -> list[str]:
+    """Drop the monthly partitions entirely older than the retention period."""
+    if engine.dialect.name != "postgresql":
+        return []
+    if retention_months is None:
+        retention_months = settings.PROGRESS_EVENT_RETENTION_MONTHS
+    current = (today or datetime.now(timezone.utc).date()).replace(day=1)
+    cutoff = partition_name(_add_months(current, -retention_months))
+    dropped = []
+    with engine.begin() as connection:
+        names: Iterable[str] = connection.execute(
+            text(
+                """
+                SELECT child.relname FROM pg_inherits
+                JOIN pg_class parent ON parent.oid = pg_inherits.inhparent
+                JOIN pg_class child ON child.oid = pg_inherits.inhrelid
+                WHERE parent.relname = 'progress_event' AND child.relname LIKE :prefix
+                """
+            ),
+            {"prefix": f"{PARTITION_PREFIX}%"},
+        ).scalars()
+        # Names sort chronologically, yYYYYmMM
+        for name in sorted(n for n in names if n < cutoff):
+            connection.execute(text(f"DROP TABLE {name}"))
+            dropped.append(name)
+    return dropped
+
+
+def get_student_curve(
+    *,
+    session: Session,
+    user_id: uuid.UUID,
+    module_name: str | None = None,
+    since: datetime,
+    until: datetime | None = None,
+) -> list[ProgressEvent]:
+    """
+    Progress events of a student in time order, optionally for one module.
+
+    Args:
+        session: Database session
+        user_id: Student ID
+        module_name: Only events of this module, all modules if None
+        since: Start of the period, bounding the partitions scanned
+        until: End of the period, now if None
+
+    Returns:
+        Events recorded in [since, until)
+    """
+    statement = select(ProgressEvent).where(
+        ProgressEvent.user_id == user_id,
+        ProgressEvent.recorded_at >= since,
+        ProgressEvent.recorded_at < (until or datetime.now(timezone.utc)),
+    )
+    if module_name is not None:
+        statement = statement.where(ProgressEvent.module_name == module_name)
+    return list(
+        session.exec(
+            statement.order_by(ProgressEvent.recorded_at, ProgressEvent.id)  # type: ignore[arg-type]
+        ).all()
+    )
+
+
+def _bucket_start(session: Session, bucket: CurveBucket) -> Any:
+    connection = session.connection(bind_arguments={"mapper": ProgressEvent})
+    if connection.dialect.name == "postgresql":
+        return func.date_trunc(bucket, ProgressEvent.recorded_at)
+    return func.strftime(_SQLITE_BUCKETS[bucket], ProgressEvent.recorded_at)
+
+
+def get_module_curve(
+    *,
+    session: Session,
+    module_name: str,
+    since: datetime,
+    until: datetime | None = None,
+    bucket: CurveBucket = "day",
+) -> list[ModuleCurvePoint]:
+    """
+    Average progress of a module's students per day or month.
+
+    Every event in a bucket counts, so a student who updated twice in a
+    day weighs twice in that day's average.
+
+    Args:
+        session: Database session
+        module_name: Module name
+        since: Start of the period, bounding the partitions scanned
+        until: End of the period, now if None
+        bucket: Bucket width
+
+    Returns:
+        One point per bucket with events, in time order
+    """
+    start = _bucket_start(session, bucket).label("bucket")
+    rows = session.exec(
+        select(
+            start,
+            func.avg(ProgressEvent.progress),
+            func.count(func.distinct(ProgressEvent.user_id)),
+            func.count(func.distinct(ProgressEvent.user_id)).filter(
+                col(ProgressEvent.struggling)
+            ),
+        )
+        .where(
+            ProgressEvent.module_name == module_name,
+            ProgressEvent.recorded_at >= since,
+            ProgressEvent.recorded_at < (until or datetime.now(timezone.utc)),
+        )
+        .group_by(start)
+        .order_by(start)
+    ).all()
+    return [
+        ModuleCurvePoint(
+            bucket=bucket_start,
+            average_progress=round(float(average), 2),
+            students=students,
+            struggling=struggling,
+        )
+        for bucket_start, average, students, struggling in rows
+    ]
+
+
+def main() -> None:
+    from app.core.db import engine
+
+    parser = argparse.ArgumentParser(description="Maintain progress_event partitions.")
+    parser.add_argument("--ahead", type=int, default=None)
+    parser.add_argument("--retention-months", type=int, default=None)
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.INFO)
+    for name in ensure_partitions(engine, ahead=args.ahead):
+        logger.info("Created partition %s", name)
+    for name in drop_expired_partitions(engine, retention_months=args.retention_months):
+        logger.info("Dropped partition %s", name)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,205 @@
+"""Data for progress reports, fetched in a single database round-trip.
+
+A student report needs the student, their progress rows, how each module
+compares with the cohort and which modules need remediation. All of that
+is computed by one SQL statement with window functions, and the result is
+returned as typed, picklable dataclasses that render straight into the
+report templates.
+"""
+
+import uuid
+from dataclasses import asdict, dataclass, field
+from datetime import datetime, timezone
+from typing import Any
+
+from sqlalchemy import Integer, case, func
+from sqlmodel import Session, col, select
+
+from app.models import Module, StudentProgress, User
+from app.virtual_tutor import build_recommendation
+
+
+@dataclass(frozen=True)
+class ModuleReport:
+    module_name: str
+    progress: int
+    struggling: bool
+    last_score: float | None
+    attempts: int
+    cohort_average: float
+    cohort_size: int
+    cohort_rank: int
+    needs_remediation: bool
+
+
+@dataclass(frozen=True)
+class ReportSummary:
+    module_count: int
+    average_progress: float
+    struggling_count: int
+
+
+@dataclass(frozen=True)
+class StudentReportData:
+    user_id: uuid.UUID
+    full_name: str | None
+    email: str
+    summary: ReportSummary
+    modules: list[ModuleReport]
+    generated_at: datetime = field(default_factory=lambda: datetime.now(timezone.utc))
+
+    def to_context(self) -> dict[str, Any]:
+        """Template context for the student report."""
+        return {
+            "generated_at": self.generated_at.strftime("%Y-%m-%d %H:%M UTC"),
+            "student": {"full_name": self.full_name, "email": self.email},
+            "summary": asdict(self.summary),
+            "modules": [asdict(m) for m in self.modules],
+            "recommendations": [
+                build_recommendation(m) for m in self.modules if m.needs_remediation
+            ],
+        }
+
+
+def get_student_report_data(
+    *, session: Session, user_id: uuid.UUID, threshold: int = 60
+) -> StudentReportData | None:
+    """
+    Fetch everything a student report needs with one query.
+
+    Args:
+        session: Database session
+        user_id: The student to report on
+        threshold: Progress below which a module needs remediation (default: 60)
+
+    Returns:
+        The report data, or None if the user does not exist
+    """
+    # Cohort statistics over every student taking one of this student's modules
+    student_modules = select(col(StudentProgress.module_id)).where(
+        col(StudentProgress.user_id) == user_id
+    )
+    cohort = (
+        select(  # type: ignore[call-overload]
+            col(StudentProgress.user_id),
+            col(StudentProgress.module_id),
+            col(StudentProgress.progress),
+            col(StudentProgress.struggling),
+            col(StudentProgress.last_score),
+            col(StudentProgress.attempts),
+            func.avg(col(StudentProgress.progress))
+            .over(partition_by=col(StudentProgress.module_id))
+            .label("cohort_average"),
+            func.count()
+            .over(partition_by=col(StudentProgress.module_id))
+            .label("cohort_size"),
+            func.rank()
+            .over(
+                partition_by=col(StudentProgress.module_id),
+                order_by=col(StudentProgress.progress).desc(),
+            )
+            .label("cohort_rank"),
+        )
+        .where(col(StudentProgress.module_id).in_(student_modules))
+        .subquery()
+    )
+    needs_remediation = cohort.c.struggling.is_(True) | (cohort.c.progress < threshold)
+    statement = (
+        select(  # type: ignore[call-overload]
+            col(User.full_name),
+            col(User.email),
+            col(Module.name).label("module_name"),
+            cohort.c.progress,
+            cohort.c.struggling,
+            cohort.c.last_score,
+            cohort.c.attempts,
+            cohort.c.cohort_average,
+            cohort.c.cohort_size,
+            cohort.c.cohort_rank,
+            needs_remediation.label("needs_remediation"),
+            # Summary of this student's rows, repeated on every row
+            func.count(cohort.c.module_id).over().label("module_count"),
+            func.avg(cohort.c.progress).over().label("average_progress"),
+            func.sum(case((cohort.c.struggling.is_(True), 1), else_=0))
+            .over()
+            .cast(Integer)
+            .label("struggling_count"),
+        )
+        .select_from(User)
+        .outerjoin(cohort, cohort.c.user_id == col(User.id))
+        .outerjoin(Module, col(Module.id) == cohort.c.module_id)
+        .where(col(User.id) == user_id)
+        .order_by(col(Module.name))
+    )
+    rows = session.exec(statement).all()
+    if not rows:
+        return None
+
+    first = rows[0]
+    modules = [
+        ModuleReport(
+            module_name=row.module_name,
+            progress=row.progress,
+            struggling=row.struggling,
+            last_score=row.last_score,
+            attempts=row.attempts,
+            cohort_average=round(float(row.cohort_average), 1),
+            cohort_size=row.cohort_size,
+            cohort_rank=row.cohort_rank,
+            needs_remediation=bool(row.needs_remediation),
+        )
+        for row in rows
+        if row.module_name is not None
+    ]
+    return StudentReportData(
+        user_id=user_id,
+        full_name=first.full_name,
+        email=first.email,
+        summary=ReportSummary(
+            module_count=first.module_count,
+            average_progress=round(float(first.average_progress or 0), 1),
+            struggling_count=first.struggling_count or 0,
+        ),
+        modules=modules,
+    )
+
+
+@dataclass(frozen=True)
+class ClassMember:
+    full_name: str | None
+    email: str
+    module_count: int
+    average_progress: float
+    struggling_count: int
+
+
+def get_class_report_members(
+    *, session: Session, user_ids: list[uuid.UUID]
+) -> list[ClassMember]:
+    """Per-student aggregates for a class report, computed with one GROUP BY."""
+    statement = (
+        select(  # type: ignore[call-overload]
+            col(User.full_name),
+            col(User.email),
+            func.count(col(StudentProgress.id)).label("module_count"),
+            func.avg(col(StudentProgress.progress)).label("average_progress"),
+            func.sum(
+                case((col(StudentProgress.struggling).is_(True), 1), else_=0)
+            ).label("struggling_count"),
+        )
+        .select_from(User)
+        .outerjoin(StudentProgress, col(StudentProgress.user_id) == col(User.id))
+        .where(col(User.id).in_(user_ids))
+        .group_by(col(User.id), col(User.full_name), col(User.email))
+        .order_by(col(User.full_name), col(User.email))
+    )
+    return [
+        ClassMember(
+            full_name=row.full_name,
+            email=row.email,
+            module_count=row.module_count,
+            average_progress=round(float(row.average_progress or 0), 1),
+            struggling_count=int(row.struggling_count or 0),
+        )
+        for row in session.exec(statement).all()
+    ]
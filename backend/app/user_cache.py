@@ -0,0 +1,198 @@
+"""Per-process cache of the users resolved from access tokens.
+
+``deps.get_current_user`` needs the token's user on every authenticated
+request, only to check ``is_active`` and ``is_superuser``. The cache keeps
+a detached copy of recently seen users, least recently used first out,
+each for ``USER_CACHE_TTL_SECONDS``. A hit is merged into the request's
+session with ``load=False``, which attaches it without a query, so routes
+get a session-bound User as before.
+
+Changes made through ``crud.update_user`` and app.user_deletion invalidate
+the entry at once and again when their transaction commits; other
+processes see the change when their entry expires. Deployments that
+cannot accept that delay set ``USER_CACHE_ENABLED=false``.
+
+Self-contained access tokens (``ACCESS_TOKEN_CLAIMS``) are checked without
+the database at all. ``revoke_tokens`` bumps a user's token version, and
+``token_revocations`` refuses older tokens in this process for as long as
+one of them may be unexpired.
+"""
+
+import threading
+import time
+import uuid
+from collections import OrderedDict
+
+from sqlalchemy import event, orm, update
+from sqlalchemy.orm import make_transient_to_detached
+from sqlalchemy.orm.attributes import set_committed_value
+from sqlmodel import Session, col
+from sqlmodel.ext.asyncio.session import AsyncSession
+
+from app.core.config import settings
+from app.core.metrics import REGISTRY, LabelValues
+from app.models import User
+
+USER_CACHE_REQUESTS = REGISTRY.counter(
+    "btec_user_cache_requests", "User lookups by get_current_user.", ("result",)
+)
+
+
+class UserCache:
+    def __init__(
+        self, *, ttl_seconds: float, max_size: int, enabled: bool = True
+    ) -> None:
+        self.ttl_seconds = ttl_seconds
+        self.max_size = max_size
+        self.enabled = enabled
+        self._users: OrderedDict[uuid.UUID, tuple[float, User]] = OrderedDict()
+        # Bumped by every invalidation, so a lookup that raced with one
+        # does not put the user it read before the change
+        self._version = 0
+        self._hits = 0
+        self._misses = 0
+        self._lock = threading.Lock()
+
+    def __len__(self) -> int:
+        return len(self._users)
+
+    def hit_ratio(self) -> dict[LabelValues, float]:
+        with self._lock:
+            lookups = self._hits + self._misses
+            return {(): self._hits / lookups if lookups else 0.0}
+
+    def _get(self, user_id: uuid.UUID) -> User | None:
+        with self._lock:
+            entry = self._users.get(user_id)
+            if entry is not None and entry[0] > time.monotonic():
+                self._users.move_to_end(user_id)
+                self._hits += 1
+                USER_CACHE_REQUESTS.inc(result="hit")
+                return entry[1]
+            if entry is not None:
+                del self._users[user_id]
+            self._misses += 1
+            USER_CACHE_REQUESTS.inc(result="miss")
+            return None
+
+    def _put(self, user: User, version: int) -> None:
+        # A copy outside any session; the caller keeps its own instance
+        detached = User(**{name: getattr(user, name) for name in User.model_fields})
+        make_transient_to_detached(detached)
+        with self._lock:
+            if version != self._version:
+                return
+            self._users[detached.id] = (time.monotonic() + self.ttl_seconds, detached)
+            self._users.move_to_end(detached.id)
+            while len(self._users) > self.max_size:
+                self._users.popitem(last=False)
+
+    def get_user(self, *, session: Session, user_id: uuid.UUID | None) -> User | None:
+        """The user with ``user_id`` bound to ``session``, None if there is none."""
+        if not self.enabled or user_id is None:
+            return session.get(User, user_id)
+        cached = self._get(user_id)
+        if cached is not None:
+            return session.merge(cached, load=False)
+        version = self._version
+        user = session.get(User, user_id)
+        if user is not None:
+            self._put(user, version)
+        return user
+
+    async def get_user_async(
+        self, *, session: AsyncSession, user_id: uuid.UUID | None
+    ) -> User | None:
+        if not self.enabled or user_id is None:
+            return await session.get(User, user_id)
+        cached = self._get(user_id)
+        if cached is not None:
+            return await session.merge(cached, load=False)
+        version = self._version
+        user = await session.get(User, user_id)
+        if user is not None:
+            self._put(user, version)
+        return user
+
+    def invalidate(self, user_id: uuid.UUID) -> None:
+        with self._lock:
+            self._version += 1
+            self._users.pop(user_id, None)
+
+    def invalidate_on_commit(self, session: Session, user_id: uuid.UUID) -> None:
+        """Invalidate now and once more when ``session`` commits."""
+        self.invalidate(user_id)
+        event.listen(
+            session, "after_commit", lambda _: self.invalidate(user_id), once=True
+        )
+
+    def clear(self) -> None:
+        with self._lock:
+            self._version += 1
+            self._users.clear()
+
+
+class TokenRevocations:
+    """Per user, the lowest token version still accepted by this process."""
+
+    def __init__(self, *, retention_seconds: float) -> None:
+        self.retention_seconds = retention_seconds
+        # user ID -> (lowest valid version, time the entry may be dropped)
+        self._revoked: dict[uuid.UUID, tuple[int, float]] = {}
+        self._lock = threading.Lock()
+
+    def __len__(self) -> int:
+        return len(self._revoked)
+
+    def revoke(self, user_id: uuid.UUID, version: int) -> None:
+        """Refuse the user's tokens older than ``version``."""
+        now = time.monotonic()
+        with self._lock:
+            # Tokens issued before an expired entry have expired too
+            for expired in [
+                k for k, (_, until) in self._revoked.items() if until <= now
+            ]:
+                del self._revoked[expired]
+            lowest = max(version, self._revoked.get(user_id, (version, 0))[0])
+            self._revoked[user_id] = (lowest, now + self.retention_seconds)
+
+    def is_revoked(self, user_id: uuid.UUID, version: int) -> bool:
+        with self._lock:
+            entry = self._revoked.get(user_id)
+        return entry is not None and version < entry[0] and entry[1] > time.monotonic()
+
+
+def revoke_tokens(session: orm.Session, user: User) -> None:
+    """Bump the user's token version, refusing older tokens once ``session`` commits."""
+    # In SQL: with ACCESS_TOKEN_CLAIMS, ``user`` is built from a token and
+    # holds that token's version, which another process may have bumped since
+    user_id = user.id
+    version: int = session.execute(
+        update(User)
+        .where(col(User.id) == user_id)
+        .values(token_version=col(User.token_version) + 1)
+        .returning(col(User.token_version))
+        .execution_options(synchronize_session=False)
+    ).scalar_one()
+    set_committed_value(user, "token_version", version)
+    event.listen(
+        session,
+        "after_commit",
+        lambda _: token_revocations.revoke(user_id, version),
+        once=True,
+    )
+
+
+user_cache = UserCache(
+    ttl_seconds=settings.USER_CACHE_TTL_SECONDS,
+    max_size=settings.USER_CACHE_MAX_SIZE,
+    enabled=settings.USER_CACHE_ENABLED,
+)
+token_revocations = TokenRevocations(
+    retention_seconds=settings.ACCESS_TOKEN_CLAIMS_EXPIRE_MINUTES * 60
+)
+REGISTRY.gauge(
+    "btec_user_cache_hit_ratio",
+    "Share of get_current_user lookups answered from the cache.",
+    callback=user_cache.hit_ratio,
+)
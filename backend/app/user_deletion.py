@@ -0,0 +1,97 @@
+"""Delete users with large histories in bounded batches.
+
+Deleting a User through the ORM would load every item, progress row and
+progress event of the account into memory first, then delete them in one
+long transaction holding row locks on all of them. Instead the rows of
+each child table are deleted ``batch_size`` at a time, each batch in its
+own short transaction, and the user row goes last. A failed deletion can
+simply be run again. The foreign keys are ON DELETE CASCADE, and the
+relationships use passive deletes, so deleting a user directly never
+loads its children either.
+
+The API runs deletions as background jobs tracked in process memory,
+which nothing resumes after a restart. The account is deactivated before
+any row is deleted, so an interrupted deletion leaves an inactive user
+with part of its rows; deleting it again completes it.
+"""
+
+import uuid
+from collections.abc import Callable
+from typing import Any, cast
+
+from sqlalchemy import CursorResult, delete, func
+from sqlmodel import Session, col, select
+
+from app.models import Item, ProgressEvent, StudentProgress, User
+from app.user_cache import revoke_tokens, user_cache
+
+DELETE_BATCH_SIZE = 5000
+
+# Child tables with the column referencing the user, deleted in this order
+USER_ROWS: list[tuple[Any, Any]] = [
+    (Item, Item.owner_id),
+    (StudentProgress, StudentProgress.user_id),
+    (ProgressEvent, ProgressEvent.user_id),
+]
+
+
+def count_user_rows(*, session: Session, user_id: uuid.UUID) -> int:
+    """Rows deleted along with a user, not counting the user row."""
+    return sum(
+        session.exec(select(func.count()).where(column == user_id)).one()
+        for _, column in USER_ROWS
+    )
+
+
+def deactivate_user(*, session: Session, user: User) -> None:
+    """Lock the account out at once, before its rows are deleted."""
+    user.is_active = False
+    revoke_tokens(session, user)
+    session.add(user)
+    user_cache.invalidate_on_commit(session, user.id)
+    session.commit()
+
+
+def delete_user(
+    *,
+    session: Session,
+    user_id: uuid.UUID,
+    batch_size: int = DELETE_BATCH_SIZE,
+    on_progress: Callable[[int], None] | None = None,
+) -> int:
+    """
+    Delete a user and everything they own, ``batch_size`` rows per transaction.
+
+    Args:
+        session: Database session
+        user_id: User to delete
+        batch_size: Rows deleted per statement and transaction
+        on_progress: Called with the number of rows deleted by each batch
+
+    Returns:
+        Number of rows deleted, not counting the user row
+    """
+    deleted = 0
+    for model, column in USER_ROWS:
+        while True:
+            batch = select(model.id).where(column == user_id).limit(batch_size)
+            # DELETE returns a CursorResult, which has the rowcount
+            result = cast(
+                CursorResult[Any],
+                session.execute(
+                    delete(model)
+                    .where(col(model.id).in_(batch.scalar_subquery()))
+                    .execution_options(synchronize_session=False)
+                ),
+            )
+            session.commit()
+            if result.rowcount:
+                deleted += result.rowcount
+                if on_progress:
+                    on_progress(result.rowcount)
+            if result.rowcount < batch_size:
+                break
+    session.execute(delete(User).where(col(User.id) == user_id))
+    session.commit()
+    user_cache.invalidate(user_id)
+    return deleted
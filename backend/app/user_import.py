@@ -0,0 +1,228 @@
+"""Bulk user import from CSV or JSON Lines, for onboarding a whole school.
+
+``crud.create_user`` hashes a password with bcrypt, a quarter of a second
+of CPU, and commits for every user. Here the rows are validated against
+``UserCreate`` in chunks, the passwords of a chunk are hashed in parallel
+on a process pool, and the chunk is written with a single multi-row
+INSERT ... ON CONFLICT (email) DO NOTHING. Duplicate emails, already in
+the database or repeated in the input, are reported per row and never
+fail the rest of the chunk.
+
+Each chunk is committed on its own. Rows already imported are reported
+as duplicates, so an interrupted import can simply be run again.
+
+    python -m app.user_import students.csv
+    python -m app.user_import --format jsonl - < students.jsonl
+"""
+
+import argparse
+import functools
+import logging
+import multiprocessing
+import sys
+import time
+from collections.abc import Callable
+from concurrent.futures import Executor, ProcessPoolExecutor
+from pathlib import Path
+from typing import IO, Any
+
+from pydantic import ValidationError
+from sqlalchemy.dialects import postgresql, sqlite
+from sqlmodel import Session, col, select
+
+from app.core.config import settings
+from app.core.metrics import REGISTRY
+from app.core.security import get_password_hash
+from app.ingest import (
+    IngestFormat,
+    IngestReport,
+    chunked,
+    iter_records,
+    validation_message,
+)
+from app.models import User, UserCreate
+
+logger = logging.getLogger(__name__)
+
+CHUNK_SIZE = 500
+# Passwords sent to a worker process at a time
+HASH_BATCH_SIZE = 16
+
+IMPORT_ROWS = REGISTRY.counter(
+    "btec_user_import_rows", "User rows processed by bulk import.", ("result",)
+)
+
+DUPLICATE_EMAIL = "email: User with this email already exists"
+
+# A validated row: (line number, user)
+ValidRow = tuple[int, UserCreate]
+
+
+@functools.cache
+def _hash_pool() -> Executor:
+    # Created on first use so importing the API does not spawn processes.
+    # The API process runs threads, which do not survive fork().
+    return ProcessPoolExecutor(
+        max_workers=settings.USER_IMPORT_WORKERS,
+        mp_context=multiprocessing.get_context("spawn"),
+    )
+
+
+def hash_passwords(passwords: list[str], executor: Executor | None = None) -> list[str]:
+    """Hash passwords in parallel, in input order."""
+    return list(
+        (executor or _hash_pool()).map(
+            get_password_hash, passwords, chunksize=HASH_BATCH_SIZE
+        )
+    )
+
+
+def _validate_chunk(
+    records: list[tuple[int, dict[str, Any] | None]], report: IngestReport
+) -> list[ValidRow]:
+    rows = []
+    emails = set()
+    for line, record in records:
+        report.total += 1
+        if record is None:
+            report.add_error(line, "Malformed record")
+            continue
+        try:
+            user_in = UserCreate.model_validate(record)
+        except ValidationError as e:
+            report.add_error(line, validation_message(e))
+            continue
+        if user_in.email in emails:
+            report.add_error(line, DUPLICATE_EMAIL)
+            continue
+        emails.add(user_in.email)
+        rows.append((line, user_in))
+    return rows
+
+
+def _load_chunk(
+    session: Session,
+    rows: list[ValidRow],
+    report: IngestReport,
+    executor: Executor | None,
+) -> None:
+    existing = set(
+        session.exec(
+            select(User.email).where(col(User.email).in_([u.email for _, u in rows]))
+        ).all()
+    )
+    new_rows = []
+    for line, user_in in rows:
+        if user_in.email in existing:
+            report.add_error(line, DUPLICATE_EMAIL)
+        else:
+            new_rows.append((line, user_in))
+    if not new_rows:
+        return
+    # Only hashed once the duplicates are out, hashing is the expensive part
+    hashes = hash_passwords([u.password for _, u in new_rows], executor)
+    values = [
+        User.model_validate(user_in, update={"hashed_password": hashed}).model_dump()
+        for (_, user_in), hashed in zip(new_rows, hashes, strict=True)
+    ]
+    dialect_insert = (
+        postgresql.insert
+        if session.get_bind().dialect.name == "postgresql"
+        else sqlite.insert
+    )
+    inserted: set[str] = set(
+        session.execute(
+            dialect_insert(User)
+            .values(values)
+            .on_conflict_do_nothing(index_elements=["email"])
+            .returning(col(User.email))
+        ).scalars()
+    )
+    session.commit()
+    # Created by someone else since the lookup above
+    for line, user_in in new_rows:
+        if user_in.email not in inserted:
+            report.add_error(line, DUPLICATE_EMAIL)
+    report.loaded += len(inserted)
+
+
+def import_users(
+    *,
+    session: Session,
+    stream: IO[str],
+    fmt: IngestFormat = "csv",
+    chunk_size: int = CHUNK_SIZE,
+    executor: Executor | None = None,
+    report: IngestReport | None = None,
+    on_progress: Callable[[IngestReport], None] | None = None,
+) -> IngestReport:
+    """
+    Create users from a CSV or JSON Lines stream of ``UserCreate`` records.
+
+    Args:
+        session: Database session
+        stream: Text stream with a header row (CSV) or one object per line (JSONL)
+        fmt: Input format, "csv" or "jsonl" (default: "csv")
+        chunk_size: Rows hashed, inserted and committed together
+        executor: Executor hashing the passwords, a process pool by default
+        report: Report to update, for callers that poll it while importing
+        on_progress: Called with the report after every chunk
+
+    Returns:
+        The report with row counts, error rows and throughput
+    """
+    report = report or IngestReport()
+    for records in chunked(iter_records(stream, fmt), chunk_size):
+        loaded, failed = report.loaded, report.failed
+        rows = _validate_chunk(records, report)
+        if rows:
+            _load_chunk(session, rows, report, executor)
+        IMPORT_ROWS.inc(report.loaded - loaded, result="loaded")
+        IMPORT_ROWS.inc(report.failed - failed, result="failed")
+        if on_progress:
+            on_progress(report)
+    report.finished_at = time.perf_counter()
+    return report
+
+
+def _log_progress(report: IngestReport) -> None:
+    logger.info(
+        "%d rows read, %d users created, %d failed (%.0f rows/s)",
+        report.total,
+        report.loaded,
+        report.failed,
+        report.rows_per_second,
+    )
+
+
+def main() -> None:
+    from app.core.db import engine
+
+    parser = argparse.ArgumentParser(description="Bulk import users.")
+    parser.add_argument("path", help="Input file, or - for standard input")
+    parser.add_argument("--format", choices=("csv", "jsonl"), default=None)
+    parser.add_argument("--chunk-size", type=int, default=CHUNK_SIZE)
+    args = parser.parse_args()
+
+    fmt: IngestFormat = args.format or (
+        "jsonl" if args.path.endswith((".jsonl", ".ndjson")) else "csv"
+    )
+    with (
+        sys.stdin if args.path == "-" else Path(args.path).open(newline="") as stream,
+        Session(engine) as session,
+    ):
+        report = import_users(
+            session=session,
+            stream=stream,
+            fmt=fmt,
+            chunk_size=args.chunk_size,
+            on_progress=_log_progress,
+        )
+    _log_progress(report)
+    for error in report.errors:
+        logger.warning("line %d: %s", error.line, error.message)
+
+
+if __name__ == "__main__":
+    logging.basicConfig(level=logging.INFO)
+    main()
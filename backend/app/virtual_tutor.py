@@ -1,8 +1,9 @@
 """Virtual tutor logic for recommending remediation based on student progress."""
 
 from sqlmodel import Session
+from sqlmodel.ext.asyncio.session import AsyncSession
 
-from app import crud
+from app import async_crud, crud
 from app.models import User
 
 
@@ -24,20 +25,44 @@ def recommend_remediation(
         session=session, user_id=user.id, progress_threshold=threshold
     )
 
-    recommendations = []
-    for module_progress in struggling_modules:
-        recommendation = {
-            "module_name": module_progress.module_name,
-            "current_progress": module_progress.progress,
-            "last_score": module_progress.last_score,
-            "attempts": module_progress.attempts,
-            "struggling": module_progress.struggling,
-            "recommended_action": _get_recommended_action(module_progress),
-            "resources": _get_recommended_resources(module_progress),
-        }
-        recommendations.append(recommendation)
-
-    return recommendations
+    return [
+        build_recommendation(module_progress) for module_progress in struggling_modules
+    ]
+
+
+async def recommend_remediation_async(
+    *, session: AsyncSession, user: User, threshold: int = 60
+) -> list[dict]:
+    """Async version of recommend_remediation, for routes on AsyncSessionDep."""
+    struggling_modules = await async_crud.get_struggling_modules_for_user(
+        session=session, user_id=user.id, progress_threshold=threshold
+    )
+
+    return [
+        build_recommendation(module_progress) for module_progress in struggling_modules
+    ]
+
+
+def build_recommendation(module_progress) -> dict:
+    """
+    Build the recommendation for one struggling module.
+
+    Args:
+        module_progress: Any object with the StudentProgress fields, e.g. a
+            StudentProgress row or a report data module
+
+    Returns:
+        Dictionary containing module info and recommended actions
+    """
+    return {
+        "module_name": module_progress.module_name,
+        "current_progress": module_progress.progress,
+        "last_score": module_progress.last_score,
+        "attempts": module_progress.attempts,
+        "struggling": module_progress.struggling,
+        "recommended_action": _get_recommended_action(module_progress),
+        "resources": _get_recommended_resources(module_progress),
+    }
 
 
 def _get_recommended_action(module_progress) -> str:
@@ -0,0 +1,118 @@
+"""p99 latency of a sync SessionDep route against an async one, against PostgreSQL.
+
+    python -m benchmarks.async_load --concurrency 200 --requests 4000 --sleep-ms 20
+
+Both routes run the tutor's struggling-modules query for one student,
+optionally after a pg_sleep() standing in for a slower query. The sync
+route runs on Starlette's threadpool (40 threads), so past 40 concurrent
+requests it queues. The async route awaits the database on the event loop.
+Both engines get a pool as large as the concurrency, so the pool is not
+the bottleneck.
+"""
+
+import argparse
+import asyncio
+import time
+import uuid
+from collections.abc import AsyncGenerator, Generator
+
+import httpx
+from fastapi import Depends, FastAPI
+from sqlalchemy import text
+from sqlalchemy.ext.asyncio import create_async_engine
+from sqlmodel import Session, create_engine
+from sqlmodel.ext.asyncio.session import AsyncSession
+
+from app import async_crud, crud
+from app.core.config import settings
+from app.models import StudentProgressCreate, UserCreate
+from benchmarks.utils import logger, report
+
+
+def build_app(args: argparse.Namespace, user_id: uuid.UUID) -> FastAPI:
+    url = str(settings.SQLALCHEMY_DATABASE_URI)
+    engine = create_engine(url, pool_size=args.concurrency)
+    async_engine = create_async_engine(url, pool_size=args.concurrency)
+    sleep = text("SELECT pg_sleep(:s)").bindparams(s=args.sleep_ms / 1000)
+    app = FastAPI()
+
+    def get_db() -> Generator[Session, None, None]:
+        with Session(engine) as session:
+            yield session
+
+    async def get_async_db() -> AsyncGenerator[AsyncSession, None]:
+        async with AsyncSession(async_engine, expire_on_commit=False) as session:
+            yield session
+
+    @app.get("/sync")
+    def sync_route(session: Session = Depends(get_db)) -> int:
+        if args.sleep_ms:
+            session.execute(sleep)
+        return len(crud.get_struggling_modules_for_user(session=session, user_id=user_id))
+
+    @app.get("/async")
+    async def async_route(session: AsyncSession = Depends(get_async_db)) -> int:
+        if args.sleep_ms:
+            await session.execute(sleep)
+        modules = await async_crud.get_struggling_modules_for_user(
+            session=session, user_id=user_id
+        )
+        return len(modules)
+
+    return app
+
+
+async def load(app: FastAPI, path: str, args: argparse.Namespace) -> None:
+    semaphore = asyncio.Semaphore(args.concurrency)
+    latencies: list[float] = []
+    transport = httpx.ASGITransport(app=app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://bench") as client:
+
+        async def one() -> None:
+            async with semaphore:
+                started = time.perf_counter()
+                r = await client.get(path)
+                r.raise_for_status()
+                latencies.append(time.perf_counter() - started)
+
+        # Warm up the pools before measuring
+        await asyncio.gather(*(one() for _ in range(args.concurrency)))
+        latencies.clear()
+        started = time.perf_counter()
+        await asyncio.gather(*(one() for _ in range(args.requests)))
+        elapsed = time.perf_counter() - started
+    report(f"{path} c={args.concurrency}", latencies)
+    logger.info("%-28s %.0f req/s", "", len(latencies) / elapsed)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--concurrency", type=int, default=200)
+    parser.add_argument("--requests", type=int, default=4000)
+    parser.add_argument("--sleep-ms", type=float, default=20)
+    args = parser.parse_args()
+
+    from app.core.db import engine
+
+    with Session(engine) as session:
+        email = "bench-async@example.com"
+        user = crud.get_user_by_email(session=session, email=email) or crud.create_user(
+            session=session,
+            user_create=UserCreate(email=email, password="benchmark-password"),
+        )
+        for i in range(10):
+            crud.create_or_update_student_progress(
+                session=session,
+                user_id=user.id,
+                progress_in=StudentProgressCreate(
+                    module_name=f"bench-module-{i}", progress=i * 10
+                ),
+            )
+
+    app = build_app(args, user.id)
+    asyncio.run(load(app, "/sync", args))
+    asyncio.run(load(app, "/async", args))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,138 @@
+"""Login throughput and p99 latency at 500 concurrent logins, against PostgreSQL.
+
+    python -m benchmarks.login_load --concurrency 500 --requests 2000
+
+Compares a sync route calling crud.authenticate on Starlette's threadpool,
+as the login did before, with async_crud.authenticate on the bounded
+password hasher (PASSWORD_HASH_WORKERS, PASSWORD_HASH_MAX_QUEUE). While
+the logins run, a probe requests a trivial sync route every 50 ms; its
+latency shows whether logins starve the other endpoints. Logins refused
+with a 503 are counted and left out of the latencies.
+"""
+
+import argparse
+import asyncio
+import time
+from collections.abc import AsyncGenerator, Generator
+
+import httpx
+from fastapi import Depends, FastAPI, Form, HTTPException
+from sqlalchemy.ext.asyncio import create_async_engine
+from sqlmodel import Session, create_engine
+from sqlmodel.ext.asyncio.session import AsyncSession
+
+from app import async_crud, crud
+from app.core.config import settings
+from app.core.security import PasswordHasherBusy, password_hasher
+from app.models import UserCreate
+from benchmarks.utils import logger, report
+
+EMAIL = "bench-login@example.com"
+PASSWORD = "benchmark-password"
+
+
+def build_app(args: argparse.Namespace) -> FastAPI:
+    url = str(settings.SQLALCHEMY_DATABASE_URI)
+    engine = create_engine(url, pool_size=50, max_overflow=args.concurrency)
+    async_engine = create_async_engine(url, pool_size=50, max_overflow=args.concurrency)
+    app = FastAPI()
+
+    def get_db() -> Generator[Session, None, None]:
+        with Session(engine) as session:
+            yield session
+
+    async def get_async_db() -> AsyncGenerator[AsyncSession, None]:
+        async with AsyncSession(async_engine, expire_on_commit=False) as session:
+            yield session
+
+    @app.post("/sync")
+    def sync_login(
+        username: str = Form(), password: str = Form(), session: Session = Depends(get_db)
+    ) -> bool:
+        return crud.authenticate(session=session, email=username, password=password) is not None
+
+    @app.post("/async")
+    async def async_login(
+        username: str = Form(),
+        password: str = Form(),
+        session: AsyncSession = Depends(get_async_db),
+    ) -> bool:
+        try:
+            user = await async_crud.authenticate(
+                session=session, email=username, password=password
+            )
+        except PasswordHasherBusy:
+            raise HTTPException(status_code=503)
+        return user is not None
+
+    @app.get("/ping")
+    def ping() -> str:
+        return "pong"
+
+    return app
+
+
+async def load(app: FastAPI, path: str, args: argparse.Namespace) -> None:
+    semaphore = asyncio.Semaphore(args.concurrency)
+    latencies: list[float] = []
+    probes: list[float] = []
+    rejected = 0
+    done = asyncio.Event()
+    transport = httpx.ASGITransport(app=app)
+    async with httpx.AsyncClient(
+        transport=transport, base_url="http://bench", timeout=None
+    ) as client:
+
+        async def one() -> None:
+            nonlocal rejected
+            async with semaphore:
+                started = time.perf_counter()
+                r = await client.post(path, data={"username": EMAIL, "password": PASSWORD})
+                if r.status_code == 503:
+                    rejected += 1
+                    return
+                r.raise_for_status()
+                latencies.append(time.perf_counter() - started)
+
+        async def probe() -> None:
+            while not done.is_set():
+                started = time.perf_counter()
+                (await client.get("/ping")).raise_for_status()
+                probes.append(time.perf_counter() - started)
+                await asyncio.sleep(0.05)
+
+        prober = asyncio.create_task(probe())
+        started = time.perf_counter()
+        await asyncio.gather(*(one() for _ in range(args.requests)))
+        elapsed = time.perf_counter() - started
+        done.set()
+        await prober
+    report(f"{path} c={args.concurrency}", latencies)
+    report(f"{path} /ping during load", probes)
+    logger.info(
+        "%-28s %.1f logins/s, %d rejected with 503", "", len(latencies) / elapsed, rejected
+    )
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--concurrency", type=int, default=500)
+    parser.add_argument("--requests", type=int, default=2000)
+    args = parser.parse_args()
+
+    from app.core.db import engine
+
+    with Session(engine) as session:
+        if not crud.get_user_by_email(session=session, email=EMAIL):
+            crud.create_user(
+                session=session, user_create=UserCreate(email=EMAIL, password=PASSWORD)
+            )
+
+    app = build_app(args)
+    asyncio.run(load(app, "/sync", args))
+    asyncio.run(load(app, "/async", args))
+    password_hasher.shutdown()
+
+
+if __name__ == "__main__":
+    main()
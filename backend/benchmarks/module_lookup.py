@@ -0,0 +1,72 @@
+"""Size of studentprogress and by-module lookups on 10M rows, against PostgreSQL.
+
+    python -m benchmarks.module_lookup --users 200000 --modules 50
+
+Loads the same rows as benchmarks.struggling_index, then reports the size
+of the table and of each of its indexes, and the latency of
+crud.get_student_progress_by_module for random students and modules.
+Run it before and after a schema change to compare.
+"""
+
+import argparse
+import random
+import time
+
+from sqlalchemy import text
+from sqlmodel import Session
+
+from app import crud
+from app.core.db import engine
+from benchmarks.struggling_index import EMAIL_DOMAIN, cleanup, load, vacuum
+from benchmarks.utils import logger, report
+
+SIZES = text(
+    """
+    SELECT relname, pg_relation_size(oid) FROM pg_class
+    WHERE oid = 'studentprogress'::regclass
+       OR oid IN (SELECT indexrelid FROM pg_index WHERE indrelid = 'studentprogress'::regclass)
+    ORDER BY relname
+    """
+)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--users", type=int, default=200_000)
+    parser.add_argument("--modules", type=int, default=50)
+    parser.add_argument("--lookups", type=int, default=5000)
+    parser.add_argument("--keep", action="store_true")
+    args = parser.parse_args()
+
+    with Session(engine) as session:
+        load(session, args.users, args.modules)
+        vacuum()
+        for name, size in session.execute(SIZES):
+            logger.info("%-45s %8.1f MB", name, size / 1024**2)
+
+        user_ids = list(
+            session.execute(
+                text("SELECT id FROM \"user\" WHERE email LIKE :pattern"),
+                {"pattern": f"%@{EMAIL_DOMAIN}"},
+            ).scalars()
+        )
+        modules = [f"Unit {m}" for m in range(1, args.modules + 1)]
+        latencies = []
+        for _ in range(args.lookups):
+            user_id, module_name = random.choice(user_ids), random.choice(modules)
+            started = time.perf_counter()
+            progress = crud.get_student_progress_by_module(
+                session=session, user_id=user_id, module_name=module_name
+            )
+            latencies.append(time.perf_counter() - started)
+            assert progress is not None
+            # Measure the lookup, not the identity map
+            session.expunge(progress)
+        report("progress by module", latencies)
+
+        if not args.keep:
+            cleanup(session)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,119 @@
+"""Progress write throughput under concurrent writers, against PostgreSQL.
+
+    python -m benchmarks.progress_upsert --writers 32 --writes 200
+
+Compares the previous read-then-write path (SELECT, INSERT or UPDATE,
+COMMIT, refresh) with crud.create_or_update_student_progress, which is a
+single INSERT ... ON CONFLICT DO UPDATE. Writers share a small set of
+(user, module) keys so they collide. With the unique index in place the
+old path fails with IntegrityError when two writers race on a new key;
+without it, those races created duplicate rows.
+"""
+
+import argparse
+import random
+import time
+import uuid
+from collections.abc import Callable
+from concurrent.futures import ThreadPoolExecutor
+
+from sqlalchemy.exc import IntegrityError
+from sqlmodel import Session, delete, select
+
+from app import crud
+from app.core.db import engine
+from app.models import StudentProgress, StudentProgressCreate, User, UserCreate
+from benchmarks.utils import logger, report
+
+Writer = Callable[[Session, uuid.UUID, StudentProgressCreate], None]
+
+
+def legacy_write(
+    session: Session, user_id: uuid.UUID, progress_in: StudentProgressCreate
+) -> None:
+    existing = crud.get_student_progress_by_module(
+        session=session, user_id=user_id, module_name=progress_in.module_name
+    )
+    if existing:
+        crud.set_student_progress_fields(
+            session=session, progress_obj=existing, progress_update=progress_in
+        )
+        return
+    db_progress = StudentProgress.model_validate(
+        progress_in, update={"user_id": user_id}
+    )
+    session.add(db_progress)
+    session.commit()
+    session.refresh(db_progress)
+
+
+def upsert_write(
+    session: Session, user_id: uuid.UUID, progress_in: StudentProgressCreate
+) -> None:
+    crud.create_or_update_student_progress(
+        session=session, user_id=user_id, progress_in=progress_in
+    )
+
+
+def run(name: str, write: Writer, users: list[uuid.UUID], args: argparse.Namespace) -> None:
+    with Session(engine) as session:
+        session.exec(delete(StudentProgress).where(StudentProgress.user_id.in_(users)))  # type: ignore[attr-defined]
+        session.commit()
+    modules = [f"bench-module-{i}" for i in range(args.modules)]
+    errors = 0
+
+    def writer(seed: int) -> list[float]:
+        nonlocal errors
+        rng = random.Random(seed)
+        latencies = []
+        with Session(engine) as session:
+            for _ in range(args.writes):
+                progress_in = StudentProgressCreate(
+                    module_name=rng.choice(modules), progress=rng.randint(0, 100)
+                )
+                started = time.perf_counter()
+                try:
+                    write(session, rng.choice(users), progress_in)
+                except IntegrityError:
+                    session.rollback()
+                    errors += 1
+                latencies.append(time.perf_counter() - started)
+        return latencies
+
+    started = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=args.writers) as pool:
+        results = list(pool.map(writer, range(args.writers)))
+    elapsed = time.perf_counter() - started
+    latencies = [latency for result in results for latency in result]
+    report(name, latencies)
+    logger.info(
+        "%-28s %.0f writes/s, %d conflict errors", "", len(latencies) / elapsed, errors
+    )
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--writers", type=int, default=32)
+    parser.add_argument("--writes", type=int, default=200)
+    parser.add_argument("--users", type=int, default=20)
+    parser.add_argument("--modules", type=int, default=10)
+    args = parser.parse_args()
+
+    with Session(engine) as session:
+        users = []
+        for i in range(args.users):
+            email = f"bench-upsert-{i}@example.com"
+            user = session.exec(select(User).where(User.email == email)).first()
+            if not user:
+                user = crud.create_user(
+                    session=session,
+                    user_create=UserCreate(email=email, password="benchmark-password"),
+                )
+            users.append(user.id)
+
+    run("before (select + write)", legacy_write, users, args)
+    run("after (single upsert)", upsert_write, users, args)
+
+
+if __name__ == "__main__":
+    main()
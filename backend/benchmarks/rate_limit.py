@@ -0,0 +1,112 @@
+"""Per-request overhead of RateLimitMiddleware, no server or database needed.
+
+    python -m benchmarks.rate_limit --requests 200000
+    python -m benchmarks.rate_limit --redis redis://localhost:6379/0
+
+Calls the middleware directly, in front of an ASGI app that does nothing,
+for a route without limits, a route limited per IP, and one limited per
+IP and per user, where the bearer token is verified as well. Clients are
+spread over --clients addresses so counters keep being created and found,
+and the limits are high enough that every request is let through. Reports
+the mean time per request, and the overhead against no middleware at all.
+"""
+
+import argparse
+import asyncio
+import time
+import uuid
+from datetime import timedelta
+
+from starlette.types import Message, Receive, Scope, Send
+
+from app.core.rate_limit import (
+    MemoryRateLimitBackend,
+    RateLimitBackend,
+    RateLimitMiddleware,
+    RedisRateLimitBackend,
+)
+from app.core.security import create_access_token
+from benchmarks.utils import logger
+
+ROUTES = {
+    "POST /limited/ip": "ip:1000000/minute",
+    "POST /limited/user": "ip:1000000/minute,user:1000000/minute",
+}
+
+
+async def noop_app(scope: Scope, receive: Receive, send: Send) -> None:
+    pass
+
+
+async def receive() -> Message:
+    return {"type": "http.request", "body": b""}
+
+
+async def send(message: Message) -> None:
+    pass
+
+
+def scopes(path: str, clients: int, token: str | None) -> list[Scope]:
+    headers = [(b"authorization", f"Bearer {token}".encode())] if token else []
+    return [
+        {
+            "type": "http",
+            "method": "POST",
+            "path": path,
+            "headers": headers,
+            "client": (f"10.0.{i // 256}.{i % 256}", 50000),
+        }
+        for i in range(clients)
+    ]
+
+
+async def measure(app: object, requests: list[Scope]) -> float:
+    """Mean seconds per request."""
+    started = time.perf_counter()
+    for scope in requests:
+        await app(scope, receive, send)  # type: ignore[operator]
+    return (time.perf_counter() - started) / len(requests)
+
+
+async def run(args: argparse.Namespace) -> None:
+    backend: RateLimitBackend = (
+        RedisRateLimitBackend(args.redis)
+        if args.redis
+        else MemoryRateLimitBackend(max_keys=args.clients * 4)
+    )
+    middleware = RateLimitMiddleware(noop_app, routes=ROUTES, backend=backend)
+    token = create_access_token(uuid.uuid4(), timedelta(minutes=30))
+    cases = [
+        ("no middleware", noop_app, "/limited/ip", None),
+        ("route without limits", middleware, "/unlimited", None),
+        ("limited per IP", middleware, "/limited/ip", None),
+        ("limited per IP and user", middleware, "/limited/user", token),
+    ]
+    baseline = 0.0
+    for name, app, path, case_token in cases:
+        clients = scopes(path, args.clients, case_token)
+        requests = [clients[i % len(clients)] for i in range(args.requests)]
+        # Warm up: create the counters of every client
+        await measure(app, requests[: args.clients])
+        mean = await measure(app, requests)
+        if app is noop_app:
+            baseline = mean
+        logger.info(
+            "%-28s %8.2f us/request  overhead %8.2f us",
+            name,
+            mean * 1e6,
+            (mean - baseline) * 1e6,
+        )
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--requests", type=int, default=200_000)
+    parser.add_argument("--clients", type=int, default=10_000)
+    parser.add_argument("--redis", default=None, help="Redis URL, memory if not set")
+    args = parser.parse_args()
+    asyncio.run(run(args))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,96 @@
+"""Per-report latency of the naive WeasyPrint path against ReportEngine.
+
+    python -m benchmarks.report_render --reports 50 --fonts-dir ../Flutter/assets/fonts
+
+The naive path is how reports were rendered before the engine existed:
+build the HTML from the template source, inline the stylesheet and let
+WeasyPrint parse CSS and load fonts for every document.
+"""
+
+import argparse
+import time
+from pathlib import Path
+from typing import Any
+
+from jinja2 import Template
+from weasyprint import HTML
+
+from app.btec_engine.report_engine import (
+    STYLESHEET,
+    TEMPLATES_DIR,
+    ReportEngine,
+    font_face_css,
+)
+from benchmarks.utils import logger, report
+
+TEMPLATE = "student_report.html"
+
+
+def sample_context(modules: int) -> dict[str, Any]:
+    rows = [
+        {
+            "module_name": f"Unit {i}: Software Development",
+            "progress": (i * 17) % 100,
+            "last_score": float((i * 23) % 100),
+            "attempts": i % 5,
+            "struggling": i % 4 == 0,
+        }
+        for i in range(modules)
+    ]
+    return {
+        "generated_at": "2026-01-01 00:00 UTC",
+        "student": {"full_name": "Sample Student", "email": "student@example.com"},
+        "summary": {"module_count": modules, "average_progress": 50.0, "struggling_count": 3},
+        "modules": rows,
+        "recommendations": [
+            {
+                "module_name": row["module_name"],
+                "recommended_action": "Review fundamentals and practice basic concepts",
+                "resources": ["Start with beginner-level materials"],
+            }
+            for row in rows
+            if row["struggling"]
+        ],
+    }
+
+
+def render_naive(context: dict[str, Any], fonts_dir: Path | None) -> bytes:
+    source = (TEMPLATES_DIR / TEMPLATE).read_text()
+    css = font_face_css(fonts_dir) + (TEMPLATES_DIR / STYLESHEET).read_text()
+    html = Template(source, autoescape=True).render(context)
+    html = html.replace("</head>", f"<style>{css}</style></head>")
+    pdf: bytes = HTML(string=html).write_pdf()
+    return pdf
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--reports", type=int, default=30)
+    parser.add_argument("--modules", type=int, default=12)
+    parser.add_argument("--fonts-dir", type=Path, default=None)
+    args = parser.parse_args()
+    context = sample_context(args.modules)
+
+    naive = []
+    for _ in range(args.reports):
+        started = time.perf_counter()
+        render_naive(context, args.fonts_dir)
+        naive.append(time.perf_counter() - started)
+
+    engine = ReportEngine(fonts_dir=args.fonts_dir)
+    started = time.perf_counter()
+    engine.warm_up()
+    logger.info("engine warm-up: %.1fms", (time.perf_counter() - started) * 1000)
+    cached = []
+    for _ in range(args.reports):
+        started = time.perf_counter()
+        engine.render_pdf(TEMPLATE, context)
+        cached.append(time.perf_counter() - started)
+
+    before = report("before (naive)", naive)
+    after = report("after (ReportEngine)", cached)
+    logger.info("p50 speedup: %.2fx", before["p50_ms"] / after["p50_ms"])
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,157 @@
+"""Struggling-modules lookups on a 10M row studentprogress table, against PostgreSQL.
+
+    python -m benchmarks.struggling_index --users 200000 --modules 50
+
+Loads users * modules progress rows (10M by default) with generate_series,
+vacuums the table, then runs crud.get_struggling_modules_for_user for
+random students. The plan of every branch must be an Index Only Scan with
+no heap fetches; the benchmark fails otherwise and reports lookup latency.
+Pass --keep to reuse the loaded rows on the next run.
+"""
+
+import argparse
+import json
+import random
+import time
+import uuid
+from typing import Any
+
+from sqlalchemy import text
+from sqlmodel import Session
+
+from app import crud
+from app.core.db import engine
+from benchmarks.utils import logger, report
+
+EMAIL_DOMAIN = "bench-struggling.example.com"
+
+
+def load(session: Session, users: int, modules: int) -> None:
+    existing = session.execute(
+        text("SELECT count(*) FROM \"user\" WHERE email LIKE :pattern"),
+        {"pattern": f"%@{EMAIL_DOMAIN}"},
+    ).scalar_one()
+    if existing == users:
+        logger.info("Reusing %d benchmark users", users)
+        return
+    cleanup(session)
+    started = time.perf_counter()
+    session.execute(
+        text(
+            """
+            INSERT INTO "user" (id, email, is_active, is_superuser, hashed_password)
+            SELECT gen_random_uuid(), 'student-' || n || '@' || :domain, true, false, 'x'
+            FROM generate_series(1, :users) AS n
+            """
+        ),
+        {"users": users, "domain": EMAIL_DOMAIN},
+    )
+    session.execute(
+        text(
+            """
+            INSERT INTO module (name)
+            SELECT 'Unit ' || m FROM generate_series(1, :modules) AS m
+            ON CONFLICT (name) DO NOTHING
+            """
+        ),
+        {"modules": modules},
+    )
+    # About 30% of modules below 60%, 10% flagged as struggling
+    session.execute(
+        text(
+            """
+            INSERT INTO studentprogress
+                (id, user_id, module_id, progress, struggling, last_score, attempts)
+            SELECT gen_random_uuid(), u.id, module.id, (random() * 100)::int,
+                   random() < 0.1, round((random() * 100)::numeric, 1), (random() * 6)::int
+            FROM "user" u
+            CROSS JOIN generate_series(1, :modules) AS m
+            JOIN module ON module.name = 'Unit ' || m
+            WHERE u.email LIKE :pattern
+            """
+        ),
+        {"modules": modules, "pattern": f"%@{EMAIL_DOMAIN}"},
+    )
+    session.commit()
+    logger.info("Loaded %d rows in %.0fs", users * modules, time.perf_counter() - started)
+
+
+def vacuum() -> None:
+    with engine.connect().execution_options(isolation_level="AUTOCOMMIT") as conn:
+        conn.execute(text("VACUUM ANALYZE studentprogress"))
+
+
+def cleanup(session: Session) -> None:
+    session.execute(
+        text("DELETE FROM \"user\" WHERE email LIKE :pattern"),
+        {"pattern": f"%@{EMAIL_DOMAIN}"},
+    )
+    session.commit()
+
+
+def scans(plan: dict[str, Any]) -> list[dict[str, Any]]:
+    nodes = [plan] if "Scan" in plan["Node Type"] else []
+    for child in plan.get("Plans", []):
+        nodes += scans(child)
+    return nodes
+
+
+def check_plan(session: Session, user_id: uuid.UUID, threshold: int) -> None:
+    statement = crud.struggling_modules_statement(user_id, threshold)
+    compiled = statement.compile(dialect=engine.dialect)
+    (plan,) = (
+        session.connection()
+        .exec_driver_sql(
+            f"EXPLAIN (ANALYZE, BUFFERS, FORMAT JSON) {compiled}", compiled.params
+        )
+        .scalar_one()
+    )
+    nodes = scans(plan["Plan"])
+    for node in nodes:
+        logger.info(
+            "%s on %s, heap fetches: %s",
+            node["Node Type"],
+            node.get("Index Name"),
+            node.get("Heap Fetches"),
+        )
+    if not nodes or any(
+        n["Node Type"] != "Index Only Scan" or n.get("Heap Fetches") for n in nodes
+    ):
+        raise SystemExit("Struggling-modules lookup is not index-only:\n" + json.dumps(plan, indent=2))
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--users", type=int, default=200_000)
+    parser.add_argument("--modules", type=int, default=50)
+    parser.add_argument("--lookups", type=int, default=2000)
+    parser.add_argument("--threshold", type=int, default=60)
+    parser.add_argument("--keep", action="store_true")
+    args = parser.parse_args()
+
+    with Session(engine) as session:
+        load(session, args.users, args.modules)
+        vacuum()
+        user_ids = list(
+            session.execute(
+                text("SELECT id FROM \"user\" WHERE email LIKE :pattern"),
+                {"pattern": f"%@{EMAIL_DOMAIN}"},
+            ).scalars()
+        )
+        check_plan(session, random.choice(user_ids), args.threshold)
+
+        latencies = []
+        for user_id in random.sample(user_ids, min(args.lookups, len(user_ids))):
+            started = time.perf_counter()
+            crud.get_struggling_modules_for_user(
+                session=session, user_id=user_id, progress_threshold=args.threshold
+            )
+            latencies.append(time.perf_counter() - started)
+        report("struggling modules", latencies)
+
+        if not args.keep:
+            cleanup(session)
+
+
+if __name__ == "__main__":
+    main()
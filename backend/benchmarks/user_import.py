@@ -0,0 +1,77 @@
+"""Onboarding a school: one user at a time against the bulk import.
+
+    python -m benchmarks.user_import --users 2000 --serial 50
+
+Creates --serial users with crud.create_user, one bcrypt hash and commit
+each, and extrapolates to --users. Then imports --users from a CSV with
+app.user_import, which hashes on USER_IMPORT_WORKERS processes and inserts
+500 rows per statement.
+"""
+
+import argparse
+import io
+import time
+
+from sqlalchemy import text
+from sqlmodel import Session
+
+from app import crud
+from app.core.config import settings
+from app.core.db import engine
+from app.models import UserCreate
+from app.user_import import import_users
+from benchmarks.utils import logger
+
+EMAIL_DOMAIN = "bench-import.example.com"
+
+
+def cleanup(session: Session) -> None:
+    session.execute(
+        text("DELETE FROM \"user\" WHERE email LIKE :pattern"),
+        {"pattern": f"%@{EMAIL_DOMAIN}"},
+    )
+    session.commit()
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--users", type=int, default=2000)
+    parser.add_argument("--serial", type=int, default=50)
+    args = parser.parse_args()
+
+    with Session(engine) as session:
+        cleanup(session)
+        started = time.perf_counter()
+        for i in range(args.serial):
+            crud.create_user(
+                session=session,
+                user_create=UserCreate(
+                    email=f"serial{i}@{EMAIL_DOMAIN}", password=f"password-{i}"
+                ),
+            )
+        per_user = (time.perf_counter() - started) / args.serial
+        logger.info(
+            "create_user: %.1f ms per user, %.0f s for %d users",
+            per_user * 1000,
+            per_user * args.users,
+            args.users,
+        )
+
+        stream = io.StringIO(
+            "email,password\n"
+            + "".join(f"student{i}@{EMAIL_DOMAIN},password-{i}\n" for i in range(args.users))
+        )
+        report = import_users(session=session, stream=stream)
+        logger.info(
+            "import_users: %d users in %.1f s with %d workers (%.0f rows/s), %d failed",
+            report.loaded,
+            report.elapsed,
+            settings.USER_IMPORT_WORKERS,
+            report.rows_per_second,
+            report.failed,
+        )
+        cleanup(session)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,39 @@
+import logging
+import statistics
+from collections.abc import Sequence
+
+logging.basicConfig(level=logging.INFO, format="%(message)s")
+logger = logging.getLogger("benchmarks")
+
+
+def percentile(values: Sequence[float], pct: float) -> float:
+    ordered = sorted(values)
+    if not ordered:
+        return 0.0
+    index = min(len(ordered) - 1, max(0, round(pct / 100 * len(ordered)) - 1))
+    return ordered[index]
+
+
+def summarize(latencies: Sequence[float]) -> dict[str, float]:
+    """Summarize latencies given in seconds, reported in milliseconds."""
+    return {
+        "n": len(latencies),
+        "mean_ms": round(statistics.fmean(latencies) * 1000, 3),
+        "p50_ms": round(percentile(latencies, 50) * 1000, 3),
+        "p95_ms": round(percentile(latencies, 95) * 1000, 3),
+        "p99_ms": round(percentile(latencies, 99) * 1000, 3),
+    }
+
+
+def report(name: str, latencies: Sequence[float]) -> dict[str, float]:
+    summary = summarize(latencies)
+    logger.info(
+        "%-28s n=%-6d mean=%9.3fms p50=%9.3fms p95=%9.3fms p99=%9.3fms",
+        name,
+        summary["n"],
+        summary["mean_ms"],
+        summary["p50_ms"],
+        summary["p95_ms"],
+        summary["p99_ms"],
+    )
+    return summary
@@ -9,5 +9,8 @@ python app/backend_pre_start.py
 # Run migrations
 alembic upgrade head
 
+# Create upcoming progress history partitions, drop expired ones
+python -m app.progress_history
+
 # Create initial data in DB
 python app/initial_data.py
@@ -0,0 +1,37 @@
+"""Tests for the cohort analytics API."""
+
+from fastapi.testclient import TestClient
+from sqlmodel import Session
+
+from app import crud
+from app.api.deps import get_current_user, get_read_db
+from app.core.config import settings
+from app.main import app
+from app.models import StudentProgressCreate
+from tests.utils.user import create_random_user
+from tests.utils.utils import random_lower_string
+
+
+def test_read_module_stats(client: TestClient, db: Session) -> None:
+    module_name = random_lower_string()
+    crud.create_or_update_student_progress(
+        session=db,
+        user_id=create_random_user(db).id,
+        progress_in=StudentProgressCreate(module_name=module_name, progress=70, last_score=72),
+    )
+    superuser = crud.get_user_by_email(session=db, email=settings.FIRST_SUPERUSER)
+    app.dependency_overrides[get_read_db] = lambda: db
+    app.dependency_overrides[get_current_user] = lambda: superuser
+    try:
+        r = client.get(f"{settings.API_V1_STR}/analytics/modules/{module_name}")
+        missing = client.get(f"{settings.API_V1_STR}/analytics/modules/{random_lower_string()}")
+        app.dependency_overrides[get_current_user] = lambda: create_random_user(db)
+        forbidden = client.get(f"{settings.API_V1_STR}/analytics/modules")
+    finally:
+        app.dependency_overrides.clear()
+
+    assert r.status_code == 200
+    assert r.json()["students"] == 1
+    assert r.json()["score_histogram"][7] == 1
+    assert missing.status_code == 404
+    assert forbidden.status_code == 403
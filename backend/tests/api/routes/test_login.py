@@ -1,10 +1,20 @@
+from collections.abc import AsyncGenerator, Generator
+from datetime import datetime, timedelta, timezone
 from unittest.mock import patch
 
+import pytest
+from fastapi import HTTPException
 from fastapi.testclient import TestClient
 from sqlmodel import Session
+from sqlmodel.ext.asyncio.session import AsyncSession
 
+from app import user_deletion
+from app.api.deps import get_async_db, get_current_user
 from app.core.config import settings
-from app.core.security import verify_password
+from app.core.jwt_keys import get_token_keys
+from app.core.query_stats import track_queries
+from app.core.security import password_hasher, verify_password
+from app.main import app
 from app.crud import create_user
 from app.models import UserCreate
 from app.utils import generate_password_reset_token
@@ -12,6 +22,24 @@ from tests.utils.user import user_authentication_headers
 from tests.utils.utils import random_email, random_lower_string
 
 
+@pytest.fixture
+def async_db() -> Generator[None, None, None]:
+    from tests.conftest import async_test_engine
+
+    async def get_test_async_db() -> AsyncGenerator[AsyncSession, None]:
+        async with AsyncSession(async_test_engine, expire_on_commit=False) as session:
+            yield session
+
+    app.dependency_overrides[get_async_db] = get_test_async_db
+    yield
+    app.dependency_overrides.clear()
+
+
+@pytest.fixture
+def token_claims(monkeypatch: pytest.MonkeyPatch) -> None:
+    monkeypatch.setattr(settings, "ACCESS_TOKEN_CLAIMS", True)
+
+
 def test_get_access_token(client: TestClient) -> None:
     login_data = {
         "username": settings.FIRST_SUPERUSER,
@@ -116,3 +144,96 @@ def test_reset_password_invalid_token(
     assert "detail" in response
     assert r.status_code == 400
     assert response["detail"] == "Invalid token"
+
+
+def test_login_on_password_hasher(client: TestClient, db: Session, async_db: None) -> None:
+    email, password = random_email(), random_lower_string()
+    create_user(session=db, user_create=UserCreate(email=email, password=password))
+    url = f"{settings.API_V1_STR}/login/access-token"
+
+    r = client.post(url, data={"username": email, "password": password})
+    assert r.status_code == 200
+    headers = {"Authorization": f"Bearer {r.json()['access_token']}"}
+    r = client.post(f"{settings.API_V1_STR}/login/test-token", headers=headers)
+    assert r.status_code == 200
+    assert r.json()["email"] == email
+
+    r = client.post(url, data={"username": email, "password": "incorrect"})
+    assert r.status_code == 400
+    assert r.json()["detail"] == "Incorrect email or password"
+    assert password_hasher.in_flight == 0
+
+
+def test_login_password_hasher_busy(client: TestClient, db: Session, async_db: None) -> None:
+    email, password = random_email(), random_lower_string()
+    create_user(session=db, user_create=UserCreate(email=email, password=password))
+
+    with patch.object(password_hasher, "capacity", 0):
+        r = client.post(
+            f"{settings.API_V1_STR}/login/access-token",
+            data={"username": email, "password": password},
+        )
+    assert r.status_code == 503
+    assert r.headers["Retry-After"] == "1"
+
+
+def test_login_with_token_claims(
+    client: TestClient, db: Session, async_db: None, token_claims: None
+) -> None:
+    email, password = random_email(), random_lower_string()
+    user = create_user(session=db, user_create=UserCreate(email=email, password=password))
+    tokens = client.post(
+        f"{settings.API_V1_STR}/login/access-token",
+        data={"username": email, "password": password},
+    ).json()
+    assert tokens["refresh_token"]
+
+    with Session(db.get_bind()) as session:
+        with track_queries() as stats:
+            current = get_current_user(session, tokens["access_token"])
+            assert (current.id, current.is_superuser) == (user.id, False)
+        assert stats.count == 0
+        # Attributes not in the token load on access
+        assert current.email == email
+
+    r = client.post(
+        f"{settings.API_V1_STR}/login/refresh-token",
+        json={"refresh_token": tokens["refresh_token"]},
+    )
+    assert r.status_code == 200
+    with Session(db.get_bind()) as session:
+        assert get_current_user(session, r.json()["access_token"]).id == user.id
+        with pytest.raises(HTTPException) as e:
+            get_current_user(session, tokens["refresh_token"])
+        assert e.value.status_code == 403
+
+
+def test_token_without_subject(db: Session) -> None:
+    token = get_token_keys().encode(
+        {"exp": datetime.now(timezone.utc) + timedelta(minutes=5)}
+    )
+    with pytest.raises(HTTPException) as e:
+        get_current_user(db, token)
+    assert e.value.status_code == 403
+
+
+def test_deactivation_revokes_token_claims(
+    client: TestClient, db: Session, async_db: None, token_claims: None
+) -> None:
+    email, password = random_email(), random_lower_string()
+    user = create_user(session=db, user_create=UserCreate(email=email, password=password))
+    tokens = client.post(
+        f"{settings.API_V1_STR}/login/access-token",
+        data={"username": email, "password": password},
+    ).json()
+
+    user_deletion.deactivate_user(session=db, user=user)
+
+    with Session(db.get_bind()) as session, pytest.raises(HTTPException) as e:
+        get_current_user(session, tokens["access_token"])
+    assert e.value.status_code == 403
+    r = client.post(
+        f"{settings.API_V1_STR}/login/refresh-token",
+        json={"refresh_token": tokens["refresh_token"]},
+    )
+    assert r.status_code == 403
@@ -0,0 +1,187 @@
+"""Tests for the student progress API."""
+
+import time
+from collections.abc import Generator
+
+import pytest
+from fastapi.testclient import TestClient
+from sqlmodel import Session
+
+from app import crud
+from app.api.deps import get_current_user, get_db
+from app.core.config import settings
+from app.main import app
+from app.models import User
+from tests.utils.user import create_random_user
+
+
+@pytest.fixture
+def superuser(db: Session) -> Generator[User, None, None]:
+    user = crud.get_user_by_email(session=db, email=settings.FIRST_SUPERUSER)
+    assert user
+    app.dependency_overrides[get_db] = lambda: db
+    app.dependency_overrides[get_current_user] = lambda: user
+    yield user
+    app.dependency_overrides.clear()
+
+
+def _wait_for_job(client: TestClient, job_id: str) -> dict:
+    url = f"{settings.API_V1_STR}/progress/ingest/{job_id}"
+    for _ in range(100):
+        job = client.get(url).json()
+        if job["status"] in ("completed", "failed"):
+            return job
+        time.sleep(0.05)
+    raise AssertionError("Ingest did not finish")
+
+
+def test_ingest_progress_csv(
+    client: TestClient, superuser: User, db: Session
+) -> None:
+    student = create_random_user(db)
+    body = (
+        "user_id,module_name,progress,attempts\n"
+        f"{student.id},Networking,70,2\n"
+        f"{student.id},Databases,-5,1\n"
+    )
+    r = client.post(
+        f"{settings.API_V1_STR}/progress/ingest",
+        content=body,
+        headers={"Content-Type": "text/csv"},
+    )
+    assert r.status_code == 202
+
+    job = _wait_for_job(client, r.json()["id"])
+    assert job["status"] == "completed"
+    assert (job["total"], job["completed"], job["failed"]) == (2, 1, 1)
+    assert job["errors"][0]["line"] == 3
+    db.expire_all()
+    rows = crud.get_student_progress_for_user(session=db, user_id=student.id)
+    assert [(p.module_name, p.progress) for p in rows] == [("Networking", 70)]
+
+
+def test_ingest_progress_requires_superuser(client: TestClient, db: Session) -> None:
+    student = create_random_user(db)
+    app.dependency_overrides[get_db] = lambda: db
+    app.dependency_overrides[get_current_user] = lambda: student
+    try:
+        r = client.post(
+            f"{settings.API_V1_STR}/progress/ingest?format=jsonl", content="{}\n"
+        )
+    finally:
+        app.dependency_overrides.clear()
+    assert r.status_code == 403
+
+
+def test_read_missing_ingest_job(client: TestClient, superuser: User) -> None:
+    r = client.get(
+        f"{settings.API_V1_STR}/progress/ingest/00000000-0000-0000-0000-000000000000"
+    )
+    assert r.status_code == 404
+
+
+@pytest.mark.query_budget(3)
+def test_read_own_progress(client: TestClient, db: Session) -> None:
+    from app.api.deps import get_read_db
+    from app.models import StudentProgressCreate
+
+    student = create_random_user(db)
+    for module_name in ("Networking", "Databases"):
+        crud.create_or_update_student_progress(
+            session=db,
+            user_id=student.id,
+            progress_in=StudentProgressCreate(module_name=module_name, progress=50),
+        )
+    app.dependency_overrides[get_read_db] = lambda: db
+    app.dependency_overrides[get_current_user] = lambda: student
+    try:
+        r = client.get(f"{settings.API_V1_STR}/progress/?limit=1&count=true")
+        cursor = r.json()["next_cursor"]
+        last = client.get(f"{settings.API_V1_STR}/progress/?limit=1&cursor={cursor}")
+        invalid = client.get(f"{settings.API_V1_STR}/progress/?cursor=not-a-cursor")
+        other = client.get(
+            f"{settings.API_V1_STR}/progress/?user_id={create_random_user(db).id}"
+        )
+    finally:
+        app.dependency_overrides.clear()
+
+    assert r.status_code == 200
+    assert r.json()["count"] == 2
+    pages = [r.json()["data"], last.json()["data"]]
+    assert sorted(p["module_name"] for page in pages for p in page) == [
+        "Databases",
+        "Networking",
+    ]
+    assert [len(page) for page in pages] == [1, 1]
+    assert last.json()["next_cursor"] is None
+    assert last.json()["count"] is None
+    assert invalid.status_code == 400
+    assert other.status_code == 403
+
+
+def test_read_progress_history(client: TestClient, db: Session) -> None:
+    from app.api.deps import get_read_db
+    from app.models import StudentProgressCreate
+
+    student = create_random_user(db)
+    for progress in (30, 60):
+        crud.create_or_update_student_progress(
+            session=db,
+            user_id=student.id,
+            progress_in=StudentProgressCreate(module_name="Networking", progress=progress),
+        )
+    app.dependency_overrides[get_read_db] = lambda: db
+    app.dependency_overrides[get_current_user] = lambda: student
+    try:
+        r = client.get(f"{settings.API_V1_STR}/progress/history?module_name=Networking")
+        curve = client.get(f"{settings.API_V1_STR}/progress/modules/Networking/curve")
+        other = client.get(
+            f"{settings.API_V1_STR}/progress/history?user_id={create_random_user(db).id}"
+        )
+    finally:
+        app.dependency_overrides.clear()
+
+    assert r.status_code == 200
+    assert [e["progress"] for e in r.json()["data"]] == [30, 60]
+    assert curve.status_code == 403
+    assert other.status_code == 403
+
+
+@pytest.mark.query_budget(6)
+def test_record_progress(client: TestClient, db: Session) -> None:
+    from app.api.deps import get_db_transaction
+
+    student = create_random_user(db)
+
+    def transaction() -> Generator[Session, None, None]:
+        with crud.unit_of_work(db):
+            yield db
+
+    app.dependency_overrides[get_db_transaction] = transaction
+    app.dependency_overrides[get_current_user] = lambda: student
+    try:
+        r = client.post(
+            f"{settings.API_V1_STR}/progress/",
+            json=[
+                {"module_name": "Networking", "progress": 40},
+                {"module_name": "Databases", "progress": 75, "last_score": 80},
+            ],
+        )
+        invalid = client.post(
+            f"{settings.API_V1_STR}/progress/",
+            json=[
+                {"module_name": "Security", "progress": 10},
+                {"module_name": "Networking", "progress": 101},
+            ],
+        )
+    finally:
+        app.dependency_overrides.clear()
+
+    assert r.status_code == 200
+    assert [p["module_name"] for p in r.json()["data"]] == ["Networking", "Databases"]
+    assert invalid.status_code == 422
+    rows = crud.get_student_progress_for_user(session=db, user_id=student.id)
+    assert sorted((p.module_name, p.progress) for p in rows) == [
+        ("Databases", 75),
+        ("Networking", 40),
+    ]
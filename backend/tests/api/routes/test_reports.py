@@ -0,0 +1,226 @@
+"""Tests for the PDF report API."""
+
+import io
+import json
+import time
+import zipfile
+from collections.abc import Generator
+from pathlib import Path
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any
+
+import pytest
+from fastapi.testclient import TestClient
+from sqlmodel import Session
+
+from app import crud
+from app.api.deps import get_current_user, get_db
+from app.btec_engine.report_cache import ReportCache
+from app.btec_engine.report_engine import get_engine
+from app.btec_engine.report_service import report_service
+from app.core.config import settings
+from app.main import app
+from app.models import StudentProgressCreate, User
+from tests.utils.user import create_random_user
+
+
+def fake_render(template_name: str, context: dict[str, Any]) -> bytes:
+    # Stand-in for WeasyPrint that still exercises the Jinja2 templates
+    get_engine().render_html(template_name, context)
+    return b"%PDF-fake " + json.dumps({"template": template_name}).encode()
+
+
+@pytest.fixture(autouse=True)
+def report_pool(
+    monkeypatch: pytest.MonkeyPatch, tmp_path: Path
+) -> Generator[None, None, None]:
+    executor = ThreadPoolExecutor(max_workers=2)
+    monkeypatch.setattr(report_service, "_executor", executor)
+    monkeypatch.setattr(report_service, "_render", fake_render)
+    monkeypatch.setattr(
+        report_service, "cache", ReportCache(tmp_path, max_bytes=1024 * 1024)
+    )
+    yield
+    executor.shutdown()
+
+
+@pytest.fixture
+def student(db: Session) -> Generator[User, None, None]:
+    user = create_random_user(db)
+    for module_name, progress in (("Networking", 35), ("Databases", 90)):
+        crud.create_or_update_student_progress(
+            session=db,
+            user_id=user.id,
+            progress_in=StudentProgressCreate(
+                module_name=module_name, progress=progress, attempts=2
+            ),
+        )
+    app.dependency_overrides[get_db] = lambda: db
+    app.dependency_overrides[get_current_user] = lambda: user
+    yield user
+    app.dependency_overrides.clear()
+
+
+def test_read_own_student_report(client: TestClient, student: User) -> None:
+    r = client.get(f"{settings.API_V1_STR}/reports/students/{student.id}")
+    assert r.status_code == 200
+    assert r.headers["content-type"] == "application/pdf"
+    assert r.content.startswith(b"%PDF")
+    assert b"student_report.html" in r.content
+
+
+def test_read_other_student_report_forbidden(
+    client: TestClient, student: User, db: Session
+) -> None:
+    other = create_random_user(db)
+    r = client.get(f"{settings.API_V1_STR}/reports/students/{other.id}")
+    assert r.status_code == 403
+
+
+def test_class_report_requires_superuser(client: TestClient, student: User) -> None:
+    r = client.post(
+        f"{settings.API_V1_STR}/reports/class",
+        json={"user_ids": [str(student.id)]},
+    )
+    assert r.status_code == 403
+
+
+def test_class_report_as_superuser(
+    client: TestClient, student: User, db: Session
+) -> None:
+    superuser = crud.get_user_by_email(session=db, email=settings.FIRST_SUPERUSER)
+    app.dependency_overrides[get_current_user] = lambda: superuser
+    r = client.post(
+        f"{settings.API_V1_STR}/reports/class",
+        json={"user_ids": [str(student.id)], "title": "Year 12"},
+    )
+    assert r.status_code == 200
+    assert b"class_report.html" in r.content
+
+
+def test_student_report_job_mode(client: TestClient, student: User) -> None:
+    r = client.post(f"{settings.API_V1_STR}/reports/students/{student.id}/jobs")
+    assert r.status_code == 202
+    job_id = r.json()["id"]
+
+    for _ in range(50):
+        job = client.get(f"{settings.API_V1_STR}/reports/jobs/{job_id}").json()
+        if job["status"] == "completed":
+            break
+        time.sleep(0.02)
+    assert job["status"] == "completed"
+    assert job["completed"] == 1
+
+    r = client.get(f"{settings.API_V1_STR}/reports/jobs/{job_id}/pdf")
+    assert r.status_code == 200
+    assert r.content.startswith(b"%PDF")
+
+
+def test_render_student_template_escapes_html() -> None:
+    html = get_engine().render_html(
+        "student_report.html",
+        {
+            "generated_at": "now",
+            "student": {"full_name": "<script>", "email": "a@b.c"},
+            "summary": {"module_count": 0, "average_progress": 0, "struggling_count": 0},
+            "modules": [],
+            "recommendations": [],
+        },
+    )
+    assert "<script>" not in html
+    assert "No progress recorded yet." in html
+
+
+def test_class_report_zip_streams_one_pdf_per_student(
+    client: TestClient, student: User, db: Session
+) -> None:
+    students = [student] + [create_random_user(db) for _ in range(4)]
+    superuser = crud.get_user_by_email(session=db, email=settings.FIRST_SUPERUSER)
+    app.dependency_overrides[get_current_user] = lambda: superuser
+
+    r = client.post(
+        f"{settings.API_V1_STR}/reports/class/zip",
+        json={"user_ids": [str(s.id) for s in students]},
+    )
+
+    assert r.status_code == 200
+    assert r.headers["content-type"] == "application/zip"
+    archive = zipfile.ZipFile(io.BytesIO(r.content))
+    assert sorted(archive.namelist()) == sorted(
+        f"progress-report-{s.email}.pdf" for s in students
+    )
+    assert archive.read(f"progress-report-{student.email}.pdf").startswith(b"%PDF")
+
+    batch_id = r.headers["x-report-batch-id"]
+    batch = client.get(f"{settings.API_V1_STR}/reports/jobs/{batch_id}").json()
+    assert batch["status"] == "completed"
+    assert batch["total"] == batch["completed"] == len(students)
+
+
+def test_class_report_zip_lists_failed_reports(
+    client: TestClient,
+    student: User,
+    db: Session,
+    monkeypatch: pytest.MonkeyPatch,
+) -> None:
+    def flaky_render(template_name: str, context: dict[str, Any]) -> bytes:
+        if context["student"]["email"] == student.email:
+            raise RuntimeError("layout failed")
+        return fake_render(template_name, context)
+
+    monkeypatch.setattr(report_service, "_render", flaky_render)
+    other = create_random_user(db)
+    superuser = crud.get_user_by_email(session=db, email=settings.FIRST_SUPERUSER)
+    app.dependency_overrides[get_current_user] = lambda: superuser
+
+    r = client.post(
+        f"{settings.API_V1_STR}/reports/class/zip",
+        json={"user_ids": [str(student.id), str(other.id)]},
+    )
+
+    archive = zipfile.ZipFile(io.BytesIO(r.content))
+    assert f"progress-report-{other.email}.pdf" in archive.namelist()
+    assert b"layout failed" in archive.read("errors.txt")
+    batch_id = r.headers["x-report-batch-id"]
+    batch = client.get(f"{settings.API_V1_STR}/reports/jobs/{batch_id}").json()
+    assert (batch["completed"], batch["failed"]) == (1, 1)
+
+
+def test_student_report_etag_revalidation(
+    client: TestClient, student: User, db: Session, monkeypatch: pytest.MonkeyPatch
+) -> None:
+    renders: list[str] = []
+
+    def counting_render(template_name: str, context: dict[str, Any]) -> bytes:
+        renders.append(template_name)
+        return fake_render(template_name, context)
+
+    monkeypatch.setattr(report_service, "_render", counting_render)
+    url = f"{settings.API_V1_STR}/reports/students/{student.id}"
+
+    first = client.get(url)
+    etag = first.headers["etag"]
+    assert first.status_code == 200
+
+    # Unchanged data: revalidation is answered without a body or a render
+    r = client.get(url, headers={"If-None-Match": etag})
+    assert r.status_code == 304
+    assert r.content == b""
+    assert r.headers["etag"] == etag
+
+    # A fresh download of unchanged data is served from the cache
+    r = client.get(url)
+    assert r.status_code == 200
+    assert r.content == first.content
+    assert len(renders) == 1
+
+    # New progress changes the fingerprint and triggers a new render
+    crud.create_or_update_student_progress(
+        session=db,
+        user_id=student.id,
+        progress_in=StudentProgressCreate(module_name="Networking", progress=80),
+    )
+    r = client.get(url, headers={"If-None-Match": etag})
+    assert r.status_code == 200
+    assert r.headers["etag"] != etag
+    assert len(renders) == 2
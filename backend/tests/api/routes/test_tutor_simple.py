@@ -61,3 +61,35 @@ def test_tutor_endpoint_parameter_validation(client: TestClient) -> None:
         f"{settings.API_V1_STR}/tutor/recommendations?threshold=101"
     )
     assert response_high.status_code in [400, 401, 403, 422]
+
+
+def test_tutor_recommendations_async_route(client: TestClient, db: Session) -> None:
+    """Test the tutor route through the async session dependency."""
+    from sqlmodel.ext.asyncio.session import AsyncSession
+
+    from app.api.deps import get_async_read_db, get_current_user_async
+    from app.main import app
+    from tests.conftest import async_test_engine
+
+    user = create_random_user(db)
+    crud.create_or_update_student_progress(
+        session=db,
+        user_id=user.id,
+        progress_in=StudentProgressCreate(module_name="async_module", progress=25),
+    )
+
+    async def get_test_async_db():
+        async with AsyncSession(async_test_engine, expire_on_commit=False) as session:
+            yield session
+
+    app.dependency_overrides[get_async_read_db] = get_test_async_db
+    app.dependency_overrides[get_current_user_async] = lambda: user
+    try:
+        response = client.get(f"{settings.API_V1_STR}/tutor/recommendations")
+    finally:
+        app.dependency_overrides.clear()
+
+    assert response.status_code == 200
+    data = response.json()
+    assert data["count"] == 1
+    assert data["data"][0]["module_name"] == "async_module"
@@ -1,13 +1,18 @@
+import time
 import uuid
+from concurrent.futures import ThreadPoolExecutor
 from unittest.mock import patch
 
 from fastapi.testclient import TestClient
 from sqlmodel import Session, select
 
 from app import crud
+from app.api.deps import get_current_user, get_db
 from app.core.config import settings
 from app.core.security import verify_password
-from app.models import User, UserCreate
+from app.main import app
+from app.models import ItemCreate, User, UserCreate
+from tests.utils.user import create_random_user
 from tests.utils.utils import random_email, random_lower_string
 
 
@@ -382,6 +387,18 @@ def test_update_user_email_exists(
     assert r.json()["detail"] == "User with this email already exists"
 
 
+def _wait_for_deletion(
+    client: TestClient, headers: dict[str, str], job_id: str
+) -> dict:
+    url = f"{settings.API_V1_STR}/users/deletions/{job_id}"
+    for _ in range(100):
+        job = client.get(url, headers=headers).json()
+        if job["status"] in ("completed", "failed"):
+            return job
+        time.sleep(0.05)
+    raise AssertionError("Deletion did not finish")
+
+
 def test_delete_user_me(client: TestClient, db: Session) -> None:
     username = random_email()
     password = random_lower_string()
@@ -402,11 +419,18 @@ def test_delete_user_me(client: TestClient, db: Session) -> None:
         f"{settings.API_V1_STR}/users/me",
         headers=headers,
     )
-    assert r.status_code == 200
-    deleted_user = r.json()
-    assert deleted_user["message"] == "User deleted successfully"
-    result = db.exec(select(User).where(User.id == user_id)).first()
-    assert result is None
+    assert r.status_code == 202
+    assert r.json() == {"message": "User deletion started"}
+    # The account is locked out before the response
+    r = client.get(f"{settings.API_V1_STR}/users/me", headers=headers)
+    assert r.status_code != 200
+    for _ in range(100):
+        db.expire_all()
+        if db.exec(select(User).where(User.id == user_id)).first() is None:
+            break
+        time.sleep(0.05)
+    else:
+        raise AssertionError("Deletion did not finish")
 
     user_query = select(User).where(User.id == user_id)
     user_db = db.execute(user_query).first()
@@ -437,9 +461,10 @@ def test_delete_user_super_user(
         f"{settings.API_V1_STR}/users/{user_id}",
         headers=superuser_token_headers,
     )
-    assert r.status_code == 200
-    deleted_user = r.json()
-    assert deleted_user["message"] == "User deleted successfully"
+    assert r.status_code == 202
+    job = _wait_for_deletion(client, superuser_token_headers, r.json()["id"])
+    assert job["status"] == "completed"
+    db.expire_all()
     result = db.exec(select(User).where(User.id == user_id)).first()
     assert result is None
 
@@ -484,3 +509,60 @@ def test_delete_user_without_privileges(
     )
     assert r.status_code == 403
     assert r.json()["detail"] == "The user doesn't have enough privileges"
+
+
+def test_delete_user_in_background(client: TestClient, db: Session) -> None:
+    superuser = crud.get_user_by_email(session=db, email=settings.FIRST_SUPERUSER)
+    user = create_random_user(db)
+    user_id = user.id
+    for i in range(3):
+        crud.create_item(session=db, item_in=ItemCreate(title=f"item {i}"), owner_id=user_id)
+    app.dependency_overrides[get_db] = lambda: db
+    app.dependency_overrides[get_current_user] = lambda: superuser
+    try:
+        r = client.delete(f"{settings.API_V1_STR}/users/{user_id}")
+        assert r.status_code == 202
+        assert r.json()["kind"] == "user-deletion"
+        job = _wait_for_deletion(client, {}, r.json()["id"])
+        missing = client.get(f"{settings.API_V1_STR}/users/deletions/{uuid.uuid4()}")
+    finally:
+        app.dependency_overrides.clear()
+
+    assert job["status"] == "completed"
+    assert (job["total"], job["completed"]) == (3, 3)
+    assert missing.status_code == 404
+    db.expire_all()
+    assert db.get(User, user_id) is None
+
+
+def test_import_users(client: TestClient, db: Session) -> None:
+    superuser = crud.get_user_by_email(session=db, email=settings.FIRST_SUPERUSER)
+    email = random_email()
+    body = (
+        "email,password\n"
+        f"{email},{random_lower_string()}\n"
+        f"{superuser.email},{random_lower_string()}\n"  # type: ignore[union-attr]
+    )
+    app.dependency_overrides[get_db] = lambda: db
+    app.dependency_overrides[get_current_user] = lambda: superuser
+    try:
+        with ThreadPoolExecutor() as executor, patch(
+            "app.user_import._hash_pool", return_value=executor
+        ):
+            r = client.post(f"{settings.API_V1_STR}/users/import", content=body)
+            assert r.status_code == 202
+            url = f"{settings.API_V1_STR}/users/imports/{r.json()['id']}"
+            for _ in range(100):
+                job = client.get(url).json()
+                if job["status"] in ("completed", "failed"):
+                    break
+                time.sleep(0.05)
+    finally:
+        app.dependency_overrides.clear()
+
+    assert job["status"] == "completed"
+    assert (job["total"], job["completed"], job["failed"]) == (2, 1, 1)
+    assert job["errors"] == [
+        {"line": 3, "message": "email: User with this email already exists"}
+    ]
+    assert crud.get_user_by_email(session=db, email=email)
@@ -0,0 +1,9 @@
+from fastapi.testclient import TestClient
+
+
+def test_read_jwks(client: TestClient) -> None:
+    r = client.get("/.well-known/jwks.json")
+    assert r.status_code == 200
+    # Tokens are HS256-signed in the tests, there is no public key
+    assert r.json() == {"keys": []}
+    assert r.headers["Cache-Control"] == "public, max-age=300"
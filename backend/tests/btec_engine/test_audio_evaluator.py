@@ -0,0 +1,75 @@
+"""Tests for audio transcription telemetry."""
+
+import asyncio
+from typing import Any
+
+import pytest
+from fastapi.testclient import TestClient
+
+from app.btec_engine import audio_evaluator
+from app.core.config import settings
+
+
+class FakeModel:
+    def transcribe(self, audio: list[float], language: str) -> dict[str, Any]:
+        assert language == "en"
+        return {"text": "hello world"}
+
+
+@pytest.fixture
+def fake_whisper(monkeypatch: pytest.MonkeyPatch) -> None:
+    # Two seconds of silence at Whisper's sample rate
+    samples = [0.0] * (audio_evaluator.SAMPLE_RATE * 2)
+    monkeypatch.setattr(
+        audio_evaluator.whisper, "load_audio", lambda _: samples, raising=False
+    )
+    monkeypatch.setattr(audio_evaluator, "model", FakeModel())
+
+
+@pytest.mark.usefixtures("fake_whisper")
+def test_transcribe_audio_timed_records_metrics() -> None:
+    before = audio_evaluator.REAL_TIME_FACTOR.snapshot(model=settings.WHISPER_MODEL)
+
+    result = audio_evaluator.transcribe_audio_timed("sample.wav")
+
+    assert result.text == "hello world"
+    assert result.audio_duration == 2.0
+    assert result.model_name == settings.WHISPER_MODEL
+    assert result.real_time_factor == pytest.approx(
+        (result.decode_time + result.inference_time) / 2.0
+    )
+    after = audio_evaluator.REAL_TIME_FACTOR.snapshot(model=settings.WHISPER_MODEL)
+    assert after["count"] == before["count"] + 1
+
+
+@pytest.mark.usefixtures("fake_whisper")
+def test_submit_transcription_measures_queue_wait() -> None:
+    result = asyncio.run(audio_evaluator.submit_transcription("sample.wav"))
+
+    assert result.text == "hello world"
+    assert result.queue_wait >= 0
+    assert audio_evaluator.JOBS_IN_FLIGHT.value() == 0
+
+
+@pytest.mark.usefixtures("fake_whisper")
+def test_evaluate_audio_endpoint_returns_metrics(client: TestClient) -> None:
+    response = client.post(
+        f"{settings.API_V1_STR}/btec/evaluate/audio",
+        files={"file": ("answer.wav", b"RIFF", "audio/wav")},
+    )
+
+    assert response.status_code == 200
+    content = response.json()
+    assert content["transcript"] == "hello world"
+    assert content["metrics"]["audio_duration"] == 2.0
+    assert set(content["metrics"]) >= {
+        "model",
+        "decode_time",
+        "inference_time",
+        "queue_wait",
+        "real_time_factor",
+    }
+
+    metrics = client.get(f"{settings.API_V1_STR}/metrics/")
+    assert metrics.status_code == 200
+    assert "btec_audio_real_time_factor_bucket" in metrics.text
@@ -0,0 +1,44 @@
+"""Tests for the fingerprint-keyed report cache."""
+
+import os
+from pathlib import Path
+
+from app.btec_engine.report_cache import ReportCache, report_fingerprint
+
+
+def test_fingerprint_ignores_generation_time() -> None:
+    context = {"student": {"email": "a@example.com"}, "generated_at": "today"}
+    later = {**context, "generated_at": "tomorrow"}
+
+    assert report_fingerprint("v1", "r.html", context) == report_fingerprint(
+        "v1", "r.html", later
+    )
+    assert report_fingerprint("v1", "r.html", context) != report_fingerprint(
+        "v2", "r.html", context
+    )
+
+
+def test_get_returns_what_was_put(tmp_path: Path) -> None:
+    cache = ReportCache(tmp_path, max_bytes=1000)
+    assert cache.get("ab" * 32) is None
+
+    cache.put("ab" * 32, b"%PDF-1")
+
+    assert cache.get("ab" * 32) == b"%PDF-1"
+
+
+def test_least_recently_used_entries_are_evicted(tmp_path: Path) -> None:
+    cache = ReportCache(tmp_path, max_bytes=350)
+    keys = [f"{i:02d}" * 32 for i in range(3)]
+    for age, key in enumerate(keys):
+        cache.put(key, b"x" * 100)
+        # Give each entry a distinct, increasing last-use time
+        os.utime(cache._path(key), (age, age))
+    # Using the oldest entry makes it the most recently used one
+    assert cache.get(keys[0]) is not None
+
+    cache.put("99" * 32, b"x" * 100)
+
+    assert cache.get(keys[1]) is None
+    assert cache.get(keys[0]) is not None
+    assert sum(p.stat().st_size for p in tmp_path.glob("*/*.pdf")) <= 350
@@ -0,0 +1,30 @@
+"""Tests for the precompiled report rendering engine."""
+
+from pathlib import Path
+
+import pytest
+
+from app.btec_engine.report_engine import FONT_FILES, ReportEngine
+
+
+def test_templates_are_compiled_once() -> None:
+    engine = ReportEngine()
+    assert set(engine.templates) >= {"student_report.html", "class_report.html"}
+
+    template = engine.templates["class_report.html"]
+    assert engine.environment.get_template("class_report.html") is template
+
+
+def test_unknown_template_is_rejected() -> None:
+    with pytest.raises(ValueError):
+        ReportEngine().render_html("missing.html", {})
+
+
+def test_font_faces_are_added_to_stylesheet(tmp_path: Path) -> None:
+    (tmp_path / FONT_FILES["Cairo"]).write_bytes(b"")
+
+    engine = ReportEngine(fonts_dir=tmp_path)
+
+    assert 'font-family: "Cairo"' in engine.stylesheet_source
+    assert 'font-family: "Inter"' not in engine.stylesheet_source
+    assert "@page" in engine.stylesheet_source
@@ -9,17 +9,30 @@ sys.modules['whisper'] = whisper
 
 import pytest
 from fastapi.testclient import TestClient
+from sqlalchemy.ext.asyncio import create_async_engine
+from sqlalchemy.pool import NullPool
 from sqlmodel import Session, delete, create_engine
 
 from app.core.config import settings
+from app.core.query_stats import instrument_engine
+from app.core.rate_limit import get_rate_limit_backend
 from app.main import app
-from app.models import Item, User, StudentProgress, SQLModel
+from app.models import Item, ProgressEvent, User, StudentProgress, SQLModel
 from tests.utils.user import authentication_token_from_email
 from tests.utils.utils import get_superuser_token_headers
 
 # Use SQLite for testing
 test_engine = create_engine("sqlite:///./test.db", connect_args={"check_same_thread": False})
 
+# The same database for async code. Tests call asyncio.run() and the
+# TestClient runs its own loop, so connections must not outlive a loop
+async_test_engine = create_async_engine("sqlite+aiosqlite:///./test.db", poolclass=NullPool)
+
+instrument_engine(test_engine)
+instrument_engine(async_test_engine.sync_engine)
+
+pytest_plugins = ["tests.utils.query_budget"]
+
 # Create all tables
 SQLModel.metadata.create_all(test_engine)
 
@@ -46,6 +59,8 @@ def db() -> Generator[Session, None, None]:
         yield session
         
         # Cleanup
+        statement = delete(ProgressEvent)
+        session.execute(statement)
         statement = delete(StudentProgress)
         session.execute(statement)
         statement = delete(Item)
@@ -55,6 +70,12 @@ def db() -> Generator[Session, None, None]:
         session.commit()
 
 
+@pytest.fixture(autouse=True)
+def reset_rate_limits() -> None:
+    # The suite logs in from one address far faster than any client may
+    get_rate_limit_backend().clear()
+
+
 @pytest.fixture(scope="module")
 def client() -> Generator[TestClient, None, None]:
     with TestClient(app) as c:
@@ -0,0 +1,36 @@
+from pathlib import Path
+
+import pytest
+from jwt.exceptions import InvalidTokenError
+
+from app.core.jwt_keys import TokenKeys, generate_private_key, load_private_keys
+
+
+def test_symmetric_keys() -> None:
+    keys = TokenKeys(algorithm="HS256")
+    assert keys.decode(keys.encode({"sub": "user"})) == {"sub": "user"}
+    assert keys.jwks() == {"keys": []}
+    with pytest.raises(ValueError):
+        TokenKeys(algorithm="RS256")
+
+
+@pytest.mark.parametrize("algorithm", ["RS256", "EdDSA"])
+def test_asymmetric_key_rotation(tmp_path: Path, algorithm: str) -> None:
+    pytest.importorskip("cryptography")
+    (tmp_path / "2026-01.pem").write_bytes(generate_private_key(algorithm))
+    old = TokenKeys(algorithm=algorithm, keys=load_private_keys(tmp_path))
+    token = old.encode({"sub": "user"})
+
+    (tmp_path / "2026-02.pem").write_bytes(generate_private_key(algorithm))
+    rotated = TokenKeys(algorithm=algorithm, keys=load_private_keys(tmp_path))
+    assert rotated.signing_key_id == "2026-02"
+    # Tokens signed with the previous key keep verifying
+    assert rotated.decode(token) == {"sub": "user"}
+    assert rotated.decode(rotated.encode({"sub": "other"})) == {"sub": "other"}
+    assert [k["kid"] for k in rotated.jwks()["keys"]] == ["2026-01", "2026-02"]
+    assert all(k["alg"] == algorithm for k in rotated.jwks()["keys"])
+
+    with pytest.raises(InvalidTokenError):
+        old.decode(rotated.encode({"sub": "user"}))
+    with pytest.raises(InvalidTokenError):
+        rotated.decode(TokenKeys(algorithm="HS256").encode({"sub": "user"}))
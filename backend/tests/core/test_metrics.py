@@ -0,0 +1,54 @@
+"""Tests for the in-process metrics registry."""
+
+import pytest
+
+from app.core.metrics import MetricsRegistry
+
+
+def test_counter_renders_total() -> None:
+    registry = MetricsRegistry()
+    counter = registry.counter("jobs", "Jobs processed.", ("kind",))
+    counter.inc(kind="audio")
+    counter.inc(2, kind="audio")
+
+    assert counter.value(kind="audio") == 3
+    assert 'jobs_total{kind="audio"} 3' in registry.render()
+
+
+def test_histogram_buckets_are_cumulative() -> None:
+    registry = MetricsRegistry()
+    histogram = registry.histogram("latency", "Latency.", buckets=(0.1, 1.0))
+    for value in (0.05, 0.5, 0.7, 3.0):
+        histogram.observe(value)
+
+    snapshot = histogram.snapshot()
+    assert snapshot["count"] == 4
+    assert snapshot["buckets"] == {"0.1": 1, "1": 3, "+Inf": 4}
+    rendered = registry.render()
+    assert "# TYPE latency histogram" in rendered
+    assert 'latency_bucket{le="+Inf"} 4' in rendered
+    assert "latency_sum 4.25" in rendered
+
+
+def test_gauge_callback_is_read_at_scrape_time() -> None:
+    registry = MetricsRegistry()
+    readings = {(): 1.0}
+    registry.gauge("in_use", "Connections in use.", callback=lambda: readings)
+    readings[()] = 7.0
+
+    assert "in_use 7" in registry.render()
+
+
+def test_registering_same_metric_twice_returns_existing() -> None:
+    registry = MetricsRegistry()
+    first = registry.counter("requests", "Requests.")
+    assert registry.counter("requests", "Requests.") is first
+    with pytest.raises(ValueError):
+        registry.histogram("requests", "Requests.")
+
+
+def test_wrong_labels_are_rejected() -> None:
+    registry = MetricsRegistry()
+    counter = registry.counter("labelled", "Labelled.", ("model",))
+    with pytest.raises(ValueError):
+        counter.inc(route="/")
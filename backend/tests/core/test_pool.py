@@ -0,0 +1,54 @@
+from pathlib import Path
+
+import pytest
+from sqlalchemy import create_engine, exc
+
+from app.core.metrics import REGISTRY
+from app.core.pool import (
+    POOL_CHECKOUT_SECONDS,
+    POOL_TIMEOUTS,
+    POOL_WAITS,
+    InstrumentedQueuePool,
+    engine_options,
+)
+
+
+def test_engine_options(monkeypatch: pytest.MonkeyPatch) -> None:
+    from app.core.config import settings
+
+    monkeypatch.setattr(settings, "DB_POOL_SIZE", 20)
+    monkeypatch.setattr(settings, "DB_PGBOUNCER", False)
+    options = engine_options("sync")
+    assert options["pool_size"] == 20
+    assert options["poolclass"] is InstrumentedQueuePool
+    assert "connect_args" not in options
+
+    monkeypatch.setattr(settings, "DB_PGBOUNCER", True)
+    assert engine_options("sync")["connect_args"] == {"prepare_threshold": None}
+
+
+def test_pool_metrics(tmp_path: Path) -> None:
+    engine = create_engine(
+        f"sqlite:///{tmp_path / 'pool.db'}",
+        poolclass=InstrumentedQueuePool,
+        pool_logging_name="test-pool",
+        pool_size=1,
+        max_overflow=0,
+        pool_timeout=0.01,
+    )
+    checkouts = POOL_CHECKOUT_SECONDS.snapshot(pool="test-pool")["count"]
+
+    with engine.connect():
+        assert 'btec_db_pool_connections{pool="test-pool",state="in_use"} 1' in (
+            REGISTRY.render()
+        )
+        with pytest.raises(exc.TimeoutError):
+            engine.connect()
+
+    assert POOL_WAITS.value(pool="test-pool") == 1
+    assert POOL_TIMEOUTS.value(pool="test-pool") == 1
+    assert POOL_CHECKOUT_SECONDS.snapshot(pool="test-pool")["count"] == checkouts + 2
+    assert 'btec_db_pool_connections{pool="test-pool",state="idle"} 1' in (
+        REGISTRY.render()
+    )
+    engine.dispose()
@@ -0,0 +1,94 @@
+import logging
+
+import pytest
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+from sqlmodel import Session, select
+
+from app.core.query_stats import QueryStatsMiddleware, QueryStats, track_queries
+from app.models import User
+from tests.conftest import test_engine
+
+pytest_plugins = ["pytester"]
+
+
+def test_query_stats_record() -> None:
+    stats = QueryStats()
+    for i in range(7):
+        stats.record(f"SELECT {i % 2}", duration=i / 100)
+    assert stats.count == 7
+    assert stats.duration == pytest.approx(0.21)
+    assert [d for d, _ in stats.slowest] == [0.06, 0.05, 0.04, 0.03, 0.02]
+    assert stats.repeated(4) == [("SELECT 0", 4)]
+
+
+def test_track_queries() -> None:
+    with track_queries() as stats, Session(test_engine) as session:
+        for _ in range(3):
+            session.exec(select(User).where(User.email == "nobody@example.com")).all()
+    assert stats.count == 3
+    assert len(stats.shapes) == 1
+    # Statements outside the block are not recorded
+    with Session(test_engine) as session:
+        session.exec(select(User)).all()
+    assert stats.count == 3
+
+
+def test_middleware_headers_and_n_plus_one_log(
+    monkeypatch: pytest.MonkeyPatch, caplog: pytest.LogCaptureFixture
+) -> None:
+    from app.core.config import settings
+
+    monkeypatch.setattr(settings, "DB_QUERY_REPEAT_THRESHOLD", 3)
+    app = FastAPI()
+    app.add_middleware(QueryStatsMiddleware)
+
+    @app.get("/users/{n}")
+    def read_users(n: int) -> int:
+        with Session(test_engine) as session:
+            for i in range(n):
+                session.exec(select(User).where(User.email == f"{i}@example.com")).all()
+        return n
+
+    with TestClient(app) as client, caplog.at_level(logging.WARNING):
+        r = client.get("/users/2")
+        assert r.headers["X-DB-Query-Count"] == "2"
+        assert r.headers["Server-Timing"].startswith("db;dur=")
+        assert "N+1" not in caplog.text
+
+        client.get("/users/3")
+        assert "Possible N+1 in GET /users/{n}: statement ran 3 times" in caplog.text
+
+
+def test_query_budget_plugin(pytester: pytest.Pytester) -> None:
+    pytester.makepyfile(
+        """
+        import pytest
+        from fastapi import FastAPI
+        from fastapi.testclient import TestClient
+        from sqlmodel import Session, text
+
+        from app.core.query_stats import QueryStatsMiddleware
+        from tests.conftest import test_engine
+
+        app = FastAPI()
+        app.add_middleware(QueryStatsMiddleware)
+
+        @app.get("/")
+        def index() -> None:
+            with Session(test_engine) as session:
+                for _ in range(3):
+                    session.exec(text("SELECT 1"))
+
+        @pytest.mark.query_budget(3)
+        def test_within_budget() -> None:
+            assert TestClient(app).get("/").status_code == 200
+
+        @pytest.mark.query_budget(2)
+        def test_over_budget() -> None:
+            assert TestClient(app).get("/").status_code == 200
+        """
+    )
+    result = pytester.runpytest_inprocess("-p", "tests.utils.query_budget")
+    result.assert_outcomes(passed=1, failed=1)
+    result.stdout.fnmatch_lines(["*/: 3 statements (budget 2)", "*3x SELECT 1"])
@@ -0,0 +1,156 @@
+import asyncio
+import uuid
+from datetime import timedelta
+from typing import Annotated
+
+import pytest
+from fastapi import FastAPI, Form
+from fastapi.testclient import TestClient
+
+from app.core.rate_limit import (
+    Limit,
+    MemoryRateLimitBackend,
+    RateLimitMiddleware,
+    parse_limits,
+)
+from app.core.security import create_access_token
+
+
+class Clock:
+    def __init__(self) -> None:
+        self.now = 1000.0
+
+    def __call__(self) -> float:
+        return self.now
+
+
+def test_parse_limits() -> None:
+    assert parse_limits("ip:30/minute, user:6/hour") == [
+        Limit("ip", 30, 60),
+        Limit("user", 6, 3600),
+    ]
+    for spec in ["ip:30", "host:1/minute", "ip:x/minute", "ip:1/week"]:
+        with pytest.raises(ValueError):
+            parse_limits(spec)
+
+
+def test_sliding_window() -> None:
+    clock = Clock()
+    backend = MemoryRateLimitBackend(max_keys=100, clock=clock)
+    limit = Limit("ip", 10, 60)
+
+    def hits(n: int) -> list[float | None]:
+        return [asyncio.run(backend.hit("key", limit)) for _ in range(n)]
+
+    assert hits(10) == [None] * 10
+    rejected = hits(1)[0]
+    # Full current window: the next request fits in the next window
+    assert rejected == pytest.approx(20)
+    # 30s into the next window, 11 * 0.5 of the previous window still count
+    clock.now += 50
+    assert hits(4) == [None] * 4
+    assert hits(1)[0] == pytest.approx(60 * (1 - 4 / 11) - 30)
+    # Two windows later the counter is empty again
+    clock.now += 120
+    assert hits(10) == [None] * 10
+    # Keys are counted apart
+    assert asyncio.run(backend.hit("other", limit)) is None
+
+
+def test_memory_backend_evicts() -> None:
+    clock = Clock()
+    backend = MemoryRateLimitBackend(max_keys=10, clock=clock)
+    limit = Limit("ip", 1, 60)
+    for i in range(9):
+        asyncio.run(backend.hit(f"old-{i}", limit))
+    asyncio.run(backend.hit("hourly", Limit("ip", 1, 3600)))
+    clock.now += 180
+    asyncio.run(backend.hit("new", limit))
+    # The hourly counter is still live
+    assert list(backend._counters) == ["hourly", "new"]
+    for i in range(20):
+        asyncio.run(backend.hit(f"key-{i}", limit))
+    assert len(backend._counters) <= 10
+
+
+def test_middleware() -> None:
+    app = FastAPI()
+
+    @app.post("/evaluate")
+    def evaluate() -> dict[str, str]:
+        return {"status": "ok"}
+
+    @app.post("/other")
+    def other() -> dict[str, str]:
+        return {"status": "ok"}
+
+    app.add_middleware(
+        RateLimitMiddleware,
+        routes={"POST /evaluate": "ip:5/minute,user:2/minute"},
+        backend=MemoryRateLimitBackend(max_keys=100),
+    )
+    client = TestClient(app)
+
+    def headers() -> dict[str, str]:
+        token = create_access_token(uuid.uuid4(), timedelta(minutes=5))
+        return {"Authorization": f"Bearer {token}"}
+
+    first, second = headers(), headers()
+    assert [client.post("/evaluate", headers=first).status_code for _ in range(3)] == [
+        200,
+        200,
+        429,
+    ]
+    r = client.post("/evaluate", headers=first)
+    assert r.status_code == 429
+    assert int(r.headers["Retry-After"]) >= 1
+    # The first user's rejected requests did not count against the address
+    assert [client.post("/evaluate", headers=second).status_code for _ in range(3)] == [
+        200,
+        200,
+        429,
+    ]
+    # Until the address is limited
+    assert client.post("/evaluate").status_code == 200
+    assert client.post("/evaluate").status_code == 429
+    assert client.post("/evaluate", headers=headers()).status_code == 429
+    # Routes without limits, and other methods, are not counted
+    assert client.post("/other").status_code == 200
+    assert client.get("/evaluate").status_code == 405
+
+
+def test_middleware_username() -> None:
+    app = FastAPI()
+
+    @app.post("/login")
+    def read_login(username: Annotated[str, Form()]) -> dict[str, str]:
+        return {"username": username}
+
+    app.add_middleware(
+        RateLimitMiddleware,
+        routes={"POST /login": "username:2/minute,ip:5/minute"},
+        backend=MemoryRateLimitBackend(max_keys=100),
+    )
+    client = TestClient(app)
+
+    def login(username: str) -> int:
+        r = client.post("/login", data={"username": username, "password": "x"})
+        if r.status_code == 200:
+            # The app still gets the body the middleware read
+            assert r.json() == {"username": username}
+        status: int = r.status_code
+        return status
+
+    assert [login("alice@example.com") for _ in range(3)] == [200, 200, 429]
+    # Counted whatever the case, and whatever the form encoding
+    assert login("ALICE@example.com ") == 429
+    r = client.post(
+        "/login",
+        data={"username": "alice@example.com"},
+        files={"file": ("f", b"")},
+    )
+    assert r.status_code == 429
+    # Guesses at one account leave the address's budget to the others
+    assert [login("bob@example.com") for _ in range(2)] == [200, 200]
+    assert login("carol@example.com") == 200
+    assert login("dave@example.com") == 429
@@ -0,0 +1,99 @@
+import uuid
+from collections.abc import Generator
+from pathlib import Path
+
+import pytest
+from sqlalchemy import Engine, exc
+from sqlmodel import SQLModel, create_engine, select
+
+from app.core.replicas import Replica, ReplicaSet, RoutingSession
+from app.models import StudentProgress, StudentProgressCreate, User
+from app.modules import module_catalog
+
+
+@pytest.fixture
+def primary(tmp_path: Path) -> Generator[Engine, None, None]:
+    engine = create_engine(f"sqlite:///{tmp_path / 'primary.db'}")
+    SQLModel.metadata.create_all(engine)
+    # Module IDs cached for the test database do not exist in this one
+    module_catalog.clear()
+    yield engine
+    module_catalog.clear()
+
+
+def make_replica(tmp_path: Path, name: str) -> Replica:
+    engine = create_engine(f"sqlite:///{tmp_path / name}.db")
+    SQLModel.metadata.create_all(engine)
+    return Replica(name=name, engine=engine)
+
+
+def replica_set(replicas: list[Replica], lags: dict[str, float | None]) -> ReplicaSet:
+    engines = {r.engine: r.name for r in replicas}
+
+    def measure_lag(engine: Engine) -> float:
+        lag = lags[engines[engine]]
+        if lag is None:
+            raise exc.OperationalError("SELECT 1", {}, Exception("unreachable"))
+        return lag
+
+    return ReplicaSet(replicas, max_lag=5, check_interval=0, measure_lag=measure_lag)
+
+
+def test_round_robin_skips_lagging_and_unreachable(tmp_path: Path) -> None:
+    replicas = [make_replica(tmp_path, f"r{i}") for i in range(3)]
+    lags: dict[str, float | None] = {"r0": 0, "r1": 30, "r2": 1}
+    replica_set_ = replica_set(replicas, lags)
+
+    chosen = [replica_set_.choose() for _ in range(4)]
+    assert chosen == [replicas[0].engine, replicas[2].engine] * 2
+    assert replica_set_.lag() == {("r0",): 0, ("r1",): 30, ("r2",): 1}
+
+    lags.update(r0=None, r2=10)
+    assert replica_set_.choose() is None
+
+
+def test_routing_session_reads_own_writes(tmp_path: Path, primary: Engine) -> None:
+    replica = make_replica(tmp_path, "replica")
+    replicas = replica_set([replica], {"replica": 0})
+
+    with RoutingSession(primary=primary, replicas=replicas) as session:
+        # The replica is empty, so reading from it finds nothing
+        assert session.exec(select(User)).all() == []
+        user = User(email="replica@example.com", hashed_password="x")
+        session.add(user)
+        session.commit()
+        assert session.wrote
+        assert session.exec(select(User)).one().email == "replica@example.com"
+
+    with RoutingSession(primary=primary, replicas=replicas) as session:
+        assert session.exec(select(User)).all() == []
+        assert session.get_bind(clause=select(User).with_for_update()) is primary
+
+
+def test_routing_session_without_replicas(primary: Engine) -> None:
+    with RoutingSession(primary=primary, replicas=None) as session:
+        user = User(email="primary@example.com", hashed_password="x")
+        session.add(user)
+        session.commit()
+    with RoutingSession(primary=primary, replicas=None) as session:
+        assert session.exec(select(User)).one().email == "primary@example.com"
+
+
+def test_upsert_goes_to_primary(tmp_path: Path, primary: Engine) -> None:
+    from app import crud
+
+    replica = make_replica(tmp_path, "replica")
+    with RoutingSession(
+        primary=primary, replicas=replica_set([replica], {"replica": 0})
+    ) as session:
+        user = User(id=uuid.uuid4(), email="upsert@example.com", hashed_password="x")
+        session.add(user)
+        session.commit()
+        progress = crud.create_or_update_student_progress(
+            session=session,
+            user_id=user.id,
+            progress_in=StudentProgressCreate(module_name="Networking", progress=5),
+        )
+        assert progress.progress == 5
+    with RoutingSession(primary=primary, replicas=None) as session:
+        assert len(session.exec(select(StudentProgress)).all()) == 1
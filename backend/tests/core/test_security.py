@@ -0,0 +1,55 @@
+import asyncio
+import threading
+
+import pytest
+
+from app.core.security import PasswordHasher, PasswordHasherBusy
+
+
+def test_password_hasher_hash_and_verify() -> None:
+    hasher = PasswordHasher(max_workers=2, max_queue=0)
+
+    async def check() -> tuple[bool, bool]:
+        hashed = await hasher.hash("correct-password")
+        return (
+            await hasher.verify("correct-password", hashed),
+            await hasher.verify("wrong-password", hashed),
+        )
+
+    try:
+        assert asyncio.run(check()) == (True, False)
+    finally:
+        hasher.shutdown()
+    assert hasher.in_flight == 0
+
+
+def test_password_hasher_sync() -> None:
+    hasher = PasswordHasher(max_workers=1, max_queue=0)
+    try:
+        hashed = hasher.hash_sync("correct-password")
+        assert hasher.verify_sync("correct-password", hashed)
+        assert not hasher.verify_sync("wrong-password", hashed)
+    finally:
+        hasher.shutdown()
+    assert hasher.in_flight == 0
+
+
+def test_password_hasher_rejects_when_full() -> None:
+    hasher = PasswordHasher(max_workers=1, max_queue=1)
+    release = threading.Event()
+
+    async def check() -> None:
+        # One running, one queued
+        blocked = [asyncio.ensure_future(hasher._run(release.wait)) for _ in range(2)]
+        await asyncio.sleep(0)
+        assert hasher.in_flight == 2
+        with pytest.raises(PasswordHasherBusy):
+            await hasher._run(release.wait)
+        release.set()
+        await asyncio.gather(*blocked)
+
+    try:
+        asyncio.run(check())
+    finally:
+        hasher.shutdown()
+    assert hasher.in_flight == 0
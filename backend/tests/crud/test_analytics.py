@@ -0,0 +1,87 @@
+"""Tests for the incrementally maintained module statistics."""
+
+import uuid
+from collections.abc import Iterable
+from pathlib import Path
+from typing import Any
+
+from sqlalchemy import text
+from sqlmodel import Session, SQLModel, col, create_engine, delete
+
+from app import crud
+from app.analytics import get_module_stats, list_module_stats
+from app.models import StudentProgress, StudentProgressCreate
+from tests.utils.user import create_random_user
+from tests.utils.utils import random_lower_string
+
+
+def _write(db: Session, user_id: uuid.UUID, module_name: str, **fields: Any) -> None:
+    crud.create_or_update_student_progress(
+        session=db,
+        user_id=user_id,
+        progress_in=StudentProgressCreate(module_name=module_name, **fields),
+    )
+
+
+def test_module_stats_follow_progress_writes(db: Session) -> None:
+    module_name = random_lower_string()
+    first, second, third = (create_random_user(db).id for _ in range(3))
+    _write(db, first, module_name, progress=40, struggling=True, last_score=35)
+    _write(db, second, module_name, progress=80, last_score=100)
+    _write(db, third, module_name, progress=60)
+
+    stats = get_module_stats(session=db, module_name=module_name)
+    assert stats
+    assert (stats.students, stats.struggling, stats.unscored) == (3, 1, 1)
+    assert stats.average_progress == 60
+    assert stats.average_score == 67.5
+    assert stats.score_histogram == [0, 0, 0, 1, 0, 0, 0, 0, 0, 1]
+
+    # An update moves the student to another score band
+    _write(db, first, module_name, progress=90, struggling=False, last_score=91)
+    stats = get_module_stats(session=db, module_name=module_name)
+    assert stats
+    assert (stats.students, stats.struggling) == (3, 0)
+    assert stats.average_progress == 76.7
+    assert stats.score_histogram == [0] * 9 + [2]
+
+
+def test_module_stats_after_delete(db: Session) -> None:
+    module_name = random_lower_string()
+    user_id = create_random_user(db).id
+    _write(db, user_id, module_name, progress=50, last_score=55)
+
+    db.execute(delete(StudentProgress).where(col(StudentProgress.user_id) == user_id))
+    db.commit()
+
+    assert get_module_stats(session=db, module_name=module_name) is None
+    assert module_name not in {s.module_name for s in list_module_stats(session=db)}
+
+
+def test_list_module_stats(db: Session) -> None:
+    names = sorted(random_lower_string() for _ in range(2))
+    user_id = create_random_user(db).id
+    for name in names:
+        _write(db, user_id, name, progress=30)
+
+    stats = {s.module_name: s for s in list_module_stats(session=db)}
+    assert [stats[name].students for name in names] == [1, 1]
+
+
+def test_create_all_twice_keeps_triggers(tmp_path: Path) -> None:
+    # init_db runs create_all() on databases the migrations already built
+    engine = create_engine(f"sqlite:///{tmp_path / 'app.db'}")
+    SQLModel.metadata.create_all(engine)
+    SQLModel.metadata.create_all(engine)
+    with engine.connect() as connection:
+        triggers: Iterable[str] = connection.execute(
+            text("SELECT name FROM sqlite_master WHERE type = 'trigger'")
+        ).scalars()
+        assert sorted(triggers) == [
+            "studentprogress_delete_stats",
+            "studentprogress_insert_events",
+            "studentprogress_insert_stats",
+            "studentprogress_update_events",
+            "studentprogress_update_stats",
+        ]
+    engine.dispose()
@@ -0,0 +1,97 @@
+import asyncio
+from collections.abc import Awaitable, Callable
+from typing import TypeVar
+
+from sqlmodel import Session
+from sqlmodel.ext.asyncio.session import AsyncSession
+
+from app import async_crud, crud
+from app.core.security import verify_password
+from app.models import StudentProgressCreate, User, UserCreate, UserUpdate
+from app.user_cache import token_revocations
+from tests.conftest import async_test_engine
+from tests.utils.user import create_random_user
+from tests.utils.utils import random_email, random_lower_string
+
+T = TypeVar("T")
+
+
+def run(fn: Callable[[AsyncSession], Awaitable[T]]) -> T:
+    async def main() -> T:
+        async with AsyncSession(async_test_engine, expire_on_commit=False) as session:
+            return await fn(session)
+
+    return asyncio.run(main())
+
+
+def test_create_user_and_authenticate() -> None:
+    email = random_email()
+    password = random_lower_string()
+
+    user = run(
+        lambda s: async_crud.create_user(
+            session=s, user_create=UserCreate(email=email, password=password)
+        )
+    )
+    assert user.email == email
+    assert verify_password(password, user.hashed_password)
+
+    authenticated = run(
+        lambda s: async_crud.authenticate(session=s, email=email, password=password)
+    )
+    assert authenticated and authenticated.id == user.id
+    assert (
+        run(lambda s: async_crud.authenticate(session=s, email=email, password="x"))
+        is None
+    )
+
+
+def test_create_or_update_student_progress(db: Session) -> None:
+    user = create_random_user(db)
+
+    async def upsert_twice(session: AsyncSession) -> list[int]:
+        for progress in (20, 45):
+            await async_crud.create_or_update_student_progress(
+                session=session,
+                user_id=user.id,
+                progress_in=StudentProgressCreate(module_name="Networking", progress=progress),
+            )
+        rows = await async_crud.get_student_progress_for_user(
+            session=session, user_id=user.id
+        )
+        return [row.progress for row in rows]
+
+    assert run(upsert_twice) == [45]
+    rows = crud.get_student_progress_for_user(session=db, user_id=user.id)
+    assert [(r.module_name, r.progress) for r in rows] == [("Networking", 45)]
+
+
+def test_get_struggling_modules_for_user(db: Session) -> None:
+    user = create_random_user(db)
+    for module_name, progress in (("Networking", 30), ("Databases", 90)):
+        crud.create_or_update_student_progress(
+            session=db,
+            user_id=user.id,
+            progress_in=StudentProgressCreate(module_name=module_name, progress=progress),
+        )
+
+    struggling = run(
+        lambda s: async_crud.get_struggling_modules_for_user(session=s, user_id=user.id)
+    )
+    assert [p.module_name for p in struggling] == ["Networking"]
+
+
+def test_update_user_password_revokes_tokens(db: Session) -> None:
+    user = create_random_user(db)
+
+    async def change_password(session: AsyncSession) -> User:
+        db_user = await session.get(User, user.id)
+        assert db_user
+        return await async_crud.update_user(
+            session=session, db_user=db_user, user_in=UserUpdate(password="new-password")
+        )
+
+    updated = run(change_password)
+    assert updated.token_version == 1
+    assert verify_password("new-password", updated.hashed_password)
+    assert token_revocations.is_revoked(user.id, 0)
@@ -0,0 +1,79 @@
+import io
+import json
+import uuid
+
+from sqlmodel import Session
+
+from app import crud
+from app.ingest import chunked, ingest_progress
+from app.models import StudentProgressCreate
+from tests.utils.user import create_random_user
+from tests.utils.utils import random_lower_string
+
+
+def test_chunked() -> None:
+    assert list(chunked(range(5), 2)) == [[0, 1], [2, 3], [4]]
+
+
+def test_ingest_csv(db: Session) -> None:
+    user = create_random_user(db)
+    module_name = random_lower_string()
+    crud.create_or_update_student_progress(
+        session=db,
+        user_id=user.id,
+        progress_in=StudentProgressCreate(module_name=module_name, progress=10),
+    )
+    stream = io.StringIO(
+        "user_id,module_name,progress,struggling,last_score,attempts\n"
+        f"{user.id},{module_name},80,false,75.5,4\n"
+        f"{user.id},Databases,40,true,,1\n"
+    )
+
+    report = ingest_progress(session=db, stream=stream, fmt="csv", chunk_size=1)
+
+    assert (report.total, report.loaded, report.failed) == (2, 2, 0)
+    db.expire_all()
+    rows = {
+        p.module_name: p
+        for p in crud.get_student_progress_for_user(session=db, user_id=user.id)
+    }
+    assert len(rows) == 2
+    assert rows[module_name].progress == 80
+    assert rows[module_name].last_score == 75.5
+    assert rows[module_name].attempts == 4
+    assert rows["Databases"].struggling is True
+    assert rows["Databases"].last_score is None
+
+
+def test_ingest_jsonl_reports_error_rows(db: Session) -> None:
+    user = create_random_user(db)
+    unknown = uuid.uuid4()
+    lines = [
+        json.dumps({"user_id": str(user.id), "module_name": "Networking", "progress": 55}),
+        json.dumps({"user_id": str(user.id), "module_name": "Security", "progress": 101}),
+        "not json",
+        json.dumps({"user_id": "abc", "module_name": "Networking", "progress": 5}),
+        "",
+        json.dumps({"user_id": str(unknown), "module_name": "Networking", "progress": 5}),
+        json.dumps({"user_id": str(user.id), "module_name": "Networking", "progress": 65}),
+    ]
+    progress_calls = []
+
+    report = ingest_progress(
+        session=db,
+        stream=io.StringIO("\n".join(lines)),
+        fmt="jsonl",
+        on_progress=lambda r: progress_calls.append(r.total),
+    )
+
+    assert (report.total, report.loaded, report.failed) == (6, 2, 4)
+    assert [e.line for e in report.errors] == [2, 3, 4, 6]
+    assert "progress" in report.errors[0].message
+    assert report.errors[2].message == "user_id: Invalid UUID"
+    assert progress_calls == [6]
+    assert report.rows_per_second > 0
+    db.expire_all()
+    rows = crud.get_student_progress_for_user(session=db, user_id=user.id)
+    # The last row for a module wins
+    assert [(r.module_name, r.progress) for r in rows] == [("Networking", 65)]
+    assert report.errors[3].message == f"user_id: Unknown user {unknown}"
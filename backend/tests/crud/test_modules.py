@@ -0,0 +1,62 @@
+"""Tests for the module catalog and its name-to-ID cache."""
+
+from sqlmodel import Session, select
+
+from app import crud
+from app.core.query_stats import track_queries
+from app.models import Module, StudentProgressCreate, StudentProgressUpdate
+from app.modules import ModuleCatalog
+from tests.utils.user import create_random_user
+from tests.utils.utils import random_lower_string
+
+
+def test_get_or_create_id_caches_names(db: Session) -> None:
+    catalog = ModuleCatalog()
+    name = random_lower_string()
+    assert catalog.get_id(session=db, name=name) is None
+
+    module_id = catalog.get_or_create_id(session=db, name=name)
+    assert db.exec(select(Module.id).where(Module.name == name)).one() == module_id
+    with track_queries() as stats:
+        assert catalog.get_id(session=db, name=name) == module_id
+        assert catalog.get_or_create_id(session=db, name=name) == module_id
+    assert stats.count == 0
+
+    # A fresh process finds the existing module instead of adding another
+    assert ModuleCatalog().get_or_create_id(session=db, name=name) == module_id
+
+
+def test_get_or_create_ids(db: Session) -> None:
+    catalog = ModuleCatalog()
+    existing, new = random_lower_string(), random_lower_string()
+    existing_id = catalog.get_or_create_id(session=db, name=existing)
+
+    ids = catalog.get_or_create_ids(session=db, names=[existing, new, new])
+    assert ids[existing] == existing_id
+    assert ids.keys() == {existing, new}
+    assert catalog.get_ids(session=db, names=[new, random_lower_string()]) == {
+        new: ids[new]
+    }
+
+
+def test_progress_keeps_module_names(db: Session) -> None:
+    user = create_random_user(db)
+    progress = crud.create_or_update_student_progress(
+        session=db,
+        user_id=user.id,
+        progress_in=StudentProgressCreate(module_name="Networking", progress=40),
+    )
+    assert progress.module_name == "Networking"
+
+    progress = crud.set_student_progress_fields(
+        session=db,
+        progress_obj=progress,
+        progress_update=StudentProgressUpdate(module_name="Databases"),
+    )
+    assert progress.module_name == "Databases"
+    assert crud.get_student_progress_by_module(
+        session=db, user_id=user.id, module_name="Databases"
+    )
+    assert not crud.get_student_progress_by_module(
+        session=db, user_id=user.id, module_name=random_lower_string()
+    )
@@ -0,0 +1,86 @@
+"""Tests for progress history recording and learning curves."""
+
+from datetime import date, datetime, timedelta, timezone
+
+from sqlmodel import Session
+
+from app import crud
+from app.models import StudentProgressCreate
+from app.progress_history import (
+    _add_months,
+    get_module_curve,
+    get_student_curve,
+    partition_name,
+)
+from tests.utils.user import create_random_user
+from tests.utils.utils import random_lower_string
+
+
+def _since() -> datetime:
+    return datetime.now(timezone.utc) - timedelta(days=1)
+
+
+def test_progress_writes_record_events(db: Session) -> None:
+    user = create_random_user(db)
+    module_name = random_lower_string()
+    for progress in (20, 45, 70):
+        crud.create_or_update_student_progress(
+            session=db,
+            user_id=user.id,
+            progress_in=StudentProgressCreate(
+                module_name=module_name,
+                progress=progress,
+                struggling=progress < 50,
+                attempts=1,
+            ),
+        )
+
+    events = get_student_curve(session=db, user_id=user.id, since=_since())
+    assert [e.progress for e in events] == [20, 45, 70]
+    assert [e.struggling for e in events] == [True, True, False]
+    assert {e.module_name for e in events} == {module_name}
+
+
+def test_student_curve_filters_module_and_period(db: Session) -> None:
+    user = create_random_user(db)
+    for module_name in ("Networking", "Databases"):
+        crud.create_or_update_student_progress(
+            session=db,
+            user_id=user.id,
+            progress_in=StudentProgressCreate(
+                module_name=module_name, progress=50, struggling=False, attempts=1
+            ),
+        )
+
+    events = get_student_curve(
+        session=db, user_id=user.id, module_name="Databases", since=_since()
+    )
+    assert [e.module_name for e in events] == ["Databases"]
+    future = datetime.now(timezone.utc) + timedelta(days=1)
+    assert get_student_curve(session=db, user_id=user.id, since=future) == []
+
+
+def test_module_curve(db: Session) -> None:
+    module_name = random_lower_string()
+    for progress, struggling in ((40, True), (80, False)):
+        crud.create_or_update_student_progress(
+            session=db,
+            user_id=create_random_user(db).id,
+            progress_in=StudentProgressCreate(
+                module_name=module_name,
+                progress=progress,
+                struggling=struggling,
+                attempts=1,
+            ),
+        )
+
+    (point,) = get_module_curve(session=db, module_name=module_name, since=_since())
+    assert point.average_progress == 60
+    assert (point.students, point.struggling) == (2, 1)
+    assert point.bucket.date() == datetime.now(timezone.utc).date()
+
+
+def test_partition_names() -> None:
+    assert partition_name(date(2026, 1, 1)) == "progress_event_y2026m01"
+    assert _add_months(date(2026, 11, 1), 3) == date(2027, 2, 1)
+    assert _add_months(date(2026, 1, 1), -1) == date(2025, 12, 1)
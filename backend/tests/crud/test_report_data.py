@@ -0,0 +1,102 @@
+"""Tests for the single-query report data service."""
+
+import uuid
+
+from sqlmodel import Session
+
+from app import crud
+from app.models import StudentProgressCreate
+from app.report_data import get_class_report_members, get_student_report_data
+from tests.utils.user import create_random_user
+from tests.utils.utils import random_lower_string
+
+
+def test_student_report_data_includes_cohort_statistics(db: Session) -> None:
+    module_name = random_lower_string()
+    student = create_random_user(db)
+    classmate = create_random_user(db)
+    for user, progress in ((student, 40), (classmate, 80)):
+        crud.create_or_update_student_progress(
+            session=db,
+            user_id=user.id,
+            progress_in=StudentProgressCreate(
+                module_name=module_name, progress=progress, attempts=4
+            ),
+        )
+
+    data = get_student_report_data(session=db, user_id=student.id)
+
+    assert data is not None
+    assert data.email == student.email
+    assert len(data.modules) == 1
+    module = data.modules[0]
+    assert module.cohort_average == 60.0
+    assert module.cohort_size == 2
+    assert module.cohort_rank == 2
+    assert module.needs_remediation is True
+    assert data.summary.module_count == 1
+    assert data.summary.average_progress == 40.0
+
+
+def test_student_report_data_context_has_recommendations(db: Session) -> None:
+    student = create_random_user(db)
+    for module_name, progress, struggling in (
+        ("a_" + random_lower_string(), 90, False),
+        ("b_" + random_lower_string(), 85, True),
+    ):
+        crud.create_or_update_student_progress(
+            session=db,
+            user_id=student.id,
+            progress_in=StudentProgressCreate(
+                module_name=module_name, progress=progress, struggling=struggling
+            ),
+        )
+
+    data = get_student_report_data(session=db, user_id=student.id, threshold=60)
+
+    assert data is not None
+    assert data.summary.struggling_count == 1
+    context = data.to_context()
+    assert [m["module_name"][:2] for m in context["modules"]] == ["a_", "b_"]
+    assert len(context["recommendations"]) == 1
+    assert context["recommendations"][0]["struggling"] is True
+
+
+def test_student_report_data_without_progress(db: Session) -> None:
+    student = create_random_user(db)
+
+    data = get_student_report_data(session=db, user_id=student.id)
+
+    assert data is not None
+    assert data.modules == []
+    assert data.summary.module_count == 0
+    assert data.summary.average_progress == 0
+
+
+def test_student_report_data_unknown_user(db: Session) -> None:
+    assert get_student_report_data(session=db, user_id=uuid.uuid4()) is None
+
+
+def test_class_report_members(db: Session) -> None:
+    student = create_random_user(db)
+    idle = create_random_user(db)
+    for progress, struggling in ((20, True), (60, False)):
+        crud.create_or_update_student_progress(
+            session=db,
+            user_id=student.id,
+            progress_in=StudentProgressCreate(
+                module_name=random_lower_string(),
+                progress=progress,
+                struggling=struggling,
+            ),
+        )
+
+    members = {
+        m.email: m
+        for m in get_class_report_members(session=db, user_ids=[student.id, idle.id])
+    }
+
+    assert members[student.email].module_count == 2
+    assert members[student.email].average_progress == 40.0
+    assert members[student.email].struggling_count == 1
+    assert members[idle.email].module_count == 0
@@ -258,3 +258,44 @@ def test_student_progress_user_isolation(db: Session) -> None:
     user1_ids = {p.id for p in user1_all}
     user2_ids = {p.id for p in user2_all}
     assert user1_ids.isdisjoint(user2_ids)
+
+
+def test_upsert_keeps_fields_not_set(db: Session) -> None:
+    """Test that an upsert only overwrites the fields it sets."""
+    user = create_random_user(db)
+    module_name = random_lower_string()
+    crud.create_or_update_student_progress(
+        session=db,
+        user_id=user.id,
+        progress_in=StudentProgressCreate(
+            module_name=module_name, progress=30, last_score=45.0, attempts=3
+        ),
+    )
+
+    updated = crud.create_or_update_student_progress(
+        session=db,
+        user_id=user.id,
+        progress_in=StudentProgressCreate(module_name=module_name, progress=70),
+    )
+
+    assert updated.progress == 70
+    assert updated.last_score == 45.0
+    assert updated.attempts == 3
+
+
+def test_upsert_does_not_duplicate_rows(db: Session) -> None:
+    """Test that repeated writes for one module keep a single row."""
+    user = create_random_user(db)
+    module_name = random_lower_string()
+    ids = {
+        crud.create_or_update_student_progress(
+            session=db,
+            user_id=user.id,
+            progress_in=StudentProgressCreate(module_name=module_name, progress=p),
+        ).id
+        for p in (10, 20, 30)
+    }
+
+    assert len(ids) == 1
+    rows = crud.get_student_progress_for_user(session=db, user_id=user.id)
+    assert [r.progress for r in rows] == [30]
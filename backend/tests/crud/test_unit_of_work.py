@@ -0,0 +1,46 @@
+"""Tests for running crud functions in a unit of work."""
+
+import pytest
+from sqlmodel import Session, select
+
+from app import crud
+from app.core.query_stats import track_queries
+from app.models import Item, ItemCreate, User, UserCreate
+from tests.utils.utils import random_email, random_lower_string
+
+
+def _create_user_with_items(db: Session) -> User:
+    user = crud.create_user(
+        session=db,
+        user_create=UserCreate(email=random_email(), password=random_lower_string()),
+    )
+    for title in ("first", "second"):
+        crud.create_item(session=db, item_in=ItemCreate(title=title), owner_id=user.id)
+    return user
+
+
+def test_unit_of_work_skips_refreshes(db: Session) -> None:
+    with track_queries() as separate:
+        _create_user_with_items(db)
+    with track_queries() as combined, crud.unit_of_work(db):
+        user = _create_user_with_items(db)
+
+    # One INSERT per row, without a refresh SELECT after each commit
+    assert combined.count == 3
+    assert separate.count > combined.count
+    db.expire_all()
+    assert db.get(User, user.id)
+    assert not crud.in_unit_of_work(db)
+
+
+def test_unit_of_work_rolls_back(db: Session) -> None:
+    email = random_email()
+    with pytest.raises(RuntimeError), crud.unit_of_work(db):
+        user = crud.create_user(
+            session=db, user_create=UserCreate(email=email, password=random_lower_string())
+        )
+        crud.create_item(session=db, item_in=ItemCreate(title="draft"), owner_id=user.id)
+        raise RuntimeError
+
+    assert crud.get_user_by_email(session=db, email=email) is None
+    assert db.exec(select(Item).where(Item.owner_id == user.id)).first() is None
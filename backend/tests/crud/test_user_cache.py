@@ -0,0 +1,140 @@
+"""Tests for the cache of users resolved from access tokens."""
+
+import asyncio
+import time
+import uuid
+from datetime import timedelta
+
+from sqlalchemy import update
+from sqlmodel import Session, col
+from sqlmodel.ext.asyncio.session import AsyncSession
+
+from app import crud, user_deletion
+from app.api.deps import get_current_user
+from app.core.query_stats import track_queries
+from app.core.security import create_access_token
+from app.models import User, UserUpdate
+from app.user_cache import TokenRevocations, UserCache, token_revocations, user_cache
+from tests.conftest import async_test_engine
+from tests.utils.user import create_random_user
+
+
+def test_get_user_caches_users(db: Session) -> None:
+    cache = UserCache(ttl_seconds=60, max_size=10)
+    user = create_random_user(db)
+
+    with Session(db.get_bind()) as session:
+        with track_queries() as stats:
+            cache.get_user(session=session, user_id=user.id)
+        assert stats.count == 1
+    with Session(db.get_bind()) as session:
+        with track_queries() as stats:
+            cached = cache.get_user(session=session, user_id=user.id)
+        assert stats.count == 0
+        # Bound to the request's session like a loaded user
+        assert cached in session
+        assert (cached.email, cached.is_active) == (user.email, True)  # type: ignore[union-attr]
+    assert cache.hit_ratio() == {(): 0.5}
+
+
+def test_get_user_async(db: Session) -> None:
+    cache = UserCache(ttl_seconds=60, max_size=10)
+    user = create_random_user(db)
+
+    async def lookup() -> tuple[str, int]:
+        async with AsyncSession(async_test_engine) as session:
+            with track_queries() as stats:
+                found = await cache.get_user_async(session=session, user_id=user.id)
+            return found.email, stats.count  # type: ignore[union-attr]
+
+    assert asyncio.run(lookup()) == (user.email, 1)
+    assert asyncio.run(lookup()) == (user.email, 0)
+
+
+def test_get_user_expires_and_evicts(db: Session) -> None:
+    cache = UserCache(ttl_seconds=0.05, max_size=2)
+    users = [create_random_user(db) for _ in range(3)]
+    for user in users:
+        cache.get_user(session=db, user_id=user.id)
+    # Least recently used first out
+    assert len(cache) == 2
+    assert cache._get(users[0].id) is None
+
+    time.sleep(0.05)
+    assert cache._get(users[2].id) is None
+
+
+def test_get_user_disabled(db: Session) -> None:
+    cache = UserCache(ttl_seconds=60, max_size=10, enabled=False)
+    user = create_random_user(db)
+    cache.get_user(session=db, user_id=user.id)
+    assert len(cache) == 0
+
+
+def test_invalidation_during_lookup_is_not_cached(db: Session) -> None:
+    cache = UserCache(ttl_seconds=60, max_size=10)
+    user = create_random_user(db)
+    version = cache._version
+    cache.invalidate(user.id)
+    cache._put(user, version)
+    assert len(cache) == 0
+
+
+def test_update_and_deactivate_invalidate(db: Session) -> None:
+    user = create_random_user(db)
+    token = create_access_token(user.id, expires_delta=timedelta(minutes=5))
+
+    with Session(db.get_bind()) as session:
+        assert get_current_user(session, token).full_name is None
+    crud.update_user(session=db, db_user=user, user_in=UserUpdate(full_name="Renamed"))
+    with Session(db.get_bind()) as session:
+        assert get_current_user(session, token).full_name == "Renamed"
+
+    user_deletion.deactivate_user(session=db, user=user)
+    with Session(db.get_bind()) as session:
+        assert user_cache.get_user(session=session, user_id=user.id).is_active is False  # type: ignore[union-attr]
+
+
+
+def test_token_revocations() -> None:
+    revocations = TokenRevocations(retention_seconds=0.05)
+    user_id = uuid.uuid4()
+    revocations.revoke(user_id, 2)
+    revocations.revoke(user_id, 1)
+    assert revocations.is_revoked(user_id, 1)
+    assert not revocations.is_revoked(user_id, 2)
+    assert not revocations.is_revoked(uuid.uuid4(), 0)
+
+    # Dropped once every token it refuses has expired
+    time.sleep(0.05)
+    assert not revocations.is_revoked(user_id, 1)
+    revocations.revoke(uuid.uuid4(), 1)
+    assert len(revocations) == 1
+
+
+def test_password_change_revokes_tokens(db: Session) -> None:
+    user = create_random_user(db)
+    assert user.token_version == 0
+    crud.update_user(session=db, db_user=user, user_in=UserUpdate(full_name="Same role"))
+    assert user.token_version == 0
+
+    crud.update_user(session=db, db_user=user, user_in=UserUpdate(password="new-password"))
+    assert user.token_version == 1
+    assert token_revocations.is_revoked(user.id, 0)
+
+
+def test_revocation_bumps_the_stored_version(db: Session) -> None:
+    user = create_random_user(db)
+    # Bumped by another process, while this instance, like one built from
+    # token claims, still holds version 0
+    db.execute(
+        update(User).where(col(User.id) == user.id).values(token_version=1),
+        execution_options={"synchronize_session": False},
+    )
+    assert user.token_version == 0
+
+    crud.update_user(session=db, db_user=user, user_in=UserUpdate(password="new-password"))
+    assert user.token_version == 2
+    assert token_revocations.is_revoked(user.id, 1)
+    db.refresh(user)
+    assert user.token_version == 2
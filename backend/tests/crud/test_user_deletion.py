@@ -0,0 +1,51 @@
+"""Tests for batched user deletion."""
+
+from sqlmodel import Session, select
+
+from app import crud, user_deletion
+from app.models import (
+    ItemCreate,
+    StudentProgressCreate,
+    User,
+)
+from tests.utils.user import create_random_user
+
+
+def _create_history(db: Session, user: User) -> None:
+    for i in range(3):
+        crud.create_item(session=db, item_in=ItemCreate(title=f"item {i}"), owner_id=user.id)
+    for module_name in ("Networking", "Databases"):
+        crud.create_or_update_student_progress(
+            session=db,
+            user_id=user.id,
+            progress_in=StudentProgressCreate(module_name=module_name, progress=50),
+        )
+
+
+def test_delete_user_in_batches(db: Session) -> None:
+    user, other = create_random_user(db), create_random_user(db)
+    _create_history(db, user)
+    _create_history(db, other)
+    user_id = user.id
+
+    # 3 items, 2 progress rows and 2 progress events
+    assert user_deletion.count_user_rows(session=db, user_id=user_id) == 7
+    batches: list[int] = []
+    deleted = user_deletion.delete_user(
+        session=db, user_id=user_id, batch_size=2, on_progress=batches.append
+    )
+
+    assert deleted == 7
+    assert batches == [2, 1, 2, 2]
+    db.expire_all()
+    assert db.get(User, user_id) is None
+    for model, column in user_deletion.USER_ROWS:
+        assert db.exec(select(model).where(column == user_id)).first() is None
+    assert user_deletion.count_user_rows(session=db, user_id=other.id) == 7
+
+
+def test_deactivate_user(db: Session) -> None:
+    user = create_random_user(db)
+    user_deletion.deactivate_user(session=db, user=user)
+    db.expire_all()
+    assert db.get(User, user.id).is_active is False  # type: ignore[union-attr]
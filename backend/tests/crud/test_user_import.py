@@ -0,0 +1,73 @@
+import io
+import json
+from collections.abc import Generator
+from concurrent.futures import Executor, ThreadPoolExecutor
+
+import pytest
+from sqlmodel import Session
+
+from app import crud
+from app.core.security import verify_password
+from app.user_import import DUPLICATE_EMAIL, hash_passwords, import_users
+from tests.utils.user import create_random_user
+from tests.utils.utils import random_email
+
+
+@pytest.fixture
+def executor() -> Generator[Executor, None, None]:
+    with ThreadPoolExecutor(max_workers=2) as executor:
+        yield executor
+
+
+def test_hash_passwords(executor: Executor) -> None:
+    hashes = hash_passwords(["password-1", "password-2"], executor)
+    assert verify_password("password-1", hashes[0])
+    assert verify_password("password-2", hashes[1])
+
+
+def test_import_users_csv(db: Session, executor: Executor) -> None:
+    emails = [random_email() for _ in range(3)]
+    stream = io.StringIO(
+        "email,password,full_name\n"
+        + "".join(f"{email},password{i}x,Student {i}\n" for i, email in enumerate(emails))
+    )
+
+    report = import_users(
+        session=db, stream=stream, fmt="csv", chunk_size=2, executor=executor
+    )
+
+    assert (report.total, report.loaded, report.failed) == (3, 3, 0)
+    for i, email in enumerate(emails):
+        user = crud.get_user_by_email(session=db, email=email)
+        assert user
+        assert user.full_name == f"Student {i}"
+        assert user.is_active and not user.is_superuser
+        assert verify_password(f"password{i}x", user.hashed_password)
+
+
+def test_import_users_reports_bad_rows(db: Session, executor: Executor) -> None:
+    existing = create_random_user(db)
+    email = random_email()
+    lines = [
+        json.dumps({"email": email, "password": "password1"}),
+        json.dumps({"email": existing.email, "password": "password2"}),
+        json.dumps({"email": email, "password": "password3"}),
+        json.dumps({"email": "not-an-email", "password": "password4"}),
+        json.dumps({"email": random_email(), "password": "short"}),
+        "{not json",
+    ]
+
+    report = import_users(
+        session=db, stream=io.StringIO("\n".join(lines)), fmt="jsonl", executor=executor
+    )
+
+    assert (report.total, report.loaded, report.failed) == (6, 1, 5)
+    errors = {e.line: e.message for e in report.errors}
+    assert errors[2] == DUPLICATE_EMAIL
+    assert errors[3] == DUPLICATE_EMAIL
+    assert errors[4].startswith("email:")
+    assert errors[5].startswith("password:")
+    assert errors[6] == "Malformed record"
+    user = crud.get_user_by_email(session=db, email=email)
+    assert user
+    assert verify_password("password1", user.hashed_password)
@@ -0,0 +1,41 @@
+"""Pytest plugin that fails tests whose requests run too many SQL statements.
+
+    @pytest.mark.query_budget(3)
+    def test_read_progress(client: TestClient) -> None:
+        ...
+
+Every request made by a marked test must stay within the budget. Going over
+fails the test with the statement shapes that were repeated most often.
+"""
+
+from collections.abc import Generator
+
+import pytest
+
+from app.core.query_stats import observe_requests
+
+
+def pytest_configure(config: pytest.Config) -> None:
+    config.addinivalue_line(
+        "markers",
+        "query_budget(n): fail when a request made by the test runs more than n SQL statements",
+    )
+
+
+@pytest.hookimpl(wrapper=True)
+def pytest_runtest_call(item: pytest.Item) -> Generator[None, None, None]:
+    marker = item.get_closest_marker("query_budget")
+    if marker is None:
+        return (yield)
+    budget: int = marker.args[0]
+    # A failing test raises out of the yield and is reported as is
+    with observe_requests() as finished:
+        result = yield
+    over = [(route, stats) for route, stats in finished if stats.count > budget]
+    if over:
+        lines = []
+        for route, stats in over:
+            lines.append(f"{route}: {stats.count} statements (budget {budget})")
+            lines += [f"  {n}x {shape}" for shape, n in stats.shapes.most_common(3)]
+        pytest.fail("Query budget exceeded\n" + "\n".join(lines), pytrace=False)
+    return result
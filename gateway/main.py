@@ -1,9 +1,13 @@
 from fastapi import FastAPI, Request, HTTPException
 from fastapi.responses import JSONResponse
+from collections import OrderedDict
+import asyncio
 import httpx
+import jwt
 import os
 import json
 import logging
+import time
 
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
@@ -20,6 +24,159 @@ if not SERVICES:
         "example_service": "http://localhost:8000",
     }
 
+# Edge authentication: tokens are verified against the backend's published
+# keys before anything is proxied. Leave JWKS_URL empty to forward blindly.
+# The backend still checks every token it receives, including revocations
+# the gateway cannot see.
+JWKS_URL = os.getenv('JWKS_URL', '')
+JWT_ALGORITHMS = os.getenv('JWT_ALGORITHMS', 'RS256,EdDSA').split(',')
+JWKS_CACHE_SECONDS = int(os.getenv('JWKS_CACHE_SECONDS', '300'))
+JWKS_MIN_REFRESH_SECONDS = int(os.getenv('JWKS_MIN_REFRESH_SECONDS', '30'))
+VERIFIED_TOKEN_CACHE_SIZE = int(os.getenv('VERIFIED_TOKEN_CACHE_SIZE', '10000'))
+# Downstream path prefixes reachable without a token
+AUTH_PUBLIC_PATHS = tuple(
+    os.getenv(
+        'AUTH_PUBLIC_PATHS',
+        '/api/v1/login/,/.well-known/,/docs,/redoc,/openapi.json,/health',
+    ).split(',')
+)
+# Identity headers only the gateway may set
+IDENTITY_HEADER_PREFIX = 'x-user-'
+
+if not JWKS_URL:
+    logger.warning("JWKS_URL is not set, requests are proxied without authentication")
+
+
+class KeySet:
+    """Public keys of the JWKS endpoint, refetched when they expire or a
+    token names an unknown key ID, at most every min_refresh seconds."""
+
+    def __init__(self, url: str, max_age: int, min_refresh: int):
+        self.url = url
+        self.max_age = max_age
+        self.min_refresh = min_refresh
+        self._keys: dict[str, jwt.PyJWK] = {}
+        self._fetched_at = float('-inf')
+        self._lock = asyncio.Lock()
+
+    async def _refresh(self):
+        async with httpx.AsyncClient() as client:
+            response = await client.get(self.url, timeout=5.0)
+            response.raise_for_status()
+        keys = {}
+        for data in response.json().get('keys', []):
+            try:
+                key = jwt.PyJWK(data)
+            except jwt.PyJWKError:
+                continue
+            if key.key_id:
+                keys[key.key_id] = key
+        self._keys = keys
+        self._fetched_at = time.monotonic()
+
+    async def get(self, kid: str):
+        age = time.monotonic() - self._fetched_at
+        if age > self.max_age or (kid not in self._keys and age > self.min_refresh):
+            async with self._lock:
+                # Another request may have refreshed while we waited
+                age = time.monotonic() - self._fetched_at
+                if age > self.max_age or (kid not in self._keys and age > self.min_refresh):
+                    try:
+                        await self._refresh()
+                    except (httpx.HTTPError, ValueError) as e:
+                        logger.error(f"Error fetching {self.url}: {e}")
+                        if not self._keys:
+                            raise HTTPException(
+                                status_code=503, detail="Token keys unavailable"
+                            )
+        return self._keys.get(kid)
+
+
+class VerifiedTokens:
+    """LRU of tokens already verified, with their claims, until they expire."""
+
+    def __init__(self, max_size: int):
+        self.max_size = max_size
+        self._claims: OrderedDict[str, dict] = OrderedDict()
+
+    def get(self, token: str):
+        claims = self._claims.get(token)
+        if claims is None:
+            return None
+        if claims['exp'] <= time.time():
+            del self._claims[token]
+            return None
+        self._claims.move_to_end(token)
+        return claims
+
+    def add(self, token: str, claims: dict):
+        self._claims[token] = claims
+        self._claims.move_to_end(token)
+        while len(self._claims) > self.max_size:
+            self._claims.popitem(last=False)
+
+
+key_set = KeySet(JWKS_URL, JWKS_CACHE_SECONDS, JWKS_MIN_REFRESH_SECONDS)
+verified_tokens = VerifiedTokens(VERIFIED_TOKEN_CACHE_SIZE)
+
+
+def unauthorized(detail: str):
+    return HTTPException(
+        status_code=401, detail=detail, headers={"WWW-Authenticate": "Bearer"}
+    )
+
+
+async def verify_token(token: str) -> dict:
+    """Claims of a valid access token, raising 401 otherwise"""
+    claims = verified_tokens.get(token)
+    if claims is not None:
+        return claims
+    try:
+        header = jwt.get_unverified_header(token)
+        key = await key_set.get(header.get('kid', ''))
+        if key is None:
+            raise unauthorized("Unknown token signing key")
+        # The key's algorithm, never the one the token claims
+        if key.algorithm_name not in JWT_ALGORITHMS:
+            raise unauthorized("Unsupported token algorithm")
+        claims = jwt.decode(
+            token,
+            key.key,
+            algorithms=[key.algorithm_name],
+            options={"require": ["exp", "sub"]},
+        )
+    except jwt.InvalidTokenError:
+        raise unauthorized("Could not validate credentials")
+    if claims.get('type', 'access') != 'access':
+        raise unauthorized("Could not validate credentials")
+    verified_tokens.add(token, claims)
+    return claims
+
+
+async def authenticate(path: str, request: Request) -> dict:
+    """Downstream identity headers for the request, raising 401 outside the
+    public paths unless it carries a valid token"""
+    if not JWKS_URL:
+        return {}
+    public = f"/{path}".startswith(AUTH_PUBLIC_PATHS)
+    scheme, _, token = request.headers.get('authorization', '').partition(' ')
+    if scheme.lower() != 'bearer' or not token:
+        if public:
+            return {}
+        raise unauthorized("Not authenticated")
+    try:
+        claims = await verify_token(token)
+    except HTTPException:
+        # Clients send their stale token along, to the refresh route too
+        if public:
+            return {}
+        raise
+    identity = {'x-user-id': str(claims['sub'])}
+    if 'is_superuser' in claims:
+        identity['x-user-is-superuser'] = str(claims['is_superuser']).lower()
+    return identity
+
+
 @app.get("/")
 async def root():
     return {
@@ -46,6 +203,7 @@ async def gateway_proxy(service_name: str, path: str, request: Request):
     
     service_url = SERVICES[service_name]
     target_url = f"{service_url}/{path}"
+    identity = await authenticate(path, request)
     
     # Forward request
     async with httpx.AsyncClient() as client:
@@ -58,8 +216,10 @@ async def gateway_proxy(service_name: str, path: str, request: Request):
             response = await client.request(
                 method=request.method,
                 url=target_url,
-                headers={k: v for k, v in request.headers.items() 
-                        if k.lower() not in ['host', 'connection']},
+                headers={**{k: v for k, v in request.headers.items() 
+                            if k.lower() not in ['host', 'connection']
+                            and not k.lower().startswith(IDENTITY_HEADER_PREFIX)},
+                         **identity},
                 content=body,
                 params=request.query_params,
                 timeout=30.0
@@ -0,0 +1,192 @@
+"""Token verification at the gateway, against a stub backend.
+
+    python -m pytest gateway/tests
+"""
+
+import functools
+import time
+import uuid
+
+import httpx
+import jwt
+import pytest
+from cryptography.hazmat.primitives.asymmetric import ed25519
+from fastapi.testclient import TestClient
+from jwt.algorithms import OKPAlgorithm
+
+from gateway import main as gateway
+
+JWKS_URL = "http://backend/.well-known/jwks.json"
+
+
+class Backend:
+    """Serves a JWKS and echoes the identity headers it is sent."""
+
+    def __init__(self):
+        self.keys = {}
+        self.jwks_requests = 0
+        self.available = True
+
+    def add_key(self, kid: str):
+        self.keys[kid] = ed25519.Ed25519PrivateKey.generate()
+
+    def token(self, kid: str = "key-1", **claims) -> str:
+        payload = {
+            "sub": str(uuid.uuid4()),
+            "exp": int(time.time()) + 300,
+            "type": "access",
+            **claims,
+        }
+        return jwt.encode(payload, self.keys[kid], algorithm="EdDSA", headers={"kid": kid})
+
+    def handle(self, request: httpx.Request) -> httpx.Response:
+        if request.url.path == "/.well-known/jwks.json":
+            self.jwks_requests += 1
+            if not self.available:
+                return httpx.Response(503)
+            keys = [
+                {
+                    **OKPAlgorithm.to_jwk(key.public_key(), as_dict=True),
+                    "kid": kid,
+                    "alg": "EdDSA",
+                    "use": "sig",
+                }
+                for kid, key in self.keys.items()
+            ]
+            return httpx.Response(200, json={"keys": keys})
+        identity = {k: v for k, v in request.headers.items() if k.startswith("x-user-")}
+        return httpx.Response(200, json={"identity": identity})
+
+
+@pytest.fixture
+def backend(monkeypatch: pytest.MonkeyPatch) -> Backend:
+    backend = Backend()
+    backend.add_key("key-1")
+    transport = httpx.MockTransport(backend.handle)
+    monkeypatch.setattr(
+        httpx, "AsyncClient", functools.partial(httpx.AsyncClient, transport=transport)
+    )
+    monkeypatch.setattr(gateway, "SERVICES", {"backend": "http://backend"})
+    monkeypatch.setattr(gateway, "JWKS_URL", JWKS_URL)
+    monkeypatch.setattr(gateway, "key_set", gateway.KeySet(JWKS_URL, 300, 30))
+    monkeypatch.setattr(gateway, "verified_tokens", gateway.VerifiedTokens(100))
+    return backend
+
+
+@pytest.fixture
+def client() -> TestClient:
+    return TestClient(gateway.app)
+
+
+def bearer(token: str) -> dict:
+    return {"Authorization": f"Bearer {token}"}
+
+
+def test_invalid_tokens_are_rejected(client: TestClient, backend: Backend):
+    url = "/backend/api/v1/users/me"
+    r = client.get(url)
+    assert r.status_code == 401
+    assert r.headers["WWW-Authenticate"] == "Bearer"
+    for token in (
+        "junk",
+        backend.token(exp=int(time.time()) - 10),
+        backend.token(type="refresh"),
+        backend.token()[:-4] + "AAAA",
+    ):
+        assert client.get(url, headers=bearer(token)).status_code == 401
+    assert backend.jwks_requests == 1
+
+
+def test_identity_is_passed_downstream(client: TestClient, backend: Backend):
+    token = backend.token(is_superuser=True)
+    subject = jwt.decode(token, options={"verify_signature": False})["sub"]
+    r = client.get(
+        "/backend/api/v1/users/me",
+        headers={**bearer(token), "X-User-Id": "spoofed", "X-User-Role": "admin"},
+    )
+    assert r.status_code == 200
+    # The client's own identity headers never reach the backend
+    assert r.json()["identity"] == {
+        "x-user-id": subject,
+        "x-user-is-superuser": "true",
+    }
+
+
+def test_public_paths(client: TestClient, backend: Backend):
+    url = "/backend/api/v1/login/refresh-token"
+    r = client.post(url, headers={"X-User-Id": "spoofed"})
+    assert r.status_code == 200
+    assert r.json()["identity"] == {}
+    # A stale token sent along does not block the refresh
+    expired = backend.token(exp=int(time.time()) - 10)
+    r = client.post(url, headers=bearer(expired))
+    assert r.status_code == 200
+    assert r.json()["identity"] == {}
+
+
+def test_unknown_key_refetch_is_rate_limited(client: TestClient, backend: Backend):
+    def status(token: str) -> int:
+        return client.get("/backend/api/v1/items/", headers=bearer(token)).status_code
+
+    assert status(backend.token()) == 200
+    assert backend.jwks_requests == 1
+
+    backend.add_key("key-2")
+    rotated = backend.token("key-2")
+    # Within JWKS_MIN_REFRESH_SECONDS of the last fetch the kid stays unknown
+    assert status(rotated) == 401
+    assert backend.jwks_requests == 1
+    gateway.key_set._fetched_at -= 31
+    assert status(rotated) == 200
+    assert backend.jwks_requests == 2
+    # Tokens of the previous key keep verifying without a fetch
+    assert status(backend.token()) == 200
+    assert backend.jwks_requests == 2
+
+
+def test_keys_unavailable(client: TestClient, backend: Backend):
+    token = backend.token()
+    backend.available = False
+    assert client.get("/backend/api/v1/items/", headers=bearer(token)).status_code == 503
+    backend.available = True
+    assert client.get("/backend/api/v1/items/", headers=bearer(token)).status_code == 200
+    # Once fetched, expired keys keep being used while the endpoint is down
+    backend.available = False
+    gateway.key_set._fetched_at -= 301
+    other = backend.token()
+    assert client.get("/backend/api/v1/items/", headers=bearer(other)).status_code == 200
+    assert backend.jwks_requests == 3
+
+
+def test_verified_tokens_are_cached(
+    client: TestClient, backend: Backend, monkeypatch: pytest.MonkeyPatch
+):
+    decoded = []
+    decode = jwt.decode
+    monkeypatch.setattr(jwt, "decode", lambda *a, **k: decoded.append(1) or decode(*a, **k))
+    token = backend.token()
+    for _ in range(3):
+        assert client.get("/backend/api/v1/items/", headers=bearer(token)).status_code == 200
+    assert len(decoded) == 1
+
+
+def test_verified_tokens_lru():
+    tokens = gateway.VerifiedTokens(2)
+    exp = time.time() + 60
+    tokens.add("a", {"exp": exp})
+    tokens.add("b", {"exp": exp})
+    assert tokens.get("a")
+    tokens.add("c", {"exp": exp})
+    # b was the least recently used
+    assert tokens.get("b") is None
+    assert tokens.get("a") and tokens.get("c")
+    tokens.add("expired", {"exp": time.time() - 1})
+    assert tokens.get("expired") is None
+
+
+def test_without_jwks_url_requests_pass(client: TestClient, backend: Backend, monkeypatch):
+    monkeypatch.setattr(gateway, "JWKS_URL", "")
+    r = client.get("/backend/api/v1/items/", headers={"X-User-Id": "spoofed"})
+    assert r.status_code == 200
+    assert r.json()["identity"] == {}
+    assert backend.jwks_requests == 0